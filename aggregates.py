@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# aggregates.py — Tabelas agregadas (materialized views) dos statements, mantidas pelo export
+#
+#   aggregates/module_counts.csv   module, count
+#   aggregates/verb_counts.csv     verb, count
+#   aggregates/module_verb.csv     module, verb_lc, count
+#   aggregates/daily.csv           date (UTC), count
+#   aggregates/activity.csv        activity, attempts, answers
+#   aggregates/satisf_users.csv    user (submeteram o inquérito de satisfação)
+#
+# São contagens aditivas: cada chunk novo é agregado e somado às tabelas
+# existentes, por isso o dashboard nunca precisa de percorrer os statements.
+
+import os
+import pandas as pd
+
+import file_lock
+import normalize
+
+AGG_DIR = "aggregates"
+
+# tabela → colunas-chave (as restantes são contagens a somar)
+KEYS = {
+    "module_counts": ["module"],
+    "verb_counts":   ["verb"],
+    "module_verb":   ["module", "verb_lc"],
+    "daily":         ["date"],
+    "activity":      ["activity"],
+    "satisf_users":  ["user"],
+}
+COUNTS = {
+    "module_counts": ["count"],
+    "verb_counts":   ["count"],
+    "module_verb":   ["count"],
+    "daily":         ["count"],
+    "activity":      ["attempts", "answers"],
+    "satisf_users":  [],
+}
+# tabelas parciais (uma por chunk) acumuladas antes de as somar de uma vez
+PARTS = 200
+# colunas necessárias para calcular as tabelas
+SOURCE_COLS = ["timestamp", "user", "module", "verb", "activity"]
+
+def empty():
+    return {name: pd.DataFrame(columns=KEYS[name] + COUNTS[name]) for name in KEYS}
+
+def exists(root=AGG_DIR):
+    return all(os.path.isfile(os.path.join(root, f"{name}.csv")) for name in KEYS)
+
+# ─── CÁLCULO ───────────────────────────────────────────────────
+def compute(df):
+    # frames já normalizados (dashboard) são usados tal como estão
+    if "verb_lc" not in df.columns:
+        df = normalize.normalize(df)
+    module = df["module"].astype(str)
+    verb_lc = df["verb_lc"].astype(str)
+
+    tables = {
+        "module_counts": module.value_counts().rename_axis("module").reset_index(name="count"),
+        "verb_counts": df["verb"].astype(str).value_counts().rename_axis("verb").reset_index(name="count"),
+        "module_verb": (
+            pd.DataFrame({"module": module, "verb_lc": verb_lc})
+            .value_counts().reset_index(name="count")
+        ),
+        # conta por dia e só depois formata as datas (strftime linha a linha é lento)
+        "daily": (
+            df["timestamp"].dt.tz_convert("UTC").dt.floor("D").value_counts()
+            .pipe(lambda c: c.set_axis(c.index.strftime("%Y-%m-%d")))
+            .rename_axis("date").reset_index(name="count")
+        ),
+    }
+
+    # tentativas / respostas por atividade (pergunta)
+    is_attempt, is_answer = df["is_attempt"], df["is_answer"]
+    act = pd.DataFrame({
+        "activity": df["activity"].astype(str),
+        "attempts": is_attempt.astype(int),
+        "answers": is_answer.astype(int),
+    })[is_attempt | is_answer]
+    tables["activity"] = act.groupby("activity", as_index=False)[["attempts", "answers"]].sum()
+
+    # utilizadores que submeteram o inquérito de satisfação
+    users = df.loc[df["is_satisfaction_submit"], "user"].astype(str)
+    tables["satisf_users"] = users.drop_duplicates().to_frame("user").reset_index(drop=True)
+    return tables
+
+def combine(*parts):
+    # soma tabelas parciais (as guardadas e as de cada chunk) numa só passagem:
+    # um concat, um groupby e uma ordenação por tabela, seja qual for o número
+    # de partes. Juntar chunk a chunk repetiria tudo isto em cada chunk
+    out = {}
+    for name, keys in KEYS.items():
+        both = pd.concat([p[name] for p in parts], ignore_index=True)
+        if COUNTS[name]:
+            both = both.groupby(keys, as_index=False)[COUNTS[name]].sum()
+        else:
+            both = both.drop_duplicates(keys)
+        out[name] = both.sort_values(keys).reset_index(drop=True)
+    return out
+
+# ─── PERSISTÊNCIA ──────────────────────────────────────────────
+def save(tables, root=AGG_DIR):
+    os.makedirs(root, exist_ok=True)
+    # escreve tudo em temporários escondidos (".") e troca as tabelas de uma
+    # vez, sob lock: o dashboard nunca vê uma tabela a meio nem tabelas de
+    # versões diferentes
+    for name, table in tables.items():
+        table.to_csv(os.path.join(root, f".{name}.csv.tmp"), index=False, encoding="utf8")
+    with file_lock.exclusive(os.path.join(root, ".lock")):
+        for name in tables:
+            os.replace(os.path.join(root, f".{name}.csv.tmp"), os.path.join(root, f"{name}.csv"))
+
+def load(root=AGG_DIR):
+    if not exists(root):
+        return empty()
+    tables = {}
+    with file_lock.shared(os.path.join(root, ".lock")):
+        for name, keys in KEYS.items():
+            dtypes = {k: str for k in keys}
+            dtypes.update({c: "int64" for c in COUNTS[name]})
+            tables[name] = pd.read_csv(os.path.join(root, f"{name}.csv"), dtype=dtypes,
+                                       keep_default_na=False)
+    return tables
@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
 # clean_evaluations.py — Limpeza dos CSVs de avaliação (ID + respostas)
 
-import pandas as pd
 import os
+import sys
+import argparse
+
+import courses
+import gradebook
 
 # ─── CONFIGURAÇÃO ───────────────────────────────────────────────
+# CSV bruto do Moodle → CSV limpo, como chaves de `files` do curso (courses.py)
 FILES = {
-    "diagnostica": "A2D.12-Avaliação Diagnóstica-notas.csv",
-    "final":       "A2D.12-Avaliação Final-notas.csv",
-    "satisfacao":  "Avalia_o_Satisfa_o_do_curso.csv",
+    "diagnostica": ("diag_raw",   "diag_csv"),
+    "final":       ("final_raw",  "final_csv"),
+    "satisfacao":  ("satisf_raw", "satisf_csv"),
 }
 
 # Colunas a remover em cada ficheiro
@@ -30,14 +35,13 @@ DROP_COLUMNS = {
 }
 
 # ─── FUNÇÃO DE LIMPEZA ───────────────────────────────────────────
-def clean_file(key: str, path: str):
+def clean_file(key: str, path: str, out_file: str):
     if not os.path.isfile(path):
         print(f"⚠️  Ficheiro não encontrado: {path}")
         return
 
-    # 1) Leitura automática do separador e remoção de BOM/spaces
-    df = pd.read_csv(path, sep=None, engine="python", encoding="utf8")
-    df.columns = df.columns.str.replace('\ufeff', '', regex=False).str.strip()
+    # 1) Leitura única (gradebook.py): separador detetado no cabeçalho, sem BOM/spaces
+    df = gradebook.load(path).raw
 
     # 2) Elimina as colunas indesejadas
     to_drop = DROP_COLUMNS.get(key, [])
@@ -49,14 +53,24 @@ def clean_file(key: str, path: str):
         df_clean = df_clean.rename(columns={ first: "id" })
 
     # 4) Escreve o CSV limpo
-    out_file = f"{key}_clean.csv"
     df_clean.to_csv(out_file, index=False, encoding="utf8")
     print(f"✔️  {out_file} criado com colunas: {list(df_clean.columns)}")
 
-def main():
-    print("🔹 Iniciando limpeza dos ficheiros de avaliação...\n")
-    for key, filepath in FILES.items():
-        clean_file(key, filepath)
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Limpa os CSVs de avaliação exportados do Moodle.")
+    ap.add_argument("--course", help="id do curso em courses.json (por omissão, o primeiro)")
+    args = ap.parse_args(argv)
+    course = courses.get(args.course)
+
+    # falha logo (antes de escrever qualquer CSV) se faltar um ficheiro do curso
+    missing = [f"{raw}: {course.path(raw)}" for raw, _ in FILES.values() if not os.path.isfile(course.path(raw))]
+    if missing:
+        sys.exit(f"❌ Ficheiros do curso {course.id} não encontrados (ver files em {courses.COURSES_FILE}):\n  "
+                 + "\n  ".join(missing))
+
+    print(f"🔹 Iniciando limpeza dos ficheiros de avaliação ({course.title})...\n")
+    for key, (raw, clean) in FILES.items():
+        clean_file(key, course.path(raw), course.path(clean))
     print("\n🔹 Limpeza concluída.")
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# bench_export.py — Throughput e resiliência do export.py contra o lrs_standin.py
+#
+#   python bench_export.py                       # 20k statements sintéticos, 30 ms/pedido
+#   python bench_export.py --statements 100000 --latency 50
+#   python bench_export.py --replay gravacao.jsonl
+#
+# Cada cenário corre o export.main() numa pasta temporária (estado e store
+# limpos) contra um stand-in local com a latência/erros/rate limit indicados.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import export
+from lrs_standin import StandinLRS, start_server, synthetic_statements, load_recording
+
+SINCE = "2025-06-11T12:00:00Z"
+UNTIL = "2025-07-11T12:00:00Z"
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (nome, argumentos do export, opções do stand-in)
+SCENARIOS = [
+    ("serial",           [],                {}),
+    ("shards=4",         ["--shards", "4"], {}),
+    ("shards=8",         ["--shards", "8"], {}),
+    ("serial, 5% 5xx",   [],                {"error_rate": 0.05}),
+    ("shards=8, 429",    ["--shards", "8"], {"rate_limit": 5}),
+]
+
+def run_scenario(stmts, export_args, latency_ms, **lrs_opts):
+    lrs = StandinLRS(stmts, latency_ms=latency_ms, seed=1, **lrs_opts)
+    server, endpoint = start_server(lrs)
+    workdir = tempfile.mkdtemp(prefix="bench_export_")
+    shutil.copy(os.path.join(HERE, export.MAP_CSV), workdir)
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        t0 = time.perf_counter()
+        export.main(["--endpoint", endpoint, "--since", SINCE, "--until", UNTIL] + export_args)
+        elapsed = time.perf_counter() - t0
+        with open(export.STATE_FILE, encoding="utf8") as f:
+            rows = json.load(f)["last_run_rows"]
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+        server.shutdown()
+    return elapsed, rows, dict(lrs.hits)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark do export.py contra o lrs_standin.py.")
+    ap.add_argument("--statements", type=int, default=20_000)
+    ap.add_argument("--replay", help="statements gravados com `lrs_standin.py record`")
+    ap.add_argument("--latency", type=float, default=30, help="latência por pedido (ms)")
+    args = ap.parse_args(argv)
+
+    stmts = load_recording(args.replay) if args.replay else synthetic_statements(args.statements)
+    results = []
+    for name, export_args, lrs_opts in SCENARIOS:
+        print(f"\n─── {name} ───")
+        elapsed, rows, hits = run_scenario(stmts, export_args, args.latency, **lrs_opts)
+        results.append((name, elapsed, rows, hits))
+
+    print(f"\n{len(stmts)} statements, {args.latency:.0f} ms/pedido")
+    print(f"{'cenário':<16} | {'tempo':>8} | {'st/s':>9} | {'linhas':>7} | pedidos/erros/429")
+    for name, elapsed, rows, hits in results:
+        ok = "" if rows == len(stmts) else "  ⚠️ incompleto"
+        print(f"{name:<16} | {elapsed:>7.2f}s | {rows / elapsed:>9,.0f} | {rows:>7} | "
+              f"{hits['requests']}/{hits['errors']}/{hits['throttled']}{ok}")
+    return 0 if all(r[2] == len(stmts) for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
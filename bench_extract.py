@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# bench_extract.py — Compara o flatten antigo (json_normalize + apply) com o statement_extract
+#
+#   python bench_extract.py            # 10k, 100k statements
+#   python bench_extract.py 50000      # tamanhos à escolha
+
+import re
+import sys
+import time
+import pandas as pd
+
+from statement_extract import extract_batch
+from lrs_standin import synthetic_statements
+
+# ─── CAMINHO ANTIGO (export.py antes do statement_extract) ──────
+def legacy_module_from_parent(parents):
+    if isinstance(parents, list):
+        for p in parents:
+            m = re.search(r"section\.php\?id=(\d+)", p.get("id", ""))
+            if m:
+                return f"Módulo {m.group(1)}"
+    return None
+
+def legacy_cmid(object_id):
+    if isinstance(object_id, str):
+        m = re.search(r"view\.php\?id=(\d+)", object_id)
+        if m:
+            return int(m.group(1))
+    return None
+
+def legacy_flatten(stmts):
+    df = pd.json_normalize(stmts)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    df["cmid"] = df["object.id"].apply(legacy_cmid).astype("Int64")
+    parent_col = next((c for c in df.columns if "contextActivities.parent" in c), None)
+    df[parent_col] = df[parent_col].apply(lambda x: x if isinstance(x, list) else [])
+    exploded = df.explode(parent_col)
+    exploded["module_parent"] = exploded[parent_col].apply(legacy_module_from_parent)
+    modules = exploded[["id", "module_parent"]].dropna(subset=["module_parent"]).drop_duplicates("id")
+    df = df.merge(modules, on="id", how="left")
+    df["verb"] = df["verb.display.en"].fillna(df["verb.id"].str.rsplit("/", n=1).str[-1])
+    desc_cols = [c for c in df.columns if c.startswith("object.definition.description")]
+    name_cols = [c for c in df.columns if c.startswith("object.definition.name.en-US")]
+    df["activity"] = df[desc_cols[0]].fillna(df[name_cols[0]]).fillna(df["object.id"])
+    df["user"] = df["actor.account.name"]
+    return df[["id", "timestamp", "user", "cmid", "verb", "activity"]]
+
+# ─── BENCHMARK ──────────────────────────────────────────────────
+def best_of(fn, stmts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(stmts)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main(sizes):
+    print(f"{'statements':>10} | {'json_normalize':>16} | {'extract_batch':>16} | speedup")
+    for n in sizes:
+        stmts = synthetic_statements(n)
+        t_old, old = best_of(legacy_flatten, stmts)
+        t_new, new = best_of(extract_batch, stmts)
+        # os dois caminhos têm de produzir os mesmos campos
+        cols = ["id", "timestamp", "user", "cmid", "verb", "activity"]
+        pd.testing.assert_frame_equal(
+            old[cols].reset_index(drop=True), new[cols].reset_index(drop=True),
+            check_dtype=False,
+        )
+        print(f"{n:>10} | {n / t_old:>10,.0f} st/s | {n / t_new:>10,.0f} st/s | "
+              f"{t_old / t_new:.1f}x")
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 100_000])
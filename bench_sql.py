@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# bench_sql.py — Agregações do dashboard: pandas (statements em memória) vs base SQL embebida
+#
+#   python bench_sql.py                        # 10k, 1M e 10M statements
+#   python bench_sql.py 10000 1000000          # tamanhos à escolha
+#
+# Para cada tamanho gera statements sintéticos já limpos (workload.py),
+# carrega-os nos dois caminhos e mede os painéis do dashboard: agregados sem
+# filtros, agregados com filtros (módulo + período) e sessões. O motor SQL é o do sql_store.py
+# (DuckDB se estiver instalado, senão SQLite).
+
+import os
+import sys
+import time
+import tempfile
+from datetime import date
+
+import pandas as pd
+
+import aggregates
+import normalize
+import sessions
+import sql_store
+import statement_index
+import workload
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+CHUNK = 500_000
+FILTERS = {"start": date(2025, 6, 15), "end": date(2025, 6, 21), "modules": ("Módulo 1", "Módulo 2")}
+
+def synthetic(n, seed=0):
+    # chunks de statements limpos (as colunas que o export escreve)
+    return workload.clean_frames(n, seed=seed, chunk=CHUNK)
+
+def timed(func):
+    t0 = time.perf_counter()
+    result = func()
+    return time.perf_counter() - t0, result
+
+def bench_pandas(n):
+    def load():
+        df = pd.concat(list(synthetic(n)), ignore_index=True)
+        return statement_index.StatementIndex(normalize.normalize(df))
+    t_load, index = timed(load)
+    df = index.df
+    mem = df.memory_usage(deep=True).sum() / 1e6
+    t_all, _ = timed(lambda: aggregates.compute(df))
+    t_filt, _ = timed(lambda: aggregates.compute(index.slice(
+        FILTERS["start"], FILTERS["end"], list(FILTERS["modules"]), [], [])))
+    t_sess, _ = timed(lambda: sessions.compute(df))
+    return {"carga": t_load, "agregados": t_all, "filtrados": t_filt, "sessões": t_sess,
+            "memória (MB)": mem}
+
+def bench_sql(n, tmp):
+    path = os.path.join(tmp, sql_store.DB_FILE)
+    t_load, _ = timed(lambda: sql_store.rebuild(synthetic(n), path))
+    with sql_store.reader(path) as conn:
+        t_all, res = timed(lambda: sql_store.aggregates(conn))
+        t_filt, _ = timed(lambda: sql_store.aggregates(conn, **FILTERS))
+        t_sess, _ = timed(lambda: sql_store.sessions(conn, sessions.GAP_MINUTES))
+    mem = sum(t.memory_usage(deep=True).sum() for t in res.values()) / 1e6
+    return {"carga": t_load, "agregados": t_all, "filtrados": t_filt, "sessões": t_sess,
+            "memória (MB)": mem}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    sizes = [int(a) for a in argv] or SIZES
+    rows = []
+    for n in sizes:
+        print(f"⏱️ {n:,} statements...")
+        rows.append({"statements": n, "caminho": "pandas", **bench_pandas(n)})
+        with tempfile.TemporaryDirectory(prefix="bench_sql_") as tmp:
+            rows.append({"statements": n, "caminho": sql_store.ENGINE, **bench_sql(n, tmp)})
+    table = pd.DataFrame(rows).set_index(["statements", "caminho"])
+    print("\nTempos em segundos; memória = frame dos statements (pandas) ou resultados (SQL)")
+    print(table.round(3).to_string())
+
+if __name__ == "__main__":
+    main()
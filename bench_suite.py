@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# bench_suite.py — Benchmark de ponta a ponta (export + painéis do dashboard) com baseline
+#
+#   python bench_suite.py                      # 10k, 1M e 10M statements, compara com a baseline
+#   python bench_suite.py 10000 1000000        # tamanhos à escolha
+#   python bench_suite.py 10000 --save-baseline
+#   python bench_suite.py --tolerance 0.5      # regressão = +50% de tempo (por omissão 30%)
+#
+# Para cada tamanho gera um curso sintético (workload.py) e mede cada etapa:
+#
+#   export     flatten (statement_extract), módulos (module_resolver), escrita
+#              no store, agregados e sessões incrementais (como o ChunkWriter)
+#   carga      leitura do store + normalize + StatementIndex (como o dashboard)
+#   admin      agregados, agregados filtrados (módulo + período)
+#   learn      sessões, notas (gradebook), ganhos emparelhados, satisfação,
+#              análise de itens (satisfação e avaliações)
+#
+# Antes de medir, confirma o workload em CHECK_SIZE statements: statements()
+# (dicts xAPI → flatten → módulos, o caminho do export) e clean_frames() dão
+# as mesmas linhas, e os módulos resolvidos têm o peso de cada módulo em
+# workload.COURSE (± SHARE_TOLERANCE). Um workload errado falha aqui em vez de
+# produzir tempos que não medem o que se pensa.
+#
+# Cada tamanho corre num processo próprio, para que o pico de memória (RSS)
+# de cada etapa não herde o dos tamanhos anteriores. Os resultados são
+# comparados com bench_baseline.json: uma etapa mais lenta do que a baseline
+# além da tolerância (e de MIN_DELTA_S), ou com mais memória além de
+# MEM_TOLERANCE (e de MIN_DELTA_MB), é uma regressão e o script sai com 1.
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import date
+
+import pandas as pd
+
+import aggregates
+import gradebook
+import item_analysis
+import module_resolver
+import normalize
+import paired_gains
+import sessions
+import statement_index
+import statement_store
+import workload
+from stage_metrics import PeakMemory, Stages
+from statement_extract import extract_batch
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+BASELINE = "bench_baseline.json"
+TOLERANCE = 0.3
+MEM_TOLERANCE = 0.2
+MIN_DELTA_S = 0.05       # diferenças abaixo disto são ruído
+MIN_DELTA_MB = 32
+CHECK_SIZE = 10_000
+SHARE_TOLERANCE = 0.02   # diferença absoluta tolerada no peso de cada módulo
+FILTERS = {"start": date(2025, 6, 15), "end": date(2025, 6, 21), "modules": ["Módulo 1", "Módulo 2"]}
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ─── ETAPAS ────────────────────────────────────────────────────
+def check_workload(tmp, n=CHECK_SIZE):
+    # statements() e clean_frames() concordam e os módulos saem com o peso esperado
+    users = max(10, n // 100)
+    map_csv = os.path.join(tmp, "check_cmid_module_map.csv")
+    workload.write_cmid_map(map_csv)
+    resolver = module_resolver.ModuleResolver(map_csv, os.path.join(tmp, "check_module_index.json"))
+    parts = []
+    for batch in workload.statements(n, users=users):
+        df = extract_batch(batch)
+        df["module"] = resolver.resolve(df["cmid"], df["section_id"])
+        parts.append(df[statement_store.COLUMNS])
+    exported = pd.concat(parts, ignore_index=True)
+    clean = pd.concat(workload.clean_frames(n, users=users), ignore_index=True)
+
+    problems = []
+    if len(exported) != n or len(clean) != n:
+        problems.append(f"{len(exported)} statements exportados e {len(clean)} limpos, esperados {n}")
+    else:
+        for col in statement_store.COLUMNS:
+            a, b = exported[col], clean[col]
+            differ = int(((a.astype(str).to_numpy() != b.astype(str).to_numpy())
+                          & ~(a.isna().to_numpy() & b.isna().to_numpy())).sum())
+            if differ:
+                problems.append(f"coluna {col}: {differ} linhas diferentes entre statements() e clean_frames()")
+
+    expected = pd.Series(workload.SHARES / workload.SHARES.sum(), index=[c[1] for c in workload.COURSE])
+    course = exported["module"].astype(str)
+    course = course[course.isin(expected.index)]
+    unknown = set(exported["module"].astype(str)) - set(expected.index) - {"Outro"}
+    if unknown:
+        problems.append(f"módulos fora do curso: {sorted(unknown)}")
+    shares = course.value_counts(normalize=True).reindex(expected.index, fill_value=0.0)
+    for module, diff in (shares - expected).items():
+        if abs(diff) > SHARE_TOLERANCE:
+            problems.append(f"{module}: peso {shares[module]:.3f}, esperado {expected[module]:.3f}")
+    if problems:
+        raise RuntimeError("Workload sintético inconsistente:\n  " + "\n  ".join(problems))
+
+def run_size(n, tmp):
+    users = max(10, n // 100)
+    people = workload.students(users)
+    map_csv = os.path.join(tmp, "cmid_module_map.csv")
+    workload.write_cmid_map(map_csv)
+    store = os.path.join(tmp, "store")
+    bench = Stages(PeakMemory())
+
+    # export: o mesmo caminho do ChunkWriter.write, chunk a chunk
+    resolver = module_resolver.ModuleResolver(map_csv, os.path.join(tmp, "module_index.json"))
+    agg_parts, sessionizer = [], sessions.Sessionizer()
+    for batch in workload.statements(n, users=users):
+        with bench.stage("export: flatten"):
+            df = extract_batch(batch)
+        del batch
+        with bench.stage("export: módulos"):
+            df["module"] = resolver.resolve(df["cmid"], df["section_id"])
+            clean = df[statement_store.COLUMNS]
+        with bench.stage("export: store"):
+            statement_store.append(clean, store)
+        with bench.stage("export: agregados"):
+            agg_parts.append(aggregates.compute(clean))
+            if len(agg_parts) >= aggregates.PARTS:
+                agg_parts = [aggregates.combine(*agg_parts)]
+        with bench.stage("export: sessões"):
+            sessionizer.update(clean)
+        del df, clean
+    with bench.stage("export: agregados"):
+        aggregates.combine(aggregates.empty(), *agg_parts)
+    with bench.stage("export: sessões"):
+        sessionizer.tables()
+
+    # dashboard: carga partilhada e painéis
+    with bench.stage("carga: store"):
+        df = statement_store.read(store)
+    with bench.stage("carga: normalize + índice"):
+        index = statement_index.StatementIndex(normalize.normalize(df))
+        df = index.df
+    with bench.stage("admin: agregados"):
+        aggregates.compute(df)
+    with bench.stage("admin: filtros"):
+        aggregates.compute(index.slice(FILTERS["start"], FILTERS["end"], FILTERS["modules"], [], []))
+    with bench.stage("learn: sessões"):
+        tables = sessions.compute(df)
+        sessions.per_user(tables), sessions.per_module(tables)
+
+    diag, final, satisf = (os.path.join(tmp, f) for f in ("diag.csv", "final.csv", "satisf.csv"))
+    workload.gradebook(people).to_csv(diag, index=False, encoding="utf8")
+    workload.gradebook(people, gain=0.6).to_csv(final, index=False, encoding="utf8")
+    workload.satisfaction(people, template=os.path.join(HERE, workload.SATISF_TEMPLATE)) \
+        .to_csv(satisf, sep=";", index=False, encoding="utf-8-sig")
+    with bench.stage("learn: notas"):
+        gradebook.load(diag).question_means(), gradebook.load(final).question_means()
+    with bench.stage("learn: ganhos"):
+        paired_gains.analyse(gradebook.load(diag), gradebook.load(final))
+    with bench.stage("learn: satisfação"):
+        raw, _ = gradebook.read_raw(satisf)
+        likert = [c for c in raw.columns if c[:3] in ("Q01", "Q02", "Q03")]
+        raw[likert].apply(pd.to_numeric, errors="coerce").mean()
+    with bench.stage("learn: análise de itens"):
+        item_analysis.analyse(raw[likert], max_scores=5, min_score=1)
+        for path in (diag, final):
+            book = gradebook.load(path)
+            item_analysis.analyse(book.scores, book.max_scores)
+    bench.memory.stop()
+    return {stage: {"s": round(r["s"], 4), "mb": round(r["peak_mb"], 1)} for stage, r in bench.results.items()}
+
+def run_isolated(n):
+    # corre um tamanho num processo novo e devolve os resultados
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--one", str(n)],
+                         cwd=HERE, check=True, capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+# ─── BASELINE ──────────────────────────────────────────────────
+def environment():
+    return {"python": platform.python_version(), "pandas": pd.__version__,
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def load_baseline(path):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf8") as f:
+        return json.load(f)
+
+def compare(results, baseline, tolerance):
+    # tabela com a baseline lado a lado e a lista de regressões
+    rows, regressions = [], []
+    for n, stages in results.items():
+        base = baseline.get("sizes", {}).get(str(n), {})
+        for stage, now in stages.items():
+            ref = base.get(stage)
+            row = {"statements": n, "etapa": stage, "s": now["s"], "MB": now["mb"]}
+            if ref:
+                row["base s"], row["base MB"] = ref["s"], ref["mb"]
+                row["Δ s %"] = (now["s"] / ref["s"] - 1) * 100 if ref["s"] else 0.0
+                slow = now["s"] > ref["s"] * (1 + tolerance) and now["s"] - ref["s"] > MIN_DELTA_S
+                fat = now["mb"] > ref["mb"] * (1 + MEM_TOLERANCE) and now["mb"] - ref["mb"] > MIN_DELTA_MB
+                if slow:
+                    regressions.append(f"{n:,} · {stage}: {ref['s']:.3f}s → {now['s']:.3f}s")
+                if fat:
+                    regressions.append(f"{n:,} · {stage}: {ref['mb']:.0f} MB → {now['mb']:.0f} MB")
+            rows.append(row)
+    return pd.DataFrame(rows).set_index(["statements", "etapa"]), regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark de ponta a ponta com baseline.")
+    ap.add_argument("sizes", nargs="*", type=int)
+    ap.add_argument("--baseline", default=os.path.join(HERE, BASELINE))
+    ap.add_argument("--tolerance", type=float, default=TOLERANCE,
+                    help="aumento de tempo tolerado (fração, por omissão 0.3)")
+    ap.add_argument("--save-baseline", action="store_true",
+                    help="grava os resultados como baseline (junta aos tamanhos já gravados)")
+    ap.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.one:
+        tmp = tempfile.mkdtemp(prefix="bench_suite_")
+        try:
+            print(json.dumps(run_size(args.one, tmp)))
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return 0
+
+    # no processo principal: os processos medidos não herdam a memória da verificação
+    tmp = tempfile.mkdtemp(prefix="bench_check_")
+    try:
+        check_workload(tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    print(f"✅ Workload verificado ({CHECK_SIZE:,} statements).", flush=True)
+
+    results = {}
+    for n in args.sizes or SIZES:
+        print(f"⏱️ {n:,} statements...", flush=True)
+        results[n] = run_isolated(n)
+
+    baseline = load_baseline(args.baseline)
+    table, regressions = compare(results, baseline, args.tolerance)
+    print("\nTempos em segundos; MB = pico de memória residente do processo durante a etapa")
+    print(table.round(3).to_string())
+
+    if args.save_baseline:
+        baseline.setdefault("sizes", {}).update({str(n): r for n, r in results.items()})
+        baseline["env"] = environment()
+        with open(args.baseline, "w", encoding="utf8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"💾 Baseline gravada em {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"ℹ️ Sem baseline ({args.baseline}): corre com --save-baseline para a criar.")
+        return 0
+    if baseline.get("env") != environment():
+        print(f"⚠️ Baseline medida noutro ambiente: {baseline.get('env')}")
+    if regressions:
+        print("\n❌ Regressões:")
+        for r in regressions:
+            print(f"   {r}")
+        return 1
+    print("\n✅ Sem regressões face à baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# charts.py — Gráficos matplotlib renderizados para PNG, com cache
+#
+# Cada gráfico é desenhado numa matplotlib.figure.Figure própria (fora do
+# estado global do pyplot, por isso nada fica registado nem por fechar) e
+# devolvido como bytes PNG. A cache é indexada pelo hash dos dados (a tabela
+# agregada) e pelos parâmetros do gráfico: um rerun com os mesmos dados não
+# volta a desenhar nada. É partilhada pelas sessões e pelas threads de fundo
+# (relatório PDF), com tamanho limitado (LRU).
+
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+MAX_ENTRIES = 128
+
+_cache = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+def data_hash(data):
+    # hash estável de uma Series/DataFrame: valores + índice + nomes das colunas
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    names = data.columns if isinstance(data, pd.DataFrame) else [data.name]
+    h.update(repr(list(names)).encode())
+    return h.hexdigest()
+
+# ─── DESENHO ───────────────────────────────────────────────────
+def _draw(kind, data, title=None, xlabel=None, ylabel=None, figsize=(8, 4),
+          rotation=None, legend_title=None, label=None, width=0.5, hide_spines=False):
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    if kind == "bar":
+        data.plot.bar(ax=ax, width=width, label=label)
+    elif kind == "stacked_bar":
+        data.plot.bar(ax=ax, stacked=True)
+    elif kind == "line":
+        data.plot(ax=ax)
+    else:
+        raise ValueError(f"Tipo de gráfico desconhecido: {kind}")
+    if title:
+        ax.set_title(title)
+    if xlabel:
+        ax.set_xlabel(xlabel)
+    if ylabel:
+        ax.set_ylabel(ylabel)
+    if rotation is not None:
+        for tick in ax.get_xticklabels():
+            tick.set_rotation(rotation)
+            tick.set_ha("right")
+    if hide_spines:
+        ax.spines["top"].set_visible(False)
+        ax.spines["right"].set_visible(False)
+    if legend_title:
+        ax.legend(title=legend_title, bbox_to_anchor=(1.02, 1), loc="upper left")
+    elif label:
+        ax.legend()
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    fig.clear()
+    return buf.getvalue()
+
+def render(kind, data, **params):
+    # devolve os bytes PNG do gráfico (da cache, se os dados não mudaram)
+    key = (kind, data_hash(data), repr(sorted(params.items())))
+    with _lock:
+        png = _cache.get(key)
+        if png is not None:
+            _cache.move_to_end(key)
+            stats["hits"] += 1
+            return png
+        stats["misses"] += 1
+    png = _draw(kind, data, **params)
+    with _lock:
+        _cache[key] = png
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return png
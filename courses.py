@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# courses.py — Registo dos cursos (courses.json), lido pelo export.py e pelo dashboard
+#
+# Cada curso tem a sua pasta de dados (store, agregados, estado do export, CSVs
+# de avaliação) e a sua organização no Watershed:
+#
+#   {"courses": [{"id": "a2d12", "title": "Animação 2D", "dir": "cursos/a2d12",
+#                 "org_id": "27295", "since": "2025-06-11T12:00:00Z",
+#                 "files": {"diag_csv": ..., "final_csv": ..., "satisf_csv": ...,
+#                           "diag_raw": ..., "final_raw": ..., "satisf_raw": ...,
+#                           "statements_csv": ...}}]}
+#
+# Caminhos relativos são resolvidos a partir da pasta do courses.json.
+
+import os
+import json
+
+COURSES_FILE = "courses.json"
+
+# ficheiros por omissão (os exportados do Moodle que vêm com o repositório e os
+# que o avas_export.py e o export.py escrevem)
+DEFAULT_FILES = {
+    "statements_csv": "statements_clean.csv",
+    "diag_csv":       "diagnostica_clean.csv",
+    "final_csv":      "final_clean.csv",
+    "satisf_csv":     "satisfacao_clean.csv",
+    "diag_raw":       "a2d12_avaliacao_diagnostica_notas.csv",
+    "final_raw":      "a2d12_avaliação_final-notas.csv",
+    "satisf_raw":     "Avalia_o_Satisfa_o_do_curso.csv",
+}
+
+class Course:
+    def __init__(self, entry, base_dir="."):
+        self.id = entry["id"]
+        self.title = entry.get("title", self.id)
+        self.dir = os.path.normpath(os.path.join(base_dir, entry.get("dir", self.id)))
+        self.org_id = entry.get("org_id")
+        self.endpoint = entry.get("endpoint")
+        self.since = entry.get("since")
+        self.files = {**DEFAULT_FILES, **entry.get("files", {})}
+
+    def path(self, name):
+        # ficheiro/pasta do curso; `name` é uma chave de `files` ou um nome relativo
+        return os.path.join(self.dir, self.files.get(name, name))
+
+def load(path=COURSES_FILE):
+    # sem courses.json: um só curso com os dados na pasta atual
+    try:
+        with open(path, encoding="utf8") as f:
+            entries = json.load(f)["courses"]
+    except FileNotFoundError:
+        return [Course({"id": "default", "title": "Curso", "dir": "."})]
+    base_dir = os.path.dirname(path) or "."
+    return [Course(e, base_dir) for e in entries]
+
+def get(course_id=None, path=COURSES_FILE):
+    registry = load(path)
+    if course_id is None:
+        return registry[0]
+    for course in registry:
+        if course.id == course_id:
+            return course
+    raise KeyError(f"Curso desconhecido: {course_id} (ver {path})")
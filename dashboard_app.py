@@ -1,17 +1,28 @@
 #!/usr/bin/env python3
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import subprocess, sys
-import unidecode
-from dateutil import parser
 import re
 import os
-from fpdf import FPDF
-import tempfile
+import statement_store
+import data_loader
+import refresh_job
+import aggregates
+import sessions
+import sql_store
+import charts
+import report
+import gradebook
+import paired_gains
+import item_analysis
+import profiling
+import courses
 
 # --- CONFIGURAÇÃO GERAL ---
-st.set_page_config(page_title="Dashboard Animação 2D", layout="wide")
+COURSES = courses.load()
+st.set_page_config(
+    page_title=f"Dashboard {COURSES[0].title}" if len(COURSES) == 1 else "Dashboard de Cursos",
+    layout="wide",
+)
 
 # --- AUTENTICAÇÃO SIMPLES ---
 CREDENTIALS = {
@@ -40,76 +51,100 @@ if not st.session_state.logged_in:
     st.stop()
 
     
+# ─── 0. Curso (courses.json) ───────────────────────────────────
+# os dados de cada curso só são carregados quando o curso é aberto
+course_titles = {c.id: c.title for c in COURSES}
+course_id = st.sidebar.selectbox("🎓 Curso", list(course_titles), format_func=course_titles.get)
+course = courses.get(course_id)
+
 # ─── 1. Constantes ─────────────────────────────────────────────┐
-CSV_FILE = "statements_clean.csv"
-DIAG_CSV       = 'diagnostica_clean.csv'
-FINAL_CSV      = 'final_clean.csv'
-SATISF_CSV     = 'satisfacao_clean.csv'
-DIAG_RAW = "a2d12_avaliacao_diagnostica_notas.csv"
-FINAL_RAW = "a2d12_avaliação_final-notas.csv"
+CSV_FILE = course.path("statements_csv")
+STORE_DIR = course.path(statement_store.STORE_DIR)
+AGG_DIR = course.path(aggregates.AGG_DIR)
+SESSIONS_DIR = course.path(sessions.SESSIONS_DIR)
+SQL_DB = course.path(sql_store.DB_FILE)
+# colunas de statements usadas pelo dashboard (id/cmid não são lidos)
+STATEMENT_COLS = ["timestamp", "user", "module", "verb", "activity"]
+DIAG_CSV       = course.path("diag_csv")
+FINAL_CSV      = course.path("final_csv")
+SATISF_CSV     = course.path("satisf_csv")
+DIAG_RAW       = course.path("diag_raw")
+FINAL_RAW      = course.path("final_raw")
 # ────────────────────────────────────────────────────────────────┘
 
 # --- BOTÃO PARA ATUALIZAR ---
-from streamlit.runtime.scriptrunner import RerunException, RerunData
-if st.button("🔄 Atualizar dados"):
-    # chama o export.py com o mesmo interpretador Python
-    subprocess.run([sys.executable, "export.py"], check=True)
-    # força o Streamlit a reiniciar o script
-    raise RerunException(RerunData())
-    
-# ──────────────────────────┐
-@st.cache_data
-# --- FUNÇÃO: EXTRAIR MÉDIAS DE PERGUNTAS DO CSV BRUTO ---
-def extract_avg_scores(path):
-    
-    # 1) Leitura com vírgula como separador
-    df_raw = pd.read_csv(path, sep=',', encoding='utf8', dtype=str)
-
-    # 2) Procura a linha 'Média' na primeira coluna
-    first_col = df_raw.columns[0]
-    mask = df_raw[first_col].str.strip().eq("Média")
-    if not mask.any():
-        raise ValueError(f"Média row not found in {path}")
-
-    avg_row = df_raw[mask].iloc[0]
-
-    # 3) Seleciona apenas colunas de pergunta, por exemplo 'P. 1 /0,77'
-    #    usar regex para pegar colunas que começam por 'P.'
-    q_cols = [c for c in df_raw.columns if re.match(r"^\s*P\.\s*\d+", c)]
-    if not q_cols:
-        raise ValueError(f"No question columns found in {path}")
-
-    # 4) Extrai valores, substitui vírgula por ponto e converte em float
-    avg_scores = {}
-    for col in q_cols:
-        raw = avg_row[col]
-        if pd.isna(raw):
-            continue
-        # mantém apenas a parte numérica antes de qualquer espaço
-        # ou "/" para tirar o "/0,77" que acompanha no header
-        val_str = re.split(r"[ /]", raw.strip())[0]
-        val_str = val_str.replace(",", ".")
-        try:
-            avg_scores[col] = float(val_str)
-        except ValueError:
-            # ignora se não der para converter
-            continue
-
-    # 5) Retorna Series com índice "P. 1", "P. 2", ...
-    #    retirando o resto do texto da coluna
-    clean_index = [re.match(r"P\.\s*(\d+)", c).group(0) for c in avg_scores.keys()]
-    return pd.Series(list(avg_scores.values()), index=clean_index)
+# o export corre em background (um só de cada vez por curso, partilhado entre
+# sessões); os dados novos aparecem no rerun seguinte (caches com a assinatura
+# dos ficheiros)
+@st.cache_resource
+def get_refresh_manager(course_id, workdir):
+    return refresh_job.RefreshManager(workdir, course_id)
+
+@st.cache_resource
+def get_report_jobs():
+    return report.ReportJobs()
+
+refresh = get_refresh_manager(course.id, course.dir)
+if st.button("🔄 Atualizar dados", disabled=refresh.running()):
+    if not refresh.start():
+        st.info("⏳ Já existe uma atualização a correr.")
+    else:
+        st.session_state["refresh_run"] = refresh.run_id
+    st.rerun()
+
+@st.fragment(run_every=2)
+def refresh_status():
+    p = refresh.progress() or {}
+    if refresh.running():
+        st.info(f"⏳ A atualizar dados: {p.get('pages', 0)} páginas, "
+                f"{p.get('received', 0)} statements recebidos, {p.get('written', 0)} novos escritos.")
+    else:
+        # terminou: rerun da app inteira para carregar os dados publicados
+        st.session_state["refresh_seen"] = p.get("updated")
+        st.rerun()
+
+p = refresh.progress()
+if refresh.running():
+    refresh_status()
+elif refresh.returncode and st.session_state.get("refresh_run") == refresh.run_id:
+    # o export saiu com erro, possivelmente antes de escrever o progresso
+    # (lock ocupado, credenciais inválidas, ...): mostra o fim do export.log
+    st.error(f"❌ A atualização falhou (código {refresh.returncode}):\n```\n{refresh.log_tail()}\n```")
+elif p and st.session_state.get("refresh_seen") == p.get("updated"):
+    if p.get("status") == "failed":
+        st.error(f"❌ A atualização falhou: {p.get('error')}")
+    elif p.get("status") == "done":
+        st.success(f"✅ Dados atualizados: {p.get('written', 0)} statements novos.")
+
+# --- PERFIL DOS RERUNS (profiling.py): tempo, linhas e caches de cada secção ---
+@st.cache_resource
+def get_profiler():
+    return profiling.Profiler()
+
+def cache_counters():
+    # (acertos, cargas) das caches partilhadas pelo processo
+    cache = data_loader.dataset_cache()
+    return {"datasets": (cache.hits, cache.misses),
+            "gráficos": (charts.stats["hits"], charts.stats["misses"]),
+            "gradebooks": (gradebook.stats["hits"], gradebook.stats["misses"])}
+
+if "profile_rerun" in st.session_state:
+    st.session_state.profile_rerun.abandon()  # o rerun anterior não chegou ao fim
+prof = st.session_state.profile_rerun = get_profiler().start(st.session_state.user_role, cache_counters)
 
-# --- no seu fluxo principal, troque a chamada anterior por:
+# ──────────────────────────┐
+# --- MÉDIAS DE PERGUNTAS DOS CSVs BRUTOS (gradebook.py: cada ficheiro é lido uma vez por versão) ---
+sec = prof.section("Médias dos CSVs brutos")
 try:
-    diag_avgs  = extract_avg_scores(DIAG_RAW)
-    final_avgs = extract_avg_scores(FINAL_RAW)
+    diag_avgs  = gradebook.load(DIAG_RAW).question_means()
+    final_avgs = gradebook.load(FINAL_RAW).question_means()
     # monte um DataFrame para exibir lado a lado
     df_evol = pd.DataFrame({
         "Diagnóstica": diag_avgs,
         "Final":      final_avgs
     }).dropna(how="all")  # tira perguntas que não existem em nenhum
     df_evol["Diferença"] = (df_evol["Final"] - df_evol["Diagnóstica"]).round(1)
+    sec["rows"] = len(df_evol)
 
     #st.subheader("📈 Evolução Média por Pergunta")
     #st.dataframe(df_evol, use_container_width=True)
@@ -120,30 +155,25 @@ except Exception as e:
 
 # --- FUNÇÃO: CARREGAMENTO DE DADOS ---
 def load_data():
-    df = pd.read_csv(CSV_FILE)
-    df.columns = df.columns.map(str)
-    # 2.1 Timestamp → datetime[ns, UTC]
-    df["timestamp"] = (
-        df["timestamp"]
-        .astype(str)  # garante object
-        .apply(lambda s: parser.isoparse(s) if s and s.lower() != "nan" else pd.NaT)
-        .dt.tz_convert("UTC")
+    # cache partilhada entre sessões, invalidada pelo mtime/tamanho dos ficheiros;
+    # os statements só são carregados pelos painéis que precisam deles
+    # avaliações (um curso novo pode ainda não ter os CSVs)
+    return tuple(
+        data_loader.load_csv(p) if os.path.isfile(p) else pd.DataFrame()
+        for p in (DIAG_CSV, FINAL_CSV, SATISF_CSV)
     )
-    # 2.2 Limpa módulo de espaços/brancos invisíveis
-    df["module"] = df["module"].astype(str).str.strip()
-    # avaliações
-    df_diag = pd.read_csv(DIAG_CSV)
-    df_final = pd.read_csv(FINAL_CSV)
-    df_satis = pd.read_csv(SATISF_CSV)
-    return df, df_diag, df_final, df_satis
 
 # --- INICIALIZA OS DADOS ---
-df, df_diag, df_final, df_satis = load_data()
+sec = prof.section("Carregamento")
+df_diag, df_final, df_satis = load_data()
+# Tabelas agregadas (calculadas pelo export.py, não percorrem os statements)
+aggs = data_loader.load_aggregates(AGG_DIR, CSV_FILE, STORE_DIR, SQL_DB)
 # Lista de módulos realmente existentes (ordenada)
-modules_list = sorted(df["module"].dropna().unique())
+modules_list = sorted(aggs["module_counts"]["module"])
+sec["rows"] = len(df_diag) + len(df_final) + len(df_satis) + int(aggs["module_counts"]["count"].sum())
 # ────────────────────────────────────────────────────────────────┘
 def load_satisfacao():
-    df = pd.read_csv(SATISF_CSV, encoding="utf8")
+    df = data_loader.load_csv(SATISF_CSV)
     # 1) Concelhos: colunas que começam por “Q05_Distrito”
     concelhos = [c for c in df.columns if c.startswith("Q05_Distrito")]
     # melt para apanhar o concelho com valor True/1
@@ -218,43 +248,68 @@ else:
 # ─── VISÃO ADMINISTRATIVA ─────────────────────────────────────────────
 if st.session_state.view == "admin":
     st.title("🔧 Visão Admin")
-    st.text("Dashboard de administração do curso Animação 2D")
+    st.text(f"Dashboard de administração do curso {course.title}")
     st.text("Este painel tem dados completos, para uma visão de síntese e já com algumas conclusões, por favor aceda à Visão Learn Stats")
 
+    # ─── FILTROS ─────────────────────────────────────────────────
+    # com a base SQL (export --sql) os filtros são consultas; sem ela, índice
+    # ordenado por timestamp (pesquisa binária) + linhas por módulo
+    sec = prof.section("Filtros")
+    use_sql = data_loader.use_sql(SQL_DB)
+    if use_sql:
+        first_day, last_day, all_users, n_total = data_loader.sql_overview(SQL_DB)
+    else:
+        index = data_loader.load_index(CSV_FILE, STORE_DIR, STATEMENT_COLS)
+        first_day, last_day = index.date_range()
+        all_users, n_total = sorted(index.df["user"].cat.categories), len(index)
+    st.sidebar.header("🔎 Filtros")
+    date_range = st.sidebar.date_input(
+        "Período", value=(first_day, last_day) if first_day else (),
+        min_value=first_day, max_value=last_day,
+    )
+    sel_modules = st.sidebar.multiselect("Módulo", modules_list)
+    sel_verbs = st.sidebar.multiselect("Verbo", sorted(aggs["verb_counts"]["verb"]))
+    sel_users = st.sidebar.multiselect("Utilizador", all_users)
+
+    start, end = (date_range + (None, None))[:2] if isinstance(date_range, tuple) else (date_range, None)
+    if (start, end) == (first_day, last_day):
+        start = end = None
+    if start or end or sel_modules or sel_verbs or sel_users:
+        # só a fatia filtrada é agregada; sem filtros usam-se as tabelas do export
+        if use_sql:
+            aggs = data_loader.sql_aggregates(SQL_DB, start, end, sel_modules, sel_verbs, sel_users)
+        else:
+            df_sel = index.slice(start, end, sel_modules, sel_verbs, sel_users)
+            aggs = aggregates.compute(df_sel) if len(df_sel) else aggregates.empty()
+        n_sel = int(aggs["module_counts"]["count"].sum())
+        st.caption(f"🔎 Filtros ativos: {n_sel} de {n_total} statements.")
+    sec["rows"] = n_total
+    panel_modules = sel_modules or modules_list
+
     # ─── MÉTRICAS GERAIS ─────────────────────────────────────────
     st.header("Visão Geral")
+    sec = prof.section("Visão Geral")
     c1, c2, c3 = st.columns(3)
-    c1.metric("Total Statements", len(df))
-    c2.metric("Total Módulos", df["module"].nunique())
+    c1.metric("Total Statements", int(aggs["module_counts"]["count"].sum()))
+    c2.metric("Total Módulos", len(aggs["module_counts"]))
 
-    # Normaliza coluna module para filtragem
-    df["module_norm"] = (
-        df["module"]
-        .astype(str)
-        .fillna("")
-        .apply(unidecode.unidecode)
-        .str.lower()
-        .str.strip()
-    )
-    df["verb_lc"] = df["verb"].str.lower()
-    
-    # Filtra utilizadores que submeteram o questionário de satisfação
-    mask_satisf_submit = (
-            (df["verb_lc"] == "submitted") &
-            (df["module_norm"].str.contains("satisfacao", na=False))
-    )
-
-    # Conta utilizadores únicos
-    n_users_satisf = df[mask_satisf_submit]["user"].nunique()
+    # Utilizadores únicos que submeteram o questionário de satisfação
+    n_users_satisf = len(aggs["satisf_users"])
 
     # Atualiza métrica com esse valor
     c3.metric("Total Utilizadores", n_users_satisf)
 
      # ─── STATEMENTS POR MÓDULO ──────────────────────────────────
     st.subheader("📦 Statements por Módulo")
+    sec = prof.section("Statements por Módulo")
+    sec["rows"] = len(aggs["module_counts"])
 
     # Garante zero para módulos sem statements hoje
-    mod_counts = df["module"].value_counts().reindex(modules_list, fill_value=0)
+    mod_counts = (
+        aggs["module_counts"]
+        .set_index("module")["count"]
+        .reindex(panel_modules, fill_value=0)
+    )
 
     # Tabela
     st.dataframe(
@@ -263,21 +318,22 @@ if st.session_state.view == "admin":
         .reset_index(name="Contagem")
     )
 
-    # Gráfico de barras
-    fig, ax = plt.subplots(figsize=(8,4))
-    mod_counts.plot.bar(ax=ax)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.set_xlabel("Módulo")
-    ax.set_ylabel("Número de statements")
-    plt.xticks(rotation=45, ha='right')
-    st.pyplot(fig)
-    plt.tight_layout()
+    # Gráfico de barras (PNG em cache enquanto a contagem não mudar)
+    st.image(charts.render(
+        "bar", mod_counts, figsize=(8, 4), xlabel="Módulo",
+        ylabel="Número de statements", rotation=45, hide_spines=True,
+    ))
    
     # ─── VERBOS POR MÓDULO ──────────────────────────────────────
     st.subheader("🔤 Verbos mais comuns")
+    sec = prof.section("Verbos mais comuns")
+    sec["rows"] = len(aggs["verb_counts"])
     # 1) Pivot table: linhas = módulo, colunas = verbo, valores = contagem
-    verb_counts = df["verb"].value_counts()
+    verb_counts = (
+        aggs["verb_counts"]
+        .set_index("verb")["count"]
+        .sort_values(ascending=False)
+    )
     st.dataframe(
         verb_counts
         .rename_axis("Verbo")
@@ -287,52 +343,56 @@ if st.session_state.view == "admin":
     # ────────────────────────────────────────────────────────────────┘
     # ─── X. Contagem de Verbos por Módulo ────────────────────────────
     st.subheader("📊 Verbos por Módulo")
+    sec = prof.section("Verbos por Módulo")
+    sec["rows"] = len(aggs["module_verb"])
 
     # 1) Pivot table: linhas = módulo, colunas = verbo, valores = contagem
     verbs_of_interest = ["completed","answered","progressed","interacted","attempted"]
-    # normaliza tudo para lowercase para evitar duplicados
-    df["verb_lc"] = df["verb"].str.lower()
-
+    # verbos já em lowercase na tabela module_verb, para evitar duplicados
+    module_verb = aggs["module_verb"]
     pivot = (
-        df[df["verb_lc"].isin(verbs_of_interest)]
-        .groupby(["module","verb_lc"])
-        .size()
-        .unstack(fill_value=0)
+        module_verb[module_verb["verb_lc"].isin(verbs_of_interest)]
+        .pivot_table(index="module", columns="verb_lc", values="count",
+                     aggfunc="sum", fill_value=0)
         .reindex(columns=verbs_of_interest, fill_value=0)
     )
+    pivot.columns.name = None
 
     # 2) Exibe tabela
     st.dataframe(pivot.rename_axis("Módulo").rename(columns=str.capitalize))
 
     # 3) Gráfico de barras empilhadas (opcional)
-    fig2, ax2 = plt.subplots(figsize=(10, 5))
-    pivot.plot(
-        kind="bar",
-        stacked=True,
-        ax=ax2
-    )
-    ax2.set_xlabel("Módulo")
-    ax2.set_ylabel("Contagem de Statements")
-    ax2.legend(title="Verbo", bbox_to_anchor=(1.02,1), loc="upper left")
-    plt.xticks(rotation=45, ha="right")
-    st.pyplot(fig2)
+    if pivot.empty:
+        st.info("Sem statements destes verbos para os filtros escolhidos.")
+    else:
+        st.image(charts.render(
+            "stacked_bar", pivot, figsize=(10, 5), xlabel="Módulo",
+            ylabel="Contagem de Statements", rotation=45, legend_title="Verbo",
+        ))
 
     # ─── 7. Evolução Diária de Statements ──────────────────────────┐
     st.subheader("📅 Evolução Diária de Statements")
-
-    # Garante que estamos usando DatetimeIndex
-    df_daily = df.set_index("timestamp").resample("D").size()
+    sec = prof.section("Evolução Diária")
+    sec["rows"] = len(aggs["daily"])
+
+    # Contagens diárias (UTC), com zero nos dias sem statements
+    df_daily = (
+        aggs["daily"]
+        .assign(date=lambda d: pd.to_datetime(d["date"], utc=True))
+        .set_index("date")["count"]
+        .asfreq("D", fill_value=0)
+    )
     st.line_chart(df_daily)
     
     
     # ─── TENTATIVAS Por Pergunta ──────────────────────────────
     st.subheader("❓ Tentativas por Pergunta")
+    sec = prof.section("Tentativas por Pergunta")
+    sec["rows"] = len(aggs["activity"])
     st.text("Perguntas do módulo 1 ao 4 (perguntas dos conteúdos H5P). ")
-    # filtra statements com verbo contendo 'attempt' e 'answer'
-    df_attempts = df[df['verb'].str.lower().str.contains('attempt', na=False)]
-
-    # conta tentativas e respondidas por activity
-    attempts = df_attempts['activity'].value_counts()
+    # tentativas por activity (verbo contendo 'attempt'), da tabela agregada
+    attempts = aggs["activity"].set_index("activity")["attempts"]
+    attempts = attempts[attempts > 0].sort_values(ascending=False)
 
     # mantém só perguntas que começam por "Pergunta"
     mask = attempts.index.str.startswith("Pergunta")
@@ -354,23 +414,19 @@ if st.session_state.view == "admin":
         # exibe tabela completa
         # st.dataframe(df_q_sorted, use_container_width=True)
         # gráfico de barras agrupadas
-        fig, ax = plt.subplots(figsize=(10, 5))
-        x = range(len(df_q_sorted))
-        ax.bar(x, df_q_sorted['Tentativas'], width=0.4, label='Tentativas')
-
-        ax.set_xticks([i + 0.2 for i in x])
-        ax.set_xticklabels(df_q_sorted['Pergunta'], rotation=45, ha='right')
-        ax.set_xlabel("Pergunta")
-        ax.set_ylabel("Contagem")
-        ax.legend()
-        plt.tight_layout()
-        st.pyplot(fig)
+        st.image(charts.render(
+            "bar", df_q_sorted.set_index("Pergunta")["Tentativas"], figsize=(10, 5),
+            width=0.4, label="Tentativas", xlabel="Pergunta", ylabel="Contagem", rotation=45,
+        ))
     
     # ─── Avaliações & Satisfação ──────────────────────────
     st.header("📊 Avaliação diagnóstica, Avaliação final e Inquérito de Satisfação")
+    sec = prof.section("Avaliações e Satisfação")
+    sec["rows"] = len(df_diag) + len(df_final) + len(df_satis)
     #st.text("Todas respostas")
     tabs = st.tabs(["Ava. Diagnóstica", "Ava. Final", "Inq. Satisfação"])
-    df_diag.columns = [col.replace("id", "Tempo") if col.lower() == "id" else col for col in df_diag.columns]
+    # frame partilhado (data_loader): rename devolve um frame novo, sem cópia dos dados
+    df_diag = df_diag.rename(columns=lambda col: col.replace("id", "Tempo") if col.lower() == "id" else col)
 
     with tabs[0]:
         st.subheader("📝 Avaliação Diagnóstica")
@@ -394,157 +450,188 @@ if st.session_state.view == "admin":
             qs_counts = df_satis.groupby('Pergunta')['Resposta'].value_counts().unstack(fill_value=0)
             st.bar_chart(qs_counts)
 
+    # ─── Memória ──────────────────────────────────────────
+    # datasets guardados uma vez por processo e partilhados por todas as sessões
+    sec = prof.section("Memória")
+    cache = data_loader.dataset_cache()
+    with st.expander("🧠 Memória dos datasets partilhados"):
+        st.text("Cada dataset é carregado uma só vez por processo do servidor e lido por todas "
+                "as sessões sem cópias: a memória não cresce com o número de utilizadores ligados.")
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Em cache (MB)", f"{cache.used() / 1024 / 1024:.1f}",
+                  f"orçamento {cache.budget / 1024 / 1024:.0f} MB", delta_color="off")
+        m2.metric("Datasets", len(cache.report()))
+        m3.metric("Acertos / cargas", f"{cache.hits} / {cache.misses}",
+                  f"{cache.evictions} removidos", delta_color="off")
+        st.dataframe(pd.DataFrame(cache.report(), columns=["dataset", "MB"]).round(3),
+                     use_container_width=True)
+        per_column = pd.DataFrame(cache.columns_report(), columns=["dataset", "parte", "coluna", "tipo", "MB"])
+        st.dataframe(per_column.sort_values("MB", ascending=False).round(3), use_container_width=True)
+    prof.finish()
+
+    # ─── Perfil dos reruns ────────────────────────────────
+    # tempo de cada secção nos últimos reruns de todas as sessões (profiling.py)
+    profiler = get_profiler()
+    with st.expander("⏱️ Perfil dos reruns"):
+        st.text("Tempo de cada secção do dashboard nos últimos reruns (de todas as sessões), "
+                "linhas processadas e acertos/cargas das caches (datasets, gráficos, gradebooks).")
+        p1, p2 = st.columns(2)
+        last = p1.slider("Últimos reruns", 1, profiling.KEEP_RERUNS, min(10, profiling.KEEP_RERUNS))
+        view = p2.radio("Visão", ["todas", "admin", "learn"], horizontal=True)
+        view = None if view == "todas" else view
+        runs = profiler.reruns(last, view)
+        if not runs:
+            st.info("Ainda não há reruns registados.")
+        else:
+            totals = pd.Series([r["total_s"] for r in runs])
+            m1, m2, m3 = st.columns(3)
+            m1.metric("Reruns", len(runs))
+            m2.metric("Rerun médio (s)", f"{totals.mean():.2f}")
+            m3.metric("Rerun mais lento (s)", f"{totals.max():.2f}")
+            st.dataframe(profiler.summary(last, view).round(3), use_container_width=True)
+            st.dataframe(profiler.table(last, view).round(3), use_container_width=True)
+            st.download_button("⬇️ Exportar perfil (JSON)", profiler.to_json(last, view),
+                               file_name="perfil_dashboard.json", mime="application/json")
+
 
 # ────────────────────────────────────────────────────────────────┘
 # ───  Visão Learn Stats ────────────────────────────────────────
 else:
     st.title("📊 Visão Learn Stats")
-    st.text("Dashboard de estatísticas do curso Animação 2D")
+    st.text(f"Dashboard de estatísticas do curso {course.title}")
+    missing = [p for p in (DIAG_CSV, FINAL_CSV, SATISF_CSV) if not os.path.isfile(p)]
+    if missing:
+        st.warning(f"⚠️ Faltam os CSVs de avaliação deste curso: {', '.join(missing)}")
+        st.stop()
     st.text("Esta visão tem dados já filtrados e com algumas conclusões. Esta visão é aconselhada a professores.")
     #  Carrega dados limpos
-    df_sat = pd.read_csv("satisfacao_clean.csv", encoding="utf8")
+    sec = prof.section("Caracterização da Amostra")
+    df_sat = data_loader.load_csv(SATISF_CSV)
 
     #  Caracterização da Amostra
     # ————————————————————————————————————————————————
     st.header("📝Caracterização da Amostra")
 
     df_satis = load_satisfacao()
+    sec["rows"] = len(df_sat)
 
     # st.subheader("🔹 Tabela de Caracterização")
     # st.dataframe(df_satis)
 
     # Distribuições
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.subheader("Distrito")
-        st.bar_chart(df_satis["Distrito"].value_counts())
-    with col2:
-        st.subheader("Nacionalidade")
-        st.bar_chart(df_satis["Nacionalidade"].value_counts())
-    with col3:
-        st.subheader("Escolaridade")
-        st.bar_chart(df_satis["Escolaridade"].value_counts())
-
-        # ─── Tempo Diagnóstica → Satisfação por Utilizador ────────────────
-    #st.subheader("⏱️ Tempo")
-    #st.text("Tempo médio que os utilizadores levaram a concluir o curso. Foi contabilizado todo o tempo desde que iniciou até que finalizou. Assim mesmo que o utilizador fizesse log-off entre sessões, esse tempo foi contabilizado")
-    # 1) Normaliza módulo
-    df["module_norm"] = (
-        df["module"]
-        .fillna("")
-        .astype(str)
-        .apply(unidecode.unidecode)  # tira acentos
-        .str.lower()
-    )
-    # 2) normaliza verbos
-    df["verb_lc"] = df["verb"].str.lower()
-
-    # 3) máscaras corretas
-    start_mask = (
-            (df["verb_lc"] == "viewed") &
-            df["module_norm"].str.contains("diagnostica", na=False)
-    )
-    end_mask = (
-            (df["verb_lc"].isin(["submitted", "answered"])) &
-            df["module_norm"].str.contains("satisf", na=False)
-    )
-
-    # 5) agrupa e intersecta users
-    starts = df[start_mask].groupby("user")["timestamp"].min()
-    ends = df[end_mask].groupby("user")["timestamp"].max()
-    common = starts.index.intersection(ends.index)
-
-    if len(common) == 0:
-        st.warning("⚠️ Não há utilizadores com ambos os eventos de início e fim.")
+    # os mesmos PNG do relatório PDF (report.py), desenhados uma vez
+    for col, (kind, data, params) in zip(st.columns(3), report.sample_charts(df_satis).values()):
+        with col:
+            st.image(charts.render(kind, data, **params))
+
+    # ─── Tempo ativo (sessions.py) ────────────────────────────────────
+    st.subheader("⏱️ Tempo ativo")
+    sec = prof.section("Tempo ativo")
+    st.text("Tempo que os utilizadores estiveram realmente ativos no curso. A atividade de cada "
+            "utilizador é dividida em sessões sempre que passa mais do que o intervalo de "
+            "inatividade escolhido sem statements; os logoffs e as pausas longas não contam.")
+    gap = st.slider("Inatividade que fecha uma sessão (min)", 5, 120, sessions.GAP_MINUTES, step=5)
+    sess = data_loader.load_sessions(SESSIONS_DIR, CSV_FILE, STORE_DIR, gap, SQL_DB)
+    by_user = sessions.per_user(sess)
+    sec["rows"] = len(sess["sessions"])
+    if by_user.empty:
+        st.warning("⚠️ Ainda não há statements para calcular sessões.")
     else:
-        # 6) calcula durações em minutos
-        durations = ((ends[common] - starts[common]).dt.total_seconds() / 60).round(1)
-        avg = round(durations.mean(), 1)
-
-        # 7) mostra resultados
-        #st.metric("⏲️ Tempo Médio (min)", f"{avg}")
-        dur_df = durations.reset_index()
-        dur_df.columns = ["Utilizador", "Minutos"]
-        # st.dataframe(dur_df, use_container_width=True)
-        # st.bar_chart(dur_df.set_index("Utilizador")["Minutos"])
-
-       # --- Evolução por Utilizador (Nota Global) ---
-        def extract_overall_avg(path):
-            # tenta ; e , como separadores
-            for sep in (";", ","):
-                try:
-                    df = pd.read_csv(path, sep=sep, dtype=str, keep_default_na=False)
-                except Exception:
-                    continue
-                if df.shape[1] > 1:
-                    break
-            else:
-                raise ValueError(f"Não consegui ler {path} (sep. ';' ou ',').")
-
-            # localiza a linha onde a primeira coluna é 'Média'
-            col0 = df.columns[0]
-            mask = df[col0].str.strip().eq("Média")
-            if not mask.any():
-                raise ValueError(f"Linha 'Média' não encontrada em {path}")
-
-            # captura toda a linha e procura o primeiro valor numérico
-            row = df.loc[mask].iloc[0].tolist()
-            for cell in row[1:]:
-                if isinstance(cell, str) and re.match(r"^\s*\d+[,.]\d+\s*$", cell):
-                    return float(cell.strip().replace(",", "."))
-            raise ValueError(f"Nenhum valor numérico encontrado na linha 'Média' de {path}")
-
-        st.subheader("📈 Evolução dos utilizadores")
-        st.text("A diferença entre a média das notas da avaliação diagnóstica e final.")
-        try:
-            avg_diag = extract_overall_avg(DIAG_RAW)
-            avg_final = extract_overall_avg(FINAL_RAW)
-            diff = round(avg_final - avg_diag, 2)
-
-            c1, c2, c3 = st.columns(3)
-            c1.metric("Média Diagnóstica", f"{avg_diag:.2f}")
-            c2.metric("Média Final", f"{avg_final:.2f}")
-            c3.metric("Δ MELHORIA", f"{diff:.2f}")
-        except Exception as e:
-            st.warning(f"Não foi possível extrair as médias dos CSVs brutos: {e}")
+        c1, c2, c3 = st.columns(3)
+        c1.metric("⏲️ Tempo ativo médio (min)", f"{by_user['active_s'].mean() / 60:.1f}")
+        c2.metric("Sessões por utilizador", f"{by_user['sessions'].mean():.1f}")
+        c3.metric("Duração média da sessão (min)",
+                  f"{sess['sessions']['active_s'].mean() / 60:.1f}")
+        by_module = (sessions.per_module(sess)["mean_s"] / 60).round(1).rename("Minutos")
+        by_module = by_module[by_module.index.isin(modules_list)]
+        st.image(charts.render("bar", by_module, title="Tempo ativo médio por utilizador e módulo",
+                               ylabel="Minutos", rotation=45, hide_spines=True))
+
+    # --- Evolução por Utilizador (Nota Global) ---
+    st.subheader("📈 Evolução dos utilizadores")
+    sec = prof.section("Evolução dos utilizadores")
+    st.text("A diferença entre a média das notas da avaliação diagnóstica e final.")
+    try:
+        avg_diag = gradebook.load(DIAG_RAW).overall_mean()
+        avg_final = gradebook.load(FINAL_RAW).overall_mean()
+        diff = round(avg_final - avg_diag, 2)
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Média Diagnóstica", f"{avg_diag:.2f}")
+        c2.metric("Média Final", f"{avg_final:.2f}")
+        c3.metric("Δ MELHORIA", f"{diff:.2f}")
+    except Exception as e:
+        st.warning(f"Não foi possível extrair as médias dos CSVs brutos: {e}")
+
+    # --- Evolução emparelhada (os mesmos alunos nas duas avaliações) ---
+    st.text("Só os alunos que fizeram as duas avaliações: ganho de cada aluno, "
+            "com intervalo de confiança bootstrap a 95% e ganho normalizado "
+            "(fração do que faltava para a nota máxima).")
+    try:
+        gains = data_loader.load_paired_gains(DIAG_RAW, FINAL_RAW)
+    except (ValueError, OSError, KeyError) as e:
+        gains = None
+        st.warning(f"Não foi possível emparelhar os alunos: {e}")
+    if gains is not None:
+        sec["rows"] = gains["n"]
+        items = gains["per_item"]
+        overall = items.loc[paired_gains.OVERALL] if paired_gains.OVERALL in items.index else None
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Alunos emparelhados", gains["n"])
+        if overall is not None:
+            c2.metric("Ganho médio (IC 95%)", f"{overall['Ganho']:.2f}",
+                      f"[{overall['IC inf.']:.2f}, {overall['IC sup.']:.2f}]", delta_color="off")
+            c3.metric("Ganho normalizado", f"{overall['Ganho normalizado']:.2f}")
+
+        st.dataframe(items.drop(index=paired_gains.OVERALL, errors="ignore").round(2),
+                     use_container_width=True)
+
+        # distribuição dos ganhos por aluno (sem identificar ninguém)
+        per_student = gains["per_student"]["Ganho"].dropna()
+        if not per_student.empty:
+            hist = pd.cut(per_student, bins=min(20, max(per_student.nunique(), 1))) \
+                .value_counts(sort=False)
+            hist.index = [f"{i.left:.1f} a {i.right:.1f}" for i in hist.index]
+            st.image(charts.render("bar", hist.rename("Alunos"),
+                                   title="Distribuição do ganho por aluno",
+                                   xlabel="Ganho (final − diagnóstica)", ylabel="Alunos",
+                                   rotation=45, width=0.9, hide_spines=True))
 
     # --- Evolução por Pergunta (Diagnóstica vs Final) ---
-        st.subheader("📈 Evolução por Pergunta")
-        st.text("A diferença entre a média das notas da avaliação diagnóstica e da avaliação final por pergunta.")
-
-        # caminhos para os CSVs brutos
-
-        DIAG_RAW = "a2d12_avaliacao_diagnostica_notas.csv"
-        FINAL_RAW = "a2d12_avaliação_final-notas.csv"
+    st.subheader("📈 Evolução por Pergunta")
+    sec = prof.section("Evolução por Pergunta")
+    st.text("A diferença entre a média das notas da avaliação diagnóstica e da avaliação final por pergunta.")
 
-        # Extract averages
-        diag_avgs = extract_avg_scores(DIAG_RAW)
-        final_avgs = extract_avg_scores(FINAL_RAW)
+    # Extract averages
+    diag_avgs = gradebook.load(DIAG_RAW).question_means()
+    final_avgs = gradebook.load(FINAL_RAW).question_means()
 
-        # Build DataFrame
-        df_evol = pd.DataFrame({
-            "Diagnóstica": diag_avgs,
-            "Final": final_avgs
-        })
+    # Build DataFrame
+    df_evol = pd.DataFrame({
+        "Diagnóstica": diag_avgs,
+        "Final": final_avgs
+    })
 
-        # Calculate difference if you like
-        df_evol["Diferença"] = (df_evol["Final"] - df_evol["Diagnóstica"]).round(2)
+    # Calculate difference if you like
+    df_evol["Diferença"] = (df_evol["Final"] - df_evol["Diagnóstica"]).round(2)
+    sec["rows"] = len(df_evol)
 
-        # Display
+    # Display
 
-        # st.dataframe(df_evol, use_container_width=True)
-        st.line_chart(df_evol[["Diagnóstica", "Final"]])
+    # st.dataframe(df_evol, use_container_width=True)
+    kind, data, params = report.evolution_chart(df_evol)
+    st.image(charts.render(kind, data, **params))
 
     # --- Resultados por Pergunta
         # st.subheader("❓ Tentativas vs Respondidas por Pergunta (Global)")
 
-        # filtra statements com verbo contendo 'attempt' e 'answer'
-    df_attempts = df[df['verb'].str.lower().str.contains('attempt', na=False)]
-    df_answered = df[df['verb'].str.lower().str.contains('answer', na=False)]
-
-    # conta tentativas e respondidas por activity
-    attempts = df_attempts['activity'].value_counts()
-    answered = df_answered['activity'].value_counts()
+        # tentativas ('attempt') e respondidas ('answer') por activity, da tabela agregada
+    sec = prof.section("Top-3 (Módulos)")
+    sec["rows"] = len(aggs["activity"])
+    activity_counts = aggs["activity"].set_index("activity")
+    attempts = activity_counts["attempts"]
+    attempts = attempts[attempts > 0].sort_values(ascending=False)
+    answered = activity_counts["answers"]
 
     # mantém só perguntas que começam por "Pergunta"
     mask = attempts.index.str.startswith("Pergunta")
@@ -576,62 +663,39 @@ else:
 
     # --- Top-3 Fáceis e Difíceis (Avaliação Final) ---
     st.subheader("🏅 Top-3 Perguntas com melhores e piores classificações (Avaliação Final)")
-    # 1) Lê o CSV bruto, autodetectando delimitador
-    raw_final = pd.read_csv(
-        "a2d12_avaliação_final-notas.csv",
-        sep=None,  # deixa o pandas adivinhar vírgula vs ponto‐e‐vírgula
-        engine="python",
-        dtype=str
-    )
-    # 2) Descobre qual é a primeira coluna (normalmente "Apelido" ou similar)
-    id_col = raw_final.columns[0]
-    # 3) Procura a linha “Média” nessa coluna
-    mask_avg = (
-        raw_final[id_col]
-        .astype(str)
-        .str.strip()
-        .str.lower()
-        .eq("média")
-    )
-    if not mask_avg.any():
-        st.error(f"Linha 'Média' não encontrada na coluna {id_col!r}.")
+    sec = prof.section("Top-3 (Avaliação Final)")
+    # médias por pergunta da linha "Média" (gradebook.py, já em cache)
+    try:
+        scores = gradebook.load(FINAL_RAW).question_means().rename("Média")
+    except (ValueError, OSError) as e:
+        st.warning(str(e))
     else:
-        avg_row = raw_final.loc[mask_avg].iloc[0]
-        # 4) Seleciona apenas as colunas de perguntas, ex: "P. 1 /0,77"
-        q_cols = [c for c in raw_final.columns if re.match(r"^P\.\s*\d+", c)]
-        if not q_cols:
-            st.warning("Nenhuma coluna de pergunta (P. X) encontrada.")
-        else:
-            # 5) Extrai as médias e converte "8,61" → 8.61
-            scores = (
-                avg_row[q_cols]
-                .str.replace(",", ".", regex=False)
-                .astype(float)
-            )
-            # 6) Computa top‐3 fáceis (maiores médias) e top‐3 difíceis (menores)
-            df_easy = (
-                scores.nlargest(3)
-                .reset_index()
-                .rename(columns={"index": "Pergunta", 18: "Média"})
-            )
-            df_hard = (
-                scores.nsmallest(3)
-                .reset_index()
-                .rename(columns={"index": "Pergunta", 18: "Média"})
-            )
-            # 7) Exibe lado a lado
-            c1, c2 = st.columns(2)
-            with c1:
-                st.markdown("#### 🟢 3 Melhores Classificações")
-                st.dataframe(df_easy)
-            with c2:
-                st.markdown("#### 🔴 3 Piores Classificações")
-                st.dataframe(df_hard)
+        # Computa top‐3 fáceis (maiores médias) e top‐3 difíceis (menores)
+        df_easy = (
+            scores.nlargest(3)
+            .rename_axis("Pergunta")
+            .reset_index()
+        )
+        df_hard = (
+            scores.nsmallest(3)
+            .rename_axis("Pergunta")
+            .reset_index()
+        )
+        # Exibe lado a lado
+        c1, c2 = st.columns(2)
+        with c1:
+            st.markdown("#### 🟢 3 Melhores Classificações")
+            st.dataframe(df_easy)
+        with c2:
+            st.markdown("#### 🔴 3 Piores Classificações")
+            st.dataframe(df_hard)
 
 
    # --- Resultados por Pergunta -Satisfação-  + α Cronbach ---
     #  Resultados por Pergunta
     st.subheader("📊 Satisfação: Resultados por Pergunta")
+    sec = prof.section("Satisfação e α de Cronbach")
+    sec["rows"] = len(df_sat)
 
     # Seleciona apenas colunas cujo nome comece por 'Q' seguido de dígitos
     q_cols = [c for c in df_sat.columns
@@ -639,6 +703,7 @@ else:
 
     if not q_cols:
         st.warning("Nenhuma coluna de pergunta Q01–Q03 encontrada.")
+        df_qnum = pd.DataFrame()
     else:
         # Converte vírgulas para ponto e força números; erros virão como NaN
         df_qnum = df_sat[q_cols].apply(
@@ -656,116 +721,73 @@ else:
         st.dataframe(df_q, use_container_width=True)
     # Gráfico de barras
         #st.bar_chart(mean_scores)
-    # 3) α de Cronbach
-    # Remove linhas com NaN em qualquer uma das três
-    df_items = df_qnum.dropna(how="any")
-    if df_items.shape[0] < 2:
-        st.warning("Não há dados suficientes para calcular o α de Cronbach.")
+    # 3) α de Cronbach e análise de itens (item_analysis.py, escala Likert 1–5)
+    #    só com os respondentes que responderam a todas as perguntas
+    try:
+        satisf_items = item_analysis.analyse(df_qnum, max_scores=5, min_score=1)
+    except ValueError as e:
+        satisf_items, cronbach_alpha = None, float("nan")
+        st.warning(f"α de Cronbach não calculado: {e}")
+    else:
+        cronbach_alpha = satisf_items["alpha"]
+        st.metric("🧪 α de Cronbach (Inquérito de Satisfação)", f"{cronbach_alpha:.2f}",
+                  f"consistência {item_analysis.interpret(cronbach_alpha).lower()}",
+                  delta_color="normal" if cronbach_alpha >= item_analysis.ACCEPTABLE else "inverse")
+
+    # --- Análise de itens (satisfação, avaliações e perguntas H5P) ---
+    with st.expander("🔬 Análise de itens"):
+        st.text("Por pergunta: média, dificuldade (média na escala 0–1), discriminação (27% "
+                "melhores − 27% piores no total), correlação com o total das outras perguntas "
+                "e o α de Cronbach se a pergunta fosse retirada. Perguntas com r item-total "
+                "baixo ou que fazem subir o α quando retiradas merecem revisão.")
+        instrument = st.radio("Instrumento", ["Satisfação", "Diagnóstica", "Final", "Perguntas H5P (xAPI)"],
+                              horizontal=True)
+        try:
+            if instrument == "Satisfação":
+                analysis = satisf_items
+                if analysis is None:
+                    raise ValueError("sem respostas completas ao inquérito")
+            elif instrument == "Diagnóstica":
+                analysis = data_loader.load_gradebook_items(DIAG_RAW)
+            elif instrument == "Final":
+                analysis = data_loader.load_gradebook_items(FINAL_RAW)
+            else:
+                analysis = data_loader.load_xapi_items(CSV_FILE, STORE_DIR, SQL_DB)
+        except (ValueError, OSError, KeyError) as e:
+            analysis = None
+            st.warning(f"Não foi possível analisar os itens: {e}")
+        if analysis is not None:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("α de Cronbach", f"{analysis['alpha']:.2f}",
+                      item_analysis.interpret(analysis["alpha"]), delta_color="off")
+            c2.metric("Respondentes completos", analysis["n"])
+            c3.metric("Itens", analysis["k"])
+            st.dataframe(analysis["items"].round(2), use_container_width=True)
+
+    # 🖨️ Relatório PDF: gerado em background (report.py) e guardado em cache
+    #    pela versão dos dados; a página continua a responder enquanto é gerado
+    sec = prof.section("Relatório PDF")
+    reports = get_report_jobs()
+    report_key = report.version(df_satis, df_evol, df_easy, df_hard, cronbach_alpha)
+    sec["background_s"] = reports.build_time(report_key)
+
+    @st.fragment(run_every=1)
+    def report_status():
+        if reports.status(report_key) == "running":
+            st.info("⏳ A gerar relatório...")
+        else:
+            st.rerun()
+
+    status = reports.status(report_key)
+    if status == "done":
+        st.download_button("⬇️ Baixar Relatório PDF", reports.get(report_key),
+                           file_name="relatorio_learn.pdf")
     else:
-        n_items = df_items.shape[1]
-        item_vars = df_items.var(axis=0, ddof=1)
-        total_var = df_items.sum(axis=1).var(ddof=1)
-        cronbach_alpha = (n_items / (n_items - 1)) * (1 - item_vars.sum() / total_var)
-        st.metric("🧪 α de Cronbach (Inquérito de Satisfação)", f"{cronbach_alpha:.2f}","Excelente!")
-
-    # 🖨️ Botão para gerar relatório
-    if st.button("📄 Gerar Relatório em PDF"):
-        with st.spinner("A gerar relatório..."):
-            # Criar imagens temporárias
-            tmp_dir = tempfile.mkdtemp()
-
-            # 1. Gráfico de Distrito
-            distrito_fig, ax = plt.subplots()
-            df_satis["Distrito"].value_counts().plot(kind="bar", ax=ax)
-            ax.set_title("Distribuição por Distrito")
-            distrito_path = os.path.join(tmp_dir, "distrito.png")
-            distrito_fig.savefig(distrito_path)
-            plt.close(distrito_fig)
-            # 1.b Nacionalidade
-            nacionalidade_fig, ax = plt.subplots()
-            df_satis["Nacionalidade"].value_counts().plot(kind="bar", ax=ax)
-            ax.set_title("Distribuição por Nacionalidade")
-            nacionalidade_path = os.path.join(tmp_dir, "nacionalidade.png")
-            nacionalidade_fig.savefig(nacionalidade_path)
-            plt.close(nacionalidade_fig)
-            # 1.c Escolaridade
-            escolaridade_fig, ax = plt.subplots()
-            df_satis["Escolaridade"].value_counts().plot(kind="bar", ax=ax)
-            ax.set_title("Distribuição por Escolaridade")
-            escolaridade_path = os.path.join(tmp_dir, "escolaridade.png")
-            escolaridade_fig.savefig(escolaridade_path)
-            plt.close(escolaridade_fig)
-
-            #tempo_medio_texto = f"Tempo médio de conclusão do curso: {avg} minutos."
-            top_easy_txt = "\n".join([f"{row['Pergunta']}: {row['Média']:.2f}" for _, row in df_easy.iterrows()])
-            top_hard_txt = "\n".join([f"{row['Pergunta']}: {row['Média']:.2f}" for _, row in df_hard.iterrows()])
-
-            # 2. Gráfico de evolução
-            evol_fig, ax2 = plt.subplots()
-            df_evol[["Diagnóstica", "Final"]].plot(ax=ax2)
-            ax2.set_title("Evolução Diagnóstica vs Final")
-            evol_path = os.path.join(tmp_dir, "evolucao.png")
-            evol_fig.savefig(evol_path)
-            plt.close(evol_fig)
-
-            cronbach_txt = f"Alpha de Cronbach: {cronbach_alpha:.2f} (excelente consistência interna)."
-
-            # 3. Criar PDF
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", "B", 16)
-            pdf.cell(0, 10, "Relatório - Visão Learn Stats", ln=True)
-            pdf.set_font("Arial", "", 12)
-            pdf.multi_cell(0, 10, "Este relatório apresenta a caracterização da amostra, "
-                                  "a evolução dos resultados da avaliação diagnóstica para a final "
-                                  "e gráficos com os principais indicadores.")
-
-            # Inserir gráficos
-            # Página 1 – Caracterização da amostra
-            pdf.add_page()
-            pdf.set_font("Arial", "B", 14)
-            pdf.cell(0, 10, "Caracterização da Amostra", ln=True)
-            pdf.image(distrito_path, w=100)
-            pdf.ln(5)
-            pdf.image(nacionalidade_path, w=100)
-            pdf.ln(5)
-            pdf.image(escolaridade_path, w=100)
-
-            # Página 2 – Tempo e Evolução
-            pdf.add_page()
-            pdf.set_font("Arial", "B", 14)
-            pdf.cell(0, 10, "Tempo e Evolução", ln=True)
-            pdf.set_font("Arial", "", 12)
-            #pdf.multi_cell(0, 10, tempo_medio_texto)
-            pdf.ln(5)
-            pdf.image(evol_path, w=180)
-
-            # Página 3 – Top-3 Perguntas e Cronbach
-            pdf.add_page()
-            pdf.set_font("Arial", "B", 14)
-            pdf.cell(0, 10, "Top-3 Perguntas", ln=True)
-
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Melhor Classificação", ln=True)
-            pdf.set_font("Arial", "", 12)
-            pdf.multi_cell(0, 10, top_easy_txt)
-
-            pdf.ln(5)
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Pior Classificação", ln=True)
-            pdf.set_font("Arial", "", 12)
-            pdf.multi_cell(0, 10, top_hard_txt)
-
-            pdf.ln(5)
-            pdf.set_font("Arial", "B", 12)
-            pdf.cell(0, 10, "Consistência Interna", ln=True)
-            pdf.set_font("Arial", "", 12)
-            pdf.multi_cell(0, 10, cronbach_txt)
-
-            # Guardar PDF
-            pdf_path = os.path.join(tmp_dir, "relatorio_visao_learn.pdf")
-            pdf.output(pdf_path)
-
-            # Mostrar botão de download
-            with open(pdf_path, "rb") as f:
-                st.download_button("⬇️ Baixar Relatório PDF", f, file_name="relatorio_learn.pdf")
+        if st.button("📄 Gerar Relatório em PDF"):
+            reports.submit(report_key, df_satis, df_evol, df_easy, df_hard, cronbach_alpha)
+            status = reports.status(report_key)
+        if status == "running":
+            report_status()
+        elif status == "failed":
+            st.error(f"❌ Não foi possível gerar o relatório: {reports.error(report_key)}")
+    prof.finish()
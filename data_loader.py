@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# data_loader.py — Carregamento dos dados do dashboard com cache partilhada entre sessões
+#
+# Cada leitura fica em cache com a assinatura dos ficheiros de origem (mtime +
+# tamanho): os reruns e as outras sessões reutilizam os frames já lidos e o
+# disco só volta a ser lido quando o export (ou a limpeza das avaliações)
+# escreve dados novos.
+#
+# Os datasets (statements, índices, agregados, sessões, CSVs de avaliação) ficam
+# uma só vez por processo numa cache LRU com orçamento de memória
+# (DASHBOARD_CACHE_MB), partilhada por todas as sessões sem cópias: os cursos
+# são carregados só quando alguém os abre e os menos usados saem quando o
+# orçamento é excedido. Os objetos partilhados são só de leitura: os painéis
+# derivam frames novos (filtros, rename, assign — vistas sem cópia com o
+# Copy-on-Write do pandas) e nunca atribuem colunas nem .columns aos da cache.
+# O memory_report() mostra os bytes por dataset e por coluna.
+
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import statement_store
+import aggregates
+import sessions
+import sql_store
+import file_lock
+import normalize
+import gradebook
+import paired_gains
+import item_analysis
+import statement_index
+
+# Copy-on-Write: por omissão no pandas 3; no 2.x tem de ser ligado (sem ele as
+# vistas dos frames partilhados podiam ser alteradas através de um derivado)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# ─── ASSINATURA DOS FICHEIROS ──────────────────────────────────
+def file_signature(path):
+    # ficheiro → (mtime, tamanho); pasta (store, agregados) → idem para cada
+    # ficheiro visível (os temporários e os locks começam por ".")
+    if os.path.isdir(path):
+        sig = []
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]  # staging do store
+            for name in sorted(files):
+                if not name.startswith("."):
+                    full = os.path.join(root, name)
+                    stat = os.stat(full)
+                    sig.append((full, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(sig))
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+# ─── CACHE LRU COM ORÇAMENTO DE MEMÓRIA ────────────────────────
+CACHE_MB = float(os.environ.get("DASHBOARD_CACHE_MB", 1024))
+
+def nbytes(obj, _seen=None):
+    # memória aproximada de frames, arrays, dicts e objetos (ex.: StatementIndex)
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(nbytes(v, _seen) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(nbytes(v, _seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return nbytes(vars(obj), _seen)
+    return sys.getsizeof(obj)
+
+class DatasetCache:
+    # chave → (assinatura, valor, bytes); uma assinatura nova substitui a versão
+    # antiga do mesmo dataset em vez de a acumular
+    def __init__(self, budget_mb=CACHE_MB):
+        self.budget = budget_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._loading = {}   # chave → lock: sessões simultâneas esperam pela mesma carga
+        self.hits = self.misses = self.evictions = 0
+
+    def _lookup(self, key, signature):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        return None
+
+    def get(self, key, signature, load):
+        entry = self._lookup(key, signature)
+        if entry is not None:
+            return entry[1]
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                entry = self._lookup(key, signature)  # carregado por outra sessão entretanto
+                if entry is not None:
+                    return entry[1]
+                with self._lock:
+                    self.misses += 1
+                value = load()
+                with self._lock:
+                    self._entries[key] = (signature, value, nbytes(value))
+                    self._entries.move_to_end(key)
+                    self._evict()
+            return value
+        finally:
+            # o lock só serve enquanto a carga decorre (quem chega depois encontra a entrada)
+            with self._lock:
+                if self._loading.get(key) is key_lock:
+                    del self._loading[key]
+
+    def _evict(self):
+        # mantém sempre a entrada mais recente, mesmo que sozinha exceda o orçamento
+        while len(self._entries) > 1 and self.used() > self.budget:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def used(self):
+        return sum(e[2] for e in self._entries.values())
+
+    def report(self):
+        with self._lock:
+            entries = list(self._entries.items())
+        return [{"dataset": _label(k), "MB": e[2] / 1024 / 1024} for k, e in entries]
+
+    def columns_report(self):
+        # bytes por coluna de cada frame guardado (também dentro de dicts e
+        # objetos, ex.: as tabelas dos agregados ou o frame do StatementIndex)
+        with self._lock:
+            entries = list(self._entries.items())
+        rows = []
+        for key, (_, value, _) in entries:
+            for part, column, dtype, size in _columns(value):
+                rows.append({"dataset": _label(key), "parte": part, "coluna": column,
+                             "tipo": dtype, "MB": size / 1024 / 1024})
+        return rows
+
+def _label(key):
+    return " / ".join(map(str, key))
+
+def _columns(obj, part="", _seen=None):
+    # (parte, coluna, dtype, bytes) de cada coluna/array dentro de obj
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return
+    _seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        usage = obj.memory_usage(index=True, deep=True)
+        for column, size in usage.items():
+            dtype = obj.index.dtype if column == "Index" else obj[column].dtype
+            yield part, str(column), str(dtype), int(size)
+    elif isinstance(obj, (pd.Series, np.ndarray, pd.Index)):
+        yield part, "(valores)", str(obj.dtype), nbytes(obj)
+    elif isinstance(obj, dict):
+        if obj and all(isinstance(v, np.ndarray) for v in obj.values()):
+            yield part, f"({len(obj)} arrays)", "int64", nbytes(obj)  # ex.: module_rows
+        else:
+            for k, v in obj.items():
+                yield from _columns(v, f"{part}.{k}" if part else str(k), _seen)
+    elif isinstance(obj, (list, tuple)):
+        for i, v in enumerate(obj):
+            yield from _columns(v, f"{part}[{i}]", _seen)
+    elif hasattr(obj, "__dict__"):
+        yield from _columns(vars(obj), part, _seen)
+
+@st.cache_resource
+def dataset_cache():
+    return DatasetCache()
+
+# ─── STATEMENTS ────────────────────────────────────────────────
+def read_statements_csv(path, columns=None):
+    # lock partilhado: o export só acrescenta linhas com lock exclusivo
+    with file_lock.shared(file_lock.lock_path(path)):
+        df = pd.read_csv(path, usecols=columns, dtype={"user": str, "verb": str, "activity": str})
+    # parse vetorizado (o CSV do export tem sempre ISO 8601)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+    df["module"] = df["module"].astype(str).str.strip()
+    if "cmid" in df.columns:
+        df["cmid"] = df["cmid"].astype("Int64")
+    return df
+
+def _read_statements(source, columns, start, end):
+    # a normalização (normalize.py) corre aqui, uma vez por versão dos dados
+    if os.path.isdir(source):
+        df = statement_store.read(source, columns=columns, start=start, end=end)
+    else:
+        df = read_statements_csv(source, columns)
+        if start is not None:
+            df = df[df["timestamp"] >= pd.Timestamp(start, tz="UTC")]
+        if end is not None:
+            df = df[df["timestamp"] < pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)]
+    return normalize.normalize(df)
+
+def _load_statements(source, signature, columns, start, end):
+    # todos os statements: o frame do índice (um só frame em memória, guardado
+    # numa só entrada da cache); um período: uma entrada própria
+    if start is None and end is None:
+        return _load_index(source, signature, columns).df
+    def load():
+        with st.spinner("A carregar statements..."):
+            return _read_statements(source, list(columns), start, end)
+    return dataset_cache().get(("statements", source, columns, start, end), signature, load)
+
+def _statements_source(csv_file, store_dir):
+    # prefere o store Parquet; sem ele (ou sem pyarrow) lê o CSV
+    if statement_store.available() and statement_store.exists(store_dir):
+        return store_dir
+    return csv_file
+
+def load_statements(csv_file, store_dir, columns, start=None, end=None):
+    source = _statements_source(csv_file, store_dir)
+    return _load_statements(source, file_signature(source), tuple(columns), start, end)
+
+def _load_index(source, signature, columns):
+    # índice só de leitura, partilhado entre sessões sem cópias
+    def load():
+        with st.spinner("A carregar statements..."):
+            df = _read_statements(source, list(columns), None, None)
+        with st.spinner("A indexar statements..."):
+            return statement_index.StatementIndex(df)
+    return dataset_cache().get(("index", source, columns), signature, load)
+
+def load_index(csv_file, store_dir, columns):
+    source = _statements_source(csv_file, store_dir)
+    return _load_index(source, file_signature(source), tuple(columns))
+
+# ─── AGREGADOS ─────────────────────────────────────────────────
+def load_aggregates(agg_dir, csv_file, store_dir, sql_db=None):
+    # tabelas escritas pelo export; se ainda não existirem (dados antigos,
+    # só CSV) são calculadas uma vez na base SQL ou a partir dos statements
+    if aggregates.exists(agg_dir):
+        return dataset_cache().get(("aggregates", agg_dir), file_signature(agg_dir),
+                                   lambda: aggregates.load(agg_dir))
+    if sql_db and use_sql(sql_db):
+        return sql_aggregates(sql_db)
+    source = _statements_source(csv_file, store_dir)
+    signature = file_signature(source)
+    def load():
+        df = _load_statements(source, signature, tuple(aggregates.SOURCE_COLS), None, None)
+        with st.spinner("A calcular agregados..."):
+            return aggregates.compute(df)
+    return dataset_cache().get(("aggregates", source), signature, load)
+
+# ─── BASE SQL (sql_store.py) ───────────────────────────────────
+# auto: usa a base SQL quando o export a criou (--sql); pandas: ignora-a
+BACKEND = os.environ.get("DASHBOARD_BACKEND", "auto")
+
+def use_sql(db_path):
+    return BACKEND != "pandas" and sql_store.exists(db_path)
+
+def sql_overview(db_path):
+    def load():
+        with sql_store.reader(db_path) as conn:
+            return sql_store.overview(conn)
+    return dataset_cache().get(("sql_overview", db_path), file_signature(db_path), load)
+
+def sql_aggregates(db_path, start=None, end=None, modules=(), verbs=(), users=()):
+    # só as tabelas pequenas do resultado chegam ao dashboard; cada combinação
+    # de filtros é uma entrada da cache (sai pelo orçamento, como as outras)
+    filters = {"start": start, "end": end, "modules": tuple(modules),
+               "verbs": tuple(verbs), "users": tuple(users)}
+    def load():
+        with st.spinner("A consultar a base SQL..."), sql_store.reader(db_path) as conn:
+            return sql_store.aggregates(conn, **filters)
+    return dataset_cache().get(("sql_aggregates", db_path, *filters.values()),
+                               file_signature(db_path), load)
+
+# ─── SESSÕES (sessions.py) ─────────────────────────────────────
+def load_sessions(sessions_dir, csv_file, store_dir, gap_minutes=sessions.GAP_MINUTES, sql_db=None):
+    # tabelas mantidas pelo export, se foram calculadas com este intervalo de
+    # inatividade; senão calculadas (uma vez por versão) na base SQL ou a
+    # partir dos statements
+    cache = dataset_cache()
+    if sessions.saved_gap(sessions_dir) == gap_minutes:
+        return cache.get(("sessions", sessions_dir), file_signature(sessions_dir),
+                         lambda: sessions.load(sessions_dir)[0])
+    if sql_db and use_sql(sql_db):
+        def load():
+            with st.spinner("A calcular sessões..."), sql_store.reader(sql_db) as conn:
+                return sql_store.sessions(conn, gap_minutes)
+        return cache.get(("sessions", sql_db, gap_minutes), file_signature(sql_db), load)
+    source = _statements_source(csv_file, store_dir)
+    signature = file_signature(source)
+    def load():
+        df = _load_statements(source, signature, tuple(aggregates.SOURCE_COLS), None, None)
+        with st.spinner("A calcular sessões..."):
+            return sessions.compute(df, gap_minutes)
+    return cache.get(("sessions", source, gap_minutes), signature, load)
+
+# ─── CSVs DE AVALIAÇÃO ─────────────────────────────────────────
+def load_csv(path, encoding="utf8"):
+    return dataset_cache().get(("csv", path, encoding), file_signature(path),
+                               lambda: pd.read_csv(path, encoding=encoding))
+
+# ─── EVOLUÇÃO EMPARELHADA (paired_gains.py) ────────────────────
+def load_paired_gains(diag_path, final_path, n_boot=paired_gains.N_BOOT):
+    # o bootstrap só volta a correr quando um dos CSVs de notas muda
+    signature = (file_signature(diag_path), file_signature(final_path))
+    def load():
+        with st.spinner("A calcular a evolução por aluno..."):
+            return paired_gains.analyse(gradebook.load(diag_path), gradebook.load(final_path),
+                                        n_boot=n_boot)
+    return dataset_cache().get(("paired_gains", diag_path, final_path, n_boot), signature, load)
+
+# ─── ANÁLISE DE ITENS (item_analysis.py) ───────────────────────
+def load_gradebook_items(path):
+    # perguntas de uma avaliação do Moodle, na escala de cada pergunta
+    def load():
+        book = gradebook.load(path)
+        return item_analysis.analyse(book.scores, book.max_scores)
+    return dataset_cache().get(("item_analysis", path), file_signature(path), load)
+
+def load_xapi_items(csv_file, store_dir, sql_db=None):
+    # perguntas H5P respondidas (1) ou não (0) por utilizador, calculadas na
+    # base SQL (só as linhas utilizador × pergunta chegam aqui) ou a partir dos statements
+    if sql_db and use_sql(sql_db):
+        def load():
+            with st.spinner("A analisar as perguntas H5P..."), sql_store.reader(sql_db) as conn:
+                answered = sql_store.question_outcomes(conn)
+            return item_analysis.analyse(item_analysis.outcome_matrix(answered), max_scores=1)
+        return dataset_cache().get(("item_analysis", sql_db), file_signature(sql_db), load)
+    source = _statements_source(csv_file, store_dir)
+    signature = file_signature(source)
+    def load():
+        df = _load_statements(source, signature, tuple(aggregates.SOURCE_COLS), None, None)
+        with st.spinner("A analisar as perguntas H5P..."):
+            return item_analysis.analyse(item_analysis.xapi_outcomes(df), max_scores=1)
+    return dataset_cache().get(("item_analysis", source), signature, load)
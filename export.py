@@ -1,145 +1,587 @@
 #!/usr/bin/env python3
-import requests, re
+import os, sys, json, time, shutil, argparse
 import pandas as pd
 from requests.auth import HTTPBasicAuth
-from urllib.parse import urljoin
+from datetime import datetime, timezone
+from lrs_client import LRSClient, split_windows
+from statement_extract import extract_batch
+import statement_store
+import module_resolver
+import aggregates
+import sessions
+import sql_store
+import file_lock
+import courses
+from stage_metrics import PeakMemory, Stages, peak_rss_mb
 
 # ─── CONFIGURAÇÃO ───────────────────────────────────────────────
-ORG_ID   = "27295"
-USER     = "b56b2923ba6e2a"
-PASS     = "fea5fd69a1166a"
-BASE_URL = f"https://watershedlrs.com/watershed/api/organizations/{ORG_ID}/lrs/statements"
+# Podem ser substituídos por variáveis de ambiente (ex.: LRS_ENDPOINT para
+# apontar para o lrs_standin.py) ou, o endpoint, por --endpoint
+ORG_ID   = os.environ.get("LRS_ORG_ID", "27295")
+USER     = os.environ.get("LRS_USER", "b56b2923ba6e2a")
+PASS     = os.environ.get("LRS_PASS", "fea5fd69a1166a")
+BASE_URL = os.environ.get(
+    "LRS_ENDPOINT",
+    f"https://watershedlrs.com/watershed/api/organizations/{ORG_ID}/lrs/statements",
+)
 AUTH     = HTTPBasicAuth(USER, PASS)
 HEADERS  = {
     "Accept": "application/json",
     "X-Experience-API-Version": "1.0.3"
 }
 
-# ─── FETCH + PAGINAÇÃO ───────────────────────────────────────────
-def fetch_all_statements(since=None, limit=500):
-    all_stmts = []
-    params = {"limit": limit}
-    if since:
-        params["since"] = since
-    r = requests.get(BASE_URL, auth=AUTH, headers=HEADERS, params=params)
-    r.raise_for_status()
-    data = r.json()
-    all_stmts.extend(data.get("statements", []))
-    more = data.get("more")
-    while more:
-        r = requests.get(urljoin("https://watershedlrs.com", more),
-                         auth=AUTH, headers=HEADERS)
-        r.raise_for_status()
-        data = r.json()
-        all_stmts.extend(data.get("statements", []))
-        more = data.get("more")
-    return all_stmts
-
-# ─── EXTRAI MÓDULO via parent ───────────────────────────────────
-def extract_module_from_parent(parents):
-    if isinstance(parents, list):
-        for p in parents:
-            url = p.get("id", "")
-            m = re.search(r"section\.php\?id=(\d+)", url)
-            if m:
-                return f"Módulo {m.group(1)}"
-    return None
-
-# ─── EXTRAI CMID DO object.id ──────────────────────────────────
-def extract_cmid(object_id):
-    if isinstance(object_id, str):
-        m = re.search(r"view\.php\?id=(\d+)", object_id)
-        if m:
-            return int(m.group(1))
-    return None
-
-def main():
-    # 1) Fetch statements a partir de 11/06/2025 12:00 UTC
-    since = "2025-06-11T12:00:00Z"
-    stmts = fetch_all_statements(since=since, limit=500)
-    if not stmts:
-        print("⚠️ Nenhum statement retornado.")
-        return
+# ─── FICHEIROS DE SAÍDA / ESTADO ────────────────────────────────
+OUT_CSV       = courses.DEFAULT_FILES["statements_csv"]  # saída opcional (--csv); o curso pode mudar o nome
+STORE_DIR     = statement_store.STORE_DIR    # Parquet particionado por dia
+AGG_DIR       = aggregates.AGG_DIR           # tabelas agregadas para o dashboard
+SESSIONS_DIR  = sessions.SESSIONS_DIR        # sessões e tempo ativo por utilizador/módulo
+SQL_DB        = sql_store.DB_FILE             # base SQL embebida (opcional, --sql)
+STATE_FILE    = "export_state.json"         # watermark + cursor do run em curso
+IDS_FILE      = "statements_ids.txt"        # índice de ids já guardados
+LOCK_FILE     = "export.lock"               # single-flight: um export de cada vez
+PROGRESS_FILE = "export_progress.json"      # progresso do run (lido pelo dashboard)
+MANIFEST_FILE = "export_manifest.json"      # manifesto do último run (etapas, linhas, watermark)
+RUNS_FILE     = "export_runs.jsonl"         # histórico: um manifesto por linha (tendência)
+DEFAULT_SINCE = "2025-06-11T12:00:00Z"      # início do curso (1.º run)
+MAP_CSV       = module_resolver.MAP_CSV
+CHUNK_SIZE    = 500                         # statements por página/chunk
 
-    # 2) Flatten JSON
-    df = pd.json_normalize(stmts)
-    #print(">>> colunas disponíveis:", df.columns.tolist())
-
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-
-    # 3) Extrai cmid
-    df["cmid"] = df["object.id"].apply(extract_cmid).astype("Int64")
-
-    # 4) Extrai módulo a partir dos parent
-    parent_col = next((c for c in df.columns if "contextActivities.parent" in c), None)
-    if parent_col:
-        # garante listas e explode
-        df[parent_col] = df[parent_col].apply(lambda x: x if isinstance(x, list) else [])
-        exploded = df.explode(parent_col)
-        exploded["module_parent"] = exploded[parent_col].apply(extract_module_from_parent)
-        # retém apenas um módulo_parent por statement
-        modules = (
-            exploded[["id","module_parent"]]
-            .dropna(subset=["module_parent"])
-            .drop_duplicates("id")
-        )
-        df = df.merge(modules, on="id", how="left")
-    else:
-        df["module_parent"] = pd.NA
+def course_endpoint(course):
+    # LRS_ENDPOINT (stand-in) > endpoint do curso > organização do curso
+    if os.environ.get("LRS_ENDPOINT"):
+        return os.environ["LRS_ENDPOINT"]
+    if course.endpoint:
+        return course.endpoint
+    if course.org_id:
+        return f"https://watershedlrs.com/watershed/api/organizations/{course.org_id}/lrs/statements"
+    return BASE_URL
 
-    # 5) Tenta ler cmid_module_map.csv e aplicar fallback
+# ─── CLIENTE DO LRS ──────────────────────────────────────────────
+def make_client(endpoint=None):
+    return LRSClient(endpoint or BASE_URL, auth=AUTH, headers=HEADERS)
+
+# ─── ESTADO: WATERMARK + ÍNDICE DE IDS ──────────────────────────
+def load_state():
     try:
-        map_df = pd.read_csv("cmid_module_map.csv", sep=";")
-        map_df["cmid"] = map_df["cmid"].astype("Int64")
-        map_df.rename(columns={"module":"module_map"}, inplace=True)
-        df = df.merge(map_df, on="cmid", how="left")
+        with open(STATE_FILE, encoding="utf8") as f:
+            return json.load(f)
     except FileNotFoundError:
-        df["module_map"] = pd.NA
-        print("ℹ️ cmid_module_map.csv não encontrado, só parent será usado.")
-    except Exception as e:
-        df["module_map"] = pd.NA
-        print("⚠️ Erro ao ler cmid_module_map.csv:", e)
-
-    # 6) Preenche módulo definitivo: parent → mapa → Outro
-    df["module"] = df["module_parent"].combine_first(df["module_map"]).fillna("Outro")
-
-    # 7) Limpa verb, activity, user
-    # ------------------------------
-
-    # (a) Limpa verb
-    df["verb"] = (
-        df.get("verb.display.en", pd.Series(dtype=str))
-        .fillna(df.get("verb.id", "").str.rsplit("/", n=1).str[-1])
-    )
-
-    # (b) Descobre quais colunas de descrição e nome existem
-    desc_cols = [c for c in df.columns if c.startswith("object.definition.description")]
-    name_cols = [c for c in df.columns if c.startswith("object.definition.name.en-US")]
-
-    if desc_cols:
-        # Usa primeiro a descrição (texto completo da pergunta), senão o name, senão a URL
-        df["activity"] = (
-            df[desc_cols[0]]
-            .fillna(df[name_cols[0]] if name_cols else "")
-            .fillna(df.get("object.id", ""))
-        )
+        return {}
+
+def save_state(state):
+    # escreve num temporário e troca, para nunca deixar um JSON a meio
+    tmp = STATE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+# ─── PROGRESSO (lido pelo dashboard enquanto o export corre) ────
+class Progress:
+    def __init__(self, path=PROGRESS_FILE):
+        self.path = path
+        self.data = {"status": "running", "pid": os.getpid(), "started": now_iso(),
+                     "pages": 0, "received": 0, "written": 0}
+
+    def update(self, **fields):
+        self.data.update(fields, updated=now_iso())
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+
+def load_seen_ids(rebuild=False, csv_path=OUT_CSV):
+    # o índice em IDS_FILE evita reler o store inteiro; se não existir
+    # (ou após um run interrompido) é reconstruído a partir do store/CSV
+    if not rebuild and os.path.isfile(IDS_FILE):
+        with open(IDS_FILE, encoding="utf8") as f:
+            return {line.strip() for line in f if line.strip()}
+    if statement_store.available() and statement_store.exists(STORE_DIR):
+        ids = statement_store.read_ids(STORE_DIR)
+    elif os.path.isfile(csv_path):
+        ids = pd.read_csv(csv_path, usecols=["id"], dtype=str)["id"].dropna().tolist()
+    else:
+        return set()
+    with open(IDS_FILE, "w", encoding="utf8") as f:
+        f.writelines(i + "\n" for i in ids)
+    return set(ids)
+
+def iter_stored(columns, csv_path=OUT_CSV):
+    # o que já está guardado, aos bocados: um dia de cada vez (store, por ordem
+    # cronológica) ou chunks do CSV (por ordem de chegada)
+    if statement_store.available() and statement_store.exists(STORE_DIR):
+        for day in statement_store.days(STORE_DIR):
+            yield statement_store.read(STORE_DIR, columns=columns, start=day, end=day)
+    elif os.path.isfile(csv_path):
+        for df in pd.read_csv(csv_path, usecols=columns, dtype=str, chunksize=100_000):
+            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+            yield df
+
+def rebuild_aggregates(csv_path=OUT_CSV):
+    # recalcula as tabelas a partir do que já está guardado
+    parts = [aggregates.compute(df) for df in iter_stored(aggregates.SOURCE_COLS, csv_path)]
+    tables = aggregates.combine(aggregates.empty(), *parts)
+    aggregates.save(tables, AGG_DIR)
+    return tables
+
+def user_history(users, csv_path=OUT_CSV):
+    # todos os statements guardados de `users` (para recalcular as suas sessões)
+    parts = [df[df["user"].astype(str).isin(users)] for df in iter_stored(sessions.SOURCE_COLS, csv_path)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=sessions.SOURCE_COLS)
+
+def rebuild_sessions(csv_path=OUT_CSV):
+    sessionizer = sessions.Sessionizer()
+    late = set()
+    for df in iter_stored(sessions.SOURCE_COLS, csv_path):
+        late |= sessionizer.update(df)
+    if late:
+        sessionizer.recompute(user_history(late, csv_path), late)
+    sessions.save(sessionizer.tables(), sessions.GAP_MINUTES, SESSIONS_DIR)
+
+def append_seen_ids(ids):
+    with open(IDS_FILE, "a", encoding="utf8") as f:
+        f.writelines(i + "\n" for i in ids)
+
+def max_stored(stmts, current=None):
+    # o `since` do xAPI filtra pelo campo `stored`, não por `timestamp`
+    values = [s.get("stored") or s.get("timestamp") for s in stmts]
+    values = [v for v in values if v]
+    if current:
+        values.append(current)
+    if not values:
+        return current
+    latest = max(pd.to_datetime(values, utc=True, format="ISO8601"))
+    return latest.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def clean_statements(stmts, resolver=None, metrics=None):
+    if resolver is None:
+        resolver = module_resolver.ModuleResolver(MAP_CSV)
+    metrics = metrics or Stages()
+
+    # 1) Extrai só os campos usados, numa passagem por statement (o cmid, a
+    #    secção e o contexto parent saem juntos, sem explode nem merge)
+    with metrics.stage("flatten") as rec:
+        df = extract_batch(stmts)
+        rec["items"] += len(df)
+
+    # 2) Módulo definitivo: mapa cmid → índice de secções → Outro
+    with metrics.stage("módulos") as rec:
+        df["module"] = resolver.resolve(df["cmid"], df["section_id"])
+        rec["items"] += len(df)
+
+    with metrics.stage("colunas") as rec:
+        df = df[["id","timestamp","user","cmid","module","verb","activity"]]
+        rec["items"] += len(df)
+    return df
+
+class ChunkWriter:
+    # dedup contra o índice de ids e escreve cada chunk no store e/ou no CSV;
+    # cada etapa fica medida em `metrics` (tempo, linhas, bytes, memória)
+    def __init__(self, seen, resolver, to_store=True, to_csv=False, to_sql=False, metrics=None,
+                 csv_path=OUT_CSV):
+        self.seen = seen
+        self.resolver = resolver
+        self.to_store = to_store
+        self.to_csv = to_csv
+        self.csv_path = csv_path
+        self.to_sql = to_sql
+        self.metrics = metrics or Stages()
+        self.days = set()   # partições tocadas neste run
+        self.aggs = aggregates.load(AGG_DIR)
+        self.agg_parts = []  # tabelas parciais por chunk, somadas a cada aggregates.PARTS chunks
+        self.sessions = sessions.Sessionizer(sessions.load(SESSIONS_DIR)[0])
+        self.late = set()   # utilizadores com statements atrasados (sessões a recalcular)
+
+    def write(self, stmts):
+        # devolve o número de linhas novas
+        stage = self.metrics.stage
+        with stage("dedup") as rec:
+            fresh = {}
+            for s in stmts:
+                sid = s.get("id")
+                if sid and sid not in self.seen:
+                    fresh[sid] = s
+            rec["items"] += len(stmts)
+        if not fresh:
+            return 0
+        clean = clean_statements(list(fresh.values()), self.resolver, self.metrics)
+        if self.to_store:
+            with stage("store") as rec:
+                self.days |= statement_store.append(clean, STORE_DIR)
+                rec["items"] += len(clean)
+        if self.to_csv:
+            # append sob lock: o dashboard nunca lê uma linha a meio
+            csv_path = self.csv_path
+            with stage("csv") as rec, file_lock.exclusive(file_lock.lock_path(csv_path)):
+                size = os.path.getsize(csv_path) if os.path.isfile(csv_path) else 0
+                clean.to_csv(csv_path, mode="a", header=not size, index=False, encoding="utf8")
+                rec["items"] += len(clean)
+                rec["bytes"] += os.path.getsize(csv_path) - size
+        if self.to_sql:
+            with stage("sql") as rec:
+                sql_store.append(clean, SQL_DB)
+                rec["items"] += len(clean)
+        with stage("agregados") as rec:
+            self.agg_parts.append(aggregates.compute(clean))
+            if len(self.agg_parts) >= aggregates.PARTS:
+                self.aggs = aggregates.combine(self.aggs, *self.agg_parts)
+                self.agg_parts = []
+            rec["items"] += len(clean)
+        with stage("sessões") as rec:
+            self.late |= self.sessions.update(clean)
+            rec["items"] += len(clean)
+        with stage("índice de ids") as rec:
+            append_seen_ids(clean["id"])
+            self.seen.update(fresh)
+            rec["items"] += len(fresh)
+        return len(fresh)
+
+    def close(self):
+        stage = self.metrics.stage
+        if self.to_store:
+            with stage("compactação") as rec:
+                statement_store.compact(self.days, STORE_DIR)
+                rec["items"] += len(self.days)
+        with stage("fecho: agregados"):
+            self.resolver.save()
+            self.aggs = aggregates.combine(self.aggs, *self.agg_parts)
+            self.agg_parts = []
+            aggregates.save(self.aggs, AGG_DIR)
+        with stage("fecho: sessões") as rec:
+            if self.late:
+                self.sessions.recompute(user_history(self.late, self.csv_path), self.late)
+            sessions.save(self.sessions.tables(), sessions.GAP_MINUTES, SESSIONS_DIR)
+            rec["items"] += len(self.late)
+
+def iter_chunks(stmts, size):
+    for i in range(0, len(stmts), size):
+        yield stmts[i:i + size]
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+# ─── MANIFESTO DO RUN (etapas, linhas, watermark) ───────────────
+class RunManifest:
+    # o que o run fez e quanto custou cada etapa; gravado no fim (também se
+    # falhar) em MANIFEST_FILE e acrescentado a RUNS_FILE, ao lado da saída
+    def __init__(self, args):
+        self.stages = Stages(PeakMemory(interval=0.02))
+        self.pages = []     # uma entrada por página (ou janela) recebida
+        self.client = self.resolver = None   # definidos pelo run (pedidos HTTP, cobertura)
+        self.t0 = time.perf_counter()
+        self.data = {
+            "started": now_iso(), "finished": None, "elapsed_s": None, "status": "running",
+            "mode": "backfill" if args.backfill else "full" if args.full else "incremental",
+            "source": args.endpoint or BASE_URL,
+            "since": args.since, "until": args.until,
+            "watermark_before": None, "watermark": None,
+            "chunk_size": args.chunk_size, "shards": args.shards, "outputs": [],
+            "rows": {"received": 0, "written": 0, "duplicates": 0},
+        }
+
+    def fetch(self, pages, client):
+        # mede a espera por cada página (pedido + JSON) e os bytes recebidos;
+        # iter_pages entrega (statements, more), iter_windows (statements,
+        # janela, última página). Com janelas em paralelo, os bytes de uma janela incluem os das outras
+        # que entretanto avançaram: a soma é exata, a repartição não.
+        pages = iter(pages)
+        while True:
+            wire, t0 = client.bytes_wire, time.perf_counter()
+            try:
+                item = next(pages)
+            except StopIteration:
+                return
+            elapsed = time.perf_counter() - t0
+            stmts = item[0]
+            nbytes = client.bytes_wire - wire
+            self.stages.add("http", elapsed, len(stmts), nbytes)
+            self.pages.append({"page": len(self.pages) + 1, "s": round(elapsed, 4),
+                               "statements": len(stmts), "bytes": nbytes})
+            yield item
+
+    def rows(self, received, written):
+        self.data["rows"] = {"received": received, "written": written,
+                             "duplicates": max(0, received - written)}
+
+    def save(self, status, error=None):
+        self.stages.memory.stop()
+        elapsed = time.perf_counter() - self.t0
+        self.data.update(status=status, finished=now_iso(), elapsed_s=round(elapsed, 3))
+        if error:
+            self.data["error"] = error
+        written = self.data["rows"]["written"]
+        self.data["rows_per_s"] = round(written / elapsed, 1) if elapsed else None
+        self.data["http"] = self.client.stats() if self.client is not None else None
+        self.data["modules"] = self.resolver.coverage() if self.resolver is not None else None
+        peak = peak_rss_mb()
+        self.data["peak_memory_mb"] = round(peak, 1) if peak is not None else None
+        self.data["stages"] = self.stages.report()
+        self.data["pages"] = self.pages
+        tmp = MANIFEST_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, MANIFEST_FILE)
+        with open(RUNS_FILE, "a", encoding="utf8") as f:
+            f.write(json.dumps(self.data, ensure_ascii=False) + "\n")
+
+def load_runs(path=RUNS_FILE):
+    # histórico dos runs (um manifesto por linha), do mais antigo para o mais recente
+    if not os.path.isfile(path):
+        return []
+    with open(path, encoding="utf8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def history(last=20):
+    # tendência dos últimos runs: débito total e segundos por etapa
+    runs = load_runs()[-last:]
+    if not runs:
+        print(f"ℹ️ Sem runs registados em {RUNS_FILE}.")
+        return 0
+    rows = [{"início": r["started"][:19], "modo": r["mode"], "estado": r["status"],
+             "linhas": r["rows"]["written"], "s": r["elapsed_s"], "linhas/s": r.get("rows_per_s"),
+             "MB": r.get("peak_memory_mb"), **{k: v["s"] for k, v in r.get("stages", {}).items()}}
+            for r in runs]
+    print(pd.DataFrame(rows).to_string(index=False))
+    return 0
+
+def backfill(args, client, writer, progress, manifest):
+    # reexporta só [since, until]: não lê nem avança o watermark
+    windows = split_windows(args.since, args.until, args.shards)
+    received = rows = 0
+    fetched = manifest.fetch(client.iter_windows(windows, limit=args.chunk_size), client)
+    for i, (stmts, _, _) in enumerate(fetched, 1):
+        received += len(stmts)
+        for chunk in iter_chunks(stmts, args.chunk_size):
+            rows += writer.write(chunk)
+        manifest.rows(received, rows)
+        progress.update(pages=i, received=received, written=rows)
+    writer.close()
+    print(f"✅ Backfill {args.since} → {args.until}: +{rows} linhas novas de {received} "
+          f"recebidos em {len(windows)} janelas ({received - rows} já guardados).")
+    print(f"🧩 {writer.resolver.coverage_report()}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Exporta statements xAPI do Watershed LRS.")
+    ap.add_argument("--course", help="id do curso em courses.json (exporta para a pasta do curso)")
+    ap.add_argument("--endpoint", help="URL do endpoint de statements (default: BASE_URL)")
+    ap.add_argument("--since", help="ignora o watermark e começa nesta data (ISO 8601)")
+    ap.add_argument("--full", action="store_true",
+                    help="reconstrói o store (e o CSV) desde DEFAULT_SINCE")
+    ap.add_argument("--csv", action="store_true",
+                    help=f"escreve também {OUT_CSV}")
+    ap.add_argument("--sql", action="store_true",
+                    help=f"escreve também a base SQL embebida ({SQL_DB}) usada pelo dashboard")
+    ap.add_argument("--until", help="limite superior (ISO 8601); por omissão, agora")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE,
+                    help=f"statements por página/chunk escrito (default {CHUNK_SIZE})")
+    ap.add_argument("--shards", type=int, default=1,
+                    help="divide o intervalo em N janelas buscadas em paralelo")
+    ap.add_argument("--backfill", action="store_true",
+                    help="reexporta só a janela --since/--until, sem mexer no watermark")
+    ap.add_argument("--history", type=int, nargs="?", const=20, metavar="N",
+                    help=f"mostra os últimos N runs de {RUNS_FILE} (tempo por etapa) e sai")
+    args = ap.parse_args(argv)
+
+    if args.backfill and not (args.since and args.until):
+        ap.error("--backfill precisa de --since e --until")
+
+    args.start = DEFAULT_SINCE
+    args.out_csv = OUT_CSV
+    action = (lambda a: history(a.history)) if args.history else export
+    if not args.course:
+        return action(args)
+    # Curso do courses.json: todos os ficheiros (store, agregados, estado,
+    # lock) ficam na pasta do curso
+    course = courses.get(args.course)
+    args.endpoint = args.endpoint or course_endpoint(course)
+    args.start = course.since or DEFAULT_SINCE
+    # relativo à pasta do curso (o export corre lá dentro), como no dashboard
+    args.out_csv = course.files["statements_csv"]
+    os.makedirs(course.dir, exist_ok=True)
+    cwd = os.getcwd()
+    os.chdir(course.dir)
+    try:
+        print(f"🎓 Curso {course.id} ({course.title}) em {course.dir}/")
+        return action(args)
+    finally:
+        os.chdir(cwd)
+
+def export(args):
+    # Single-flight: se já houver um export a correr (dashboard ou CLI), sai
+    lock = file_lock.try_exclusive(LOCK_FILE)
+    if lock is None:
+        print("⏳ Já existe um export a correr.")
+        return 2
+    progress = Progress()
+    progress.update()
+    manifest = RunManifest(args)
+    try:
+        run(args, progress, manifest)
+    except BaseException as e:
+        error = str(e) or type(e).__name__
+        manifest.save("failed", error)
+        progress.update(status="failed", error=error)
+        raise
+    else:
+        manifest.save("done")
+        progress.update(status="done")
+    finally:
+        file_lock.release(lock)
+    return 0
+
+def run(args, progress, manifest):
+    # Destinos: store Parquet (se houver pyarrow) e/ou CSV
+    to_store = statement_store.available()
+    to_csv = args.csv or not to_store
+    # a base SQL, uma vez criada com --sql, continua a ser mantida
+    to_sql = args.sql or os.path.isfile(SQL_DB)
+    if not to_store:
+        print("ℹ️ pyarrow não instalado: a exportar só para CSV.")
+
+    manifest.data["outputs"] = [name for name, on in (("store", to_store), ("csv", to_csv), ("sql", to_sql)) if on]
+
+    out_csv = args.out_csv
+    state = load_state()
+    manifest.data["watermark_before"] = state.get("watermark")
+    if args.full:
+        for path in (out_csv, IDS_FILE):
+            if os.path.isfile(path):
+                os.remove(path)
+        shutil.rmtree(STORE_DIR, ignore_errors=True)
+        shutil.rmtree(AGG_DIR, ignore_errors=True)
+        shutil.rmtree(SESSIONS_DIR, ignore_errors=True)
+        if os.path.isfile(SQL_DB):
+            os.remove(SQL_DB)
+        state = {}
+    elif to_store and not statement_store.exists(STORE_DIR) and os.path.isfile(out_csv):
+        n = statement_store.import_csv(out_csv, STORE_DIR)
+        print(f"📦 {out_csv} migrado para {STORE_DIR}/ ({n} linhas).")
+
+    # Agregados em falta (1.º run) ou possivelmente incompletos (run interrompido)
+    if (state.get("pending") or not aggregates.exists(AGG_DIR)) and not args.full:
+        with manifest.stages.stage("reconstrução: agregados"):
+            rebuild_aggregates(out_csv)
+        print(f"📊 Agregados recalculados em {AGG_DIR}/.")
+    # sessões em falta, possivelmente incompletas ou com outro intervalo de inatividade
+    if not args.full and (state.get("pending") or sessions.saved_gap(SESSIONS_DIR) != sessions.GAP_MINUTES):
+        with manifest.stages.stage("reconstrução: sessões"):
+            rebuild_sessions(out_csv)
+        print(f"⏱️ Sessões recalculadas em {SESSIONS_DIR}/ (inatividade > {sessions.GAP_MINUTES} min).")
+    # base SQL nova (1.º --sql) ou possivelmente incompleta: recarregada do que está guardado
+    if to_sql and not args.full and (state.get("pending") or not os.path.isfile(SQL_DB)):
+        with manifest.stages.stage("reconstrução: sql") as rec:
+            n = rec["items"] = sql_store.rebuild(iter_stored(sql_store.SOURCE_COLS, out_csv), SQL_DB)
+        print(f"🗄️ {SQL_DB} ({sql_store.ENGINE}) carregada com {n} statements.")
+
+    resolver = module_resolver.ModuleResolver(MAP_CSV)
+    client = make_client(args.endpoint)
+    manifest.client, manifest.resolver = client, resolver
+    if args.backfill:
+        writer = ChunkWriter(load_seen_ids(csv_path=out_csv), resolver, to_store, to_csv, to_sql,
+                             manifest.stages, out_csv)
+        backfill(args, client, writer, progress, manifest)
+        manifest.data["watermark"] = state.get("watermark")
+        client.close()
+        return
+
+    # 1) Retoma um run interrompido ou começa um novo a partir do watermark
+    if state.get("pending"):
+        since = state["run_since"]
+        cursor = state.get("cursor")
+        print(f"↩️ A retomar run interrompido (since={since}).")
+        manifest.data["mode"] = "resume"
+        resumed = True
+        # o store pode já ter o último chunk sem ele ter chegado ao índice
+        seen = load_seen_ids(rebuild=True, csv_path=out_csv)
+        # linhas já escritas pelas execuções interrompidas, incluindo um chunk
+        # que chegou ao store sem ter ficado registado no estado
+        if "run_base" in state:
+            state["run_rows"] = len(seen) - state["run_base"]
+    else:
+        since = args.since or state.get("watermark") or args.start
+        cursor = None
+        resumed = False
+        seen = load_seen_ids(csv_path=out_csv)
+        state.update({"pending": True, "run_since": since, "cursor": None,
+                      "run_watermark": state.get("watermark"),
+                      "pages": 0, "run_rows": 0, "run_base": len(seen)})
+        if args.shards > 1:
+            state["windows"] = split_windows(since, args.until or now_iso(), args.shards)
+            state["next_window"] = 0
+        save_state(state)
+
+    manifest.data["since"] = since
+    writer = ChunkWriter(seen, resolver, to_store, to_csv, to_sql, manifest.stages, out_csv)
+    # received/written: só esta execução; state["run_rows"]: o run inteiro,
+    # somando as execuções interrompidas antes desta
+    received = written = 0
+    if state.get("windows"):
+        # 2a) Janelas temporais em paralelo; as páginas chegam por ordem das
+        #     janelas e são escritas à medida que chegam. Cada janela concluída
+        #     é marcada no estado; um run interrompido repete a janela a meio
+        #     (os ids já guardados são ignorados)
+        pending_windows = state["windows"][state["next_window"]:]
+        fetched = manifest.fetch(client.iter_windows(pending_windows, limit=args.chunk_size), client)
+        for stmts, _, last in fetched:
+            received += len(stmts)
+            new = sum(writer.write(chunk) for chunk in iter_chunks(stmts, args.chunk_size))
+            written += new
+            state["run_rows"] += new
+            state["run_watermark"] = max_stored(stmts, state.get("run_watermark"))
+            if last:
+                state["next_window"] += 1
+            state["pages"] += 1
+            save_state(state)
+            manifest.rows(received, written)
+            progress.update(pages=state["pages"], received=received, written=written)
+    else:
+        # 2b) Streaming: cada página é limpa, resolvida e escrita como um chunk;
+        #     só uma página de cada vez fica em memória
+        if state.get("pages") and not cursor:
+            pages = []  # a paginação já tinha terminado antes da interrupção
+        else:
+            pages = client.iter_pages(since=since, limit=args.chunk_size,
+                                      more=cursor, until=args.until)
+        for stmts, more in manifest.fetch(pages, client):
+            received += len(stmts)
+            new = writer.write(stmts)
+            written += new
+            state["run_rows"] += new
+            state["run_watermark"] = max_stored(stmts, state.get("run_watermark"))
+            state["cursor"] = more
+            state["pages"] += 1
+            save_state(state)
+            manifest.rows(received, written)
+            progress.update(pages=state["pages"], received=received, written=written)
+
+    # 3) Fecha o run: o watermark só avança quando a paginação terminou
+    writer.close()
+    state = {
+        "watermark": state.get("run_watermark"),
+        "pending": False,
+        "last_run_rows": state["run_rows"],
+    }
+    save_state(state)
+    manifest.data["watermark"] = state["watermark"]
+    manifest.data["run_rows"] = state["last_run_rows"]   # com as execuções interrompidas
+
+    if state["last_run_rows"]:
+        target = STORE_DIR + "/" if to_store else out_csv
+        print(f"✅ {target}: +{written} linhas novas de {received} recebidos nesta execução "
+              f"(watermark {state['watermark']}).")
+        if resumed:
+            print(f"↩️ Run retomado: +{state['last_run_rows']} linhas no total, "
+                  f"contando as execuções interrompidas.")
     else:
-        # Se não existir description, cai no name ou URL
-        df["activity"] = (
-            df[name_cols[0]] if name_cols
-            else df.get("object.id", "")
-        )
-
-    # (c) Limpa user
-    df["user"] = (
-        df.get("actor.account.name", pd.Series(dtype=str))
-        .fillna(df.get("actor.mbox", ""))
-    )
-
-    # 8) Exporta CSV final
-    clean = df[["id","timestamp","user","cmid","module","verb","activity"]]
-    clean.to_csv("statements_clean.csv", index=False, encoding="utf8")
-    print(f"✅ statements_clean.csv criado com {len(clean)} linhas.")
+        print("ℹ️ Nenhum statement novo desde o último run.")
+    print(f"🧩 {resolver.coverage_report()}")
+    print(f"🌐 {client.summary()}")
+    client.close()
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"📈 Pico de memória: {peak:.1f} MB (chunk de {args.chunk_size} statements).")
+    print(f"⏱️ Etapas (manifesto em {MANIFEST_FILE}):")
+    for line in manifest.stages.table():
+        print(f"   {line}")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
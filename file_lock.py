@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# file_lock.py — Locks entre processos (flock) para o export e para a publicação dos dados
+#
+# - try_exclusive(): single-flight do export (só um export de cada vez, venha
+#   ele do dashboard, de outra sessão ou da linha de comandos)
+# - shared()/exclusive(): leitores (dashboard) vs. publicação de ficheiros novos,
+#   para que ninguém leia um conjunto de ficheiros a meio de ser trocado
+
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem flock, fica tudo sem lock
+    fcntl = None
+
+def lock_path(path):
+    # pasta → <pasta>/.lock ; ficheiro → <dir>/.<nome>.lock
+    if os.path.isdir(path):
+        return os.path.join(path, ".lock")
+    head, tail = os.path.split(path)
+    return os.path.join(head, f".{tail}.lock")
+
+def _open(path):
+    return open(path, "a+")
+
+@contextmanager
+def _locked(path, mode):
+    f = _open(path)
+    try:
+        if fcntl:
+            fcntl.flock(f, mode)
+        yield
+    finally:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_UN)
+        f.close()
+
+def shared(path):
+    return _locked(path, fcntl.LOCK_SH if fcntl else None)
+
+def exclusive(path):
+    return _locked(path, fcntl.LOCK_EX if fcntl else None)
+
+def try_exclusive(path):
+    # devolve o ficheiro (manter aberto enquanto o lock for preciso) ou None
+    f = _open(path)
+    if not fcntl:
+        return f
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        f.close()
+        return None
+    return f
+
+def release(f):
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    f.close()
+
+def is_locked(path):
+    if not os.path.exists(path):
+        return False
+    f = try_exclusive(path)
+    if f is None:
+        return True
+    release(f)
+    return False
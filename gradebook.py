@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# gradebook.py — Leitura única dos CSVs exportados do Moodle (notas e inquéritos)
+#
+# O separador (";" ou ",") é detetado uma vez, a partir do cabeçalho, e cada
+# ficheiro é lido uma só vez por versão (mtime + tamanho). Para os CSVs de
+# notas devolve uma estrutura já tipada:
+#
+#   scores      alunos × perguntas (float), colunas "P. 1", "P. 2", ...
+#   max_scores  nota máxima de cada pergunta (do cabeçalho "P. 1 /0,77")
+#   means       linha "Média" do Moodle, por pergunta
+#   grades      nota global de cada aluno ("Avaliação/10,00"), grade_max = 10.0
+#   mean_grade  nota global da linha "Média"
+#   student_ids chave de cada aluno (e-mail, ou apelido + nome), para juntar ficheiros
+#   raw         o CSV tal como foi lido (texto), usado pelo avas_export.py
+
+import os
+import re
+import csv
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+QUESTION_RE = re.compile(r"^\s*(P\.\s*\d+)\s*(?:/\s*([\d.,]+))?")
+GRADE_RE = re.compile(r"^\s*Avalia[çc][ãa]o\s*/\s*([\d.,]+)", re.IGNORECASE)
+MEAN_LABEL = "média"
+ID_COLUMNS = ["E-mail", "Endereço de email", "Email"]
+MAX_CACHED = 32
+
+def to_float(values):
+    # "0,77" / "0.77" → 0.77 ; "-" e vazios → NaN (vetorizado)
+    return pd.to_numeric(values.astype(str).str.strip().str.replace(",", ".", regex=False),
+                         errors="coerce")
+
+def sniff_sep(path, encoding="utf-8-sig"):
+    # o separador é o que parte o cabeçalho em mais colunas (os textos das
+    # perguntas dos inquéritos também têm vírgulas)
+    with open(path, encoding=encoding, newline="") as f:
+        header = f.readline()
+    return max(";,\t", key=lambda sep: len(next(csv.reader([header], delimiter=sep))))
+
+class Gradebook:
+    def __init__(self, raw, path=None, sep=","):
+        self.path = path
+        self.sep = sep
+        self.raw = raw
+
+        # linha "Média" (na primeira coluna) separada das linhas dos alunos
+        first = raw.columns[0]
+        is_mean = raw[first].str.strip().str.lower().eq(MEAN_LABEL)
+        students = raw[~is_mean]
+        mean_row = raw[is_mean].iloc[0] if is_mean.any() else None
+
+        id_col = next((c for c in ID_COLUMNS if c in raw.columns), None)
+        if id_col:
+            ids = students[id_col]
+        else:
+            ids = students[first] + " " + students[raw.columns[1]] if len(raw.columns) > 1 else students[first]
+        self.student_ids = pd.Index(ids.str.strip().str.lower(), name="student")
+
+        # perguntas: "P. 1 /0,77" → "P. 1", máximo 0.77
+        self.question_cols = {}
+        max_scores = {}
+        for col in raw.columns:
+            m = QUESTION_RE.match(col)
+            if m:
+                label = re.sub(r"\s+", " ", m.group(1))
+                self.question_cols[label] = col
+                max_scores[label] = float(m.group(2).replace(",", ".")) if m.group(2) else float("nan")
+        self.max_scores = pd.Series(max_scores, dtype=float)
+        cols = list(self.question_cols.values())
+        self.scores = students[cols].apply(to_float).set_axis(list(self.question_cols), axis=1)
+        self.means = None
+        if mean_row is not None:
+            self.means = to_float(mean_row[cols]).set_axis(list(self.question_cols))
+
+        # nota global
+        self.grade_col = next((c for c in raw.columns if GRADE_RE.match(c)), None)
+        self.grades = self.grade_max = self.mean_grade = None
+        if self.grade_col:
+            self.grades = to_float(students[self.grade_col])
+            self.grade_max = float(GRADE_RE.match(self.grade_col).group(1).replace(",", "."))
+            if mean_row is not None:
+                self.mean_grade = float(to_float(pd.Series([mean_row[self.grade_col]])).iloc[0])
+
+    def question_means(self):
+        if self.means is None:
+            raise ValueError(f"Linha 'Média' não encontrada em {self.path}")
+        if self.means.empty:
+            raise ValueError(f"Nenhuma coluna de pergunta (P. X) em {self.path}")
+        return self.means.dropna()
+
+    def overall_mean(self):
+        if self.mean_grade is None or pd.isna(self.mean_grade):
+            raise ValueError(f"Nenhuma nota global na linha 'Média' de {self.path}")
+        return self.mean_grade
+
+# ─── LEITURA (uma vez por versão do ficheiro) ──────────────────
+_cache = OrderedDict()
+_lock = threading.Lock()
+stats = {"hits": 0, "misses": 0}
+
+def read_raw(path, encoding="utf-8-sig"):
+    sep = sniff_sep(path, encoding)
+    raw = pd.read_csv(path, sep=sep, encoding=encoding, dtype=str, keep_default_na=False)
+    raw.columns = raw.columns.str.replace("\ufeff", "", regex=False).str.strip()
+    return raw, sep
+
+def load(path, encoding="utf-8-sig"):
+    # devolve o Gradebook em cache enquanto o ficheiro não mudar
+    stat = os.stat(path)
+    key = (os.path.abspath(path), encoding)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == signature:
+            _cache.move_to_end(key)
+            stats["hits"] += 1
+            return entry[1]
+        stats["misses"] += 1
+    raw, sep = read_raw(path, encoding)
+    book = Gradebook(raw, path, sep)
+    with _lock:
+        _cache[key] = (signature, book)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED:
+            _cache.popitem(last=False)
+    return book
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# item_analysis.py — Análise de itens de qualquer matriz respondentes × itens
+#
+# Serve para as perguntas Likert do inquérito de satisfação, para as perguntas
+# das avaliações (gradebook.py) e para as perguntas H5P vistas pelo xAPI
+# (xapi_outcomes). Por item calcula:
+#
+#   Média          média das respostas
+#   Dificuldade    média na escala 0–1: (média − mínimo) / (máximo − mínimo)
+#   Discriminação  diferença entre os 27% melhores e os 27% piores no total,
+#                  na mesma escala 0–1
+#   r item-total   correlação do item com o total dos outros itens (corrigida)
+#   α sem o item   α de Cronbach se o item fosse retirado
+#
+# e o α de Cronbach do instrumento. Tudo sai das variâncias dos itens e das
+# covariâncias item–total, calculadas numa passagem pela matriz (sem ciclos por
+# item nem recalcular o α k vezes): milhares de respondentes × centenas de
+# itens custam milissegundos. Só entram os respondentes com todos os itens
+# respondidos (como no α calculado antes no dashboard).
+
+import re
+
+import numpy as np
+import pandas as pd
+
+GROUP = 0.27            # fração de respondentes em cada grupo extremo
+ACCEPTABLE = 0.7        # α a partir do qual a consistência é aceitável
+LEVELS = [(0.9, "Excelente"), (0.8, "Boa"), (0.7, "Aceitável"),
+          (0.6, "Questionável"), (0.5, "Fraca")]
+
+def interpret(alpha):
+    # escala habitual de George & Mallery para o α de Cronbach
+    if alpha is None or np.isnan(alpha):
+        return "Indeterminada"
+    return next((label for limit, label in LEVELS if alpha >= limit), "Inaceitável")
+
+def _alpha(k, item_var_sum, total_var):
+    # α de Cronbach a partir das variâncias (escalares ou vetores, um por item retirado)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return k / (k - 1) * (1 - item_var_sum / total_var)
+
+def analyse(scores, max_scores=None, min_score=0.0):
+    # scores: DataFrame respondentes × itens (NaN = sem resposta)
+    # max_scores: máximo de cada item (escalar ou Series); por omissão o
+    #             máximo observado. min_score: mínimo da escala (1 no Likert)
+    # devolve {"alpha", "n", "k", "items": DataFrame item × estatísticas}
+    if not all(pd.api.types.is_numeric_dtype(t) for t in scores.dtypes):
+        scores = scores.apply(pd.to_numeric, errors="coerce")
+    scores = scores.dropna(how="any")
+    n, k = scores.shape
+    if k < 2:
+        raise ValueError("São precisos pelo menos 2 itens para a análise de itens.")
+    if n < 2:
+        raise ValueError("Não há respondentes suficientes com todos os itens respondidos.")
+    x = scores.to_numpy(dtype=float)
+
+    # variâncias dos itens e covariâncias item–total, numa passagem
+    centered = x - x.mean(axis=0)
+    total = centered.sum(axis=1)
+    item_var = (centered ** 2).sum(axis=0) / (n - 1)
+    total_var = total @ total / (n - 1)
+    cov_total = centered.T @ total / (n - 1)
+
+    # total sem o item i: var(T − xᵢ) = var(T) − 2·cov(xᵢ, T) + var(xᵢ)
+    rest_var = total_var - 2 * cov_total + item_var
+    alpha = _alpha(k, item_var.sum(), total_var)
+    if k > 2:
+        alpha_drop = _alpha(k - 1, item_var.sum() - item_var, rest_var)
+    else:
+        alpha_drop = np.full(k, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r_rest = (cov_total - item_var) / np.sqrt(item_var * rest_var)
+
+    # escala de cada item (dificuldade e discriminação entre 0 e 1)
+    if max_scores is None:
+        top = x.max(axis=0)
+    elif np.isscalar(max_scores):
+        top = np.full(k, float(max_scores))
+    else:
+        top = pd.Series(max_scores, dtype=float).reindex(scores.columns).to_numpy()
+        top = np.where(np.isnan(top), x.max(axis=0), top)
+    span = top - min_score
+    span = np.where(span > 0, span, np.nan)
+
+    # grupos extremos pelo total (ordenado uma só vez)
+    g = max(1, int(round(n * GROUP)))
+    order = np.argsort(x.sum(axis=1), kind="stable")
+    discrimination = (x[order[-g:]].mean(axis=0) - x[order[:g]].mean(axis=0)) / span
+
+    items = pd.DataFrame({
+        "Média": x.mean(axis=0),
+        "Dificuldade": (x.mean(axis=0) - min_score) / span,
+        "Discriminação": discrimination,
+        "r item-total": r_rest,
+        "α sem o item": alpha_drop,
+    }, index=scores.columns)
+    return {"alpha": float(alpha), "n": n, "k": k, "items": items}
+
+def xapi_outcomes(df, prefix="Pergunta"):
+    # statements normalizados (normalize.py) → utilizador × pergunta H5P:
+    # 1 se a pergunta foi respondida, 0 se só foi tentada ou nunca aberta por
+    # quem chegou a alguma das perguntas
+    questions = df["activity"].astype(str).str.startswith(prefix) & (df["is_attempt"] | df["is_answer"])
+    rows = df.loc[questions, ["user", "activity", "is_answer"]]
+    answered = (rows.assign(user=rows["user"].astype(str), activity=rows["activity"].astype(str))
+                .groupby(["user", "activity"], as_index=False)["is_answer"].any()
+                .rename(columns={"is_answer": "answered"}))
+    return outcome_matrix(answered)
+
+def outcome_matrix(answered):
+    # (user, activity, answered) → matriz utilizador × pergunta; as linhas podem
+    # vir do pandas (xapi_outcomes) ou da base SQL (sql_store.question_outcomes)
+    if answered.empty:
+        return pd.DataFrame()
+    outcomes = (answered.astype({"answered": bool})
+                .pivot(index="user", columns="activity", values="answered")
+                .fillna(False)
+                .astype(float))
+    # "Pergunta 2" antes de "Pergunta 10"
+    order = sorted(outcomes.columns, key=lambda c: [int(t) if t.isdigit() else t for t in re.split(r"(\d+)", c)])
+    return outcomes[order].rename_axis(index="user", columns=None)
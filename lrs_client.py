@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# lrs_client.py — Cliente HTTP (sessão partilhada + retry) para o endpoint de statements do LRS
+
+import time
+import queue
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Respostas que valem nova tentativa (rate limit + erros transitórios do servidor)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# Falhas de rede que valem nova tentativa, incluindo um corpo cortado a meio
+# (ChunkedEncodingError) ou um gzip truncado (ContentDecodingError)
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)
+
+
+class LRSClient:
+    def __init__(self, base_url, auth=None, headers=None, timeout=60,
+                 max_retries=5, backoff=0.5, max_backoff=30.0, max_retry_after=600.0,
+                 pool_size=10, prefetch=4):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after   # espera máxima pedida pelo servidor
+        self.pool_size = pool_size
+        self.prefetch = prefetch                 # páginas em fila por janela (--shards)
+
+        # Uma só sessão: reutiliza a ligação TLS (keep-alive) entre páginas
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.auth = auth
+        self.session.headers.update(headers or {})
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+
+        # Contadores por pedido (partilhados entre threads no modo por janelas)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.bytes_wire = 0      # bytes recebidos (comprimidos)
+        self.bytes_body = 0      # bytes do JSON depois de descomprimido
+        self.latencies = []      # segundos por pedido
+
+    # ─── PEDIDO COM BACKOFF ─────────────────────────────────────────
+    def _retry_delay(self, attempt, response):
+        # exponencial com jitter, limitado a max_backoff; o Retry-After do
+        # servidor é respeitado por inteiro (tentar antes só gasta tentativas
+        # ainda em rate limit) e, se pedir mais do que max_retry_after, desiste
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        delay *= random.uniform(0.5, 1.0)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    wait = (when - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    wait = 0
+            if wait > self.max_retry_after:
+                raise requests.HTTPError(
+                    f"HTTP {response.status_code}: o LRS pede {wait:.0f}s de espera "
+                    f"(Retry-After), acima do máximo de {self.max_retry_after:.0f}s",
+                    response=response)
+            delay = max(delay, wait)
+        return delay
+
+    def get_json(self, url, params=None):
+        for attempt in range(self.max_retries + 1):
+            response, error = None, None
+            t0 = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                body = response.content
+            except RETRY_ERRORS as e:
+                error = e
+            with self._lock:
+                self.requests += 1
+                self.latencies.append(time.perf_counter() - t0)
+                if response is not None:
+                    self.bytes_body += len(body)
+                    self.bytes_wire += response.raw.tell() or len(body)
+
+            if response is not None:
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response.json()
+
+            if attempt == self.max_retries:
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+            delay = self._retry_delay(attempt, response)
+            reason = error or f"HTTP {response.status_code}"
+            print(f"⚠️ {reason} — nova tentativa em {delay:.1f}s "
+                  f"({attempt + 1}/{self.max_retries})")
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    # ─── PAGINAÇÃO ─────────────────────────────────────────────────
+    def iter_pages(self, since=None, limit=500, more=None, until=None):
+        # devolve (statements, more) página a página; com `more` retoma
+        # a paginação a partir de um cursor guardado
+        if more is None:
+            params = {"limit": limit}
+            if since:
+                params["since"] = since
+            if until:
+                params["until"] = until
+            data = self.get_json(self.base_url, params=params)
+            more = data.get("more")
+            yield data.get("statements", []), more
+        while more:
+            data = self.get_json(urljoin(self.base_url, more))
+            more = data.get("more")
+            yield data.get("statements", []), more
+
+    # ─── JANELAS TEMPORAIS EM PARALELO ─────────────────────────────
+    def _fetch_window(self, since, until, limit, pages, stop):
+        # pagina uma janela para a sua fila (limitada); pára se o consumidor desistir
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        try:
+            for stmts, _ in self.iter_pages(since=since, until=until, limit=limit):
+                if not put(("page", stmts)):
+                    return
+            put(("done", None))
+        except BaseException as e:
+            put(("error", e))
+
+    def iter_windows(self, windows, limit=500, workers=None):
+        # busca as janelas em paralelo mas entrega as páginas por ordem das
+        # janelas: (statements, índice da janela, última página da janela).
+        # No máximo `workers` janelas estão em curso e cada uma só adianta
+        # `prefetch` páginas, por isso a memória fica limitada a
+        # workers × prefetch páginas, seja qual for o tamanho do LRS
+        workers = workers or min(len(windows), self.pool_size) or 1
+        queues = [queue.Queue(maxsize=self.prefetch) for _ in windows]
+        stop = threading.Event()
+        submitted = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                for i, pages in enumerate(queues):
+                    while submitted < min(len(windows), i + workers):
+                        a, b = windows[submitted]
+                        pool.submit(self._fetch_window, a, b, limit, queues[submitted], stop)
+                        submitted += 1
+                    # uma página de avanço, para saber qual é a última da janela
+                    held = None
+                    while True:
+                        kind, value = pages.get()
+                        if kind == "error":
+                            raise value
+                        if kind == "done":
+                            yield (held if held is not None else []), i, True
+                            break
+                        if held is not None:
+                            yield held, i, False
+                        held = value
+            finally:
+                stop.set()
+
+    def stats(self):
+        # contadores em dicionário (manifesto do export)
+        with self._lock:
+            lat = sorted(self.latencies)
+            out = {"requests": self.requests, "retries": self.retries,
+                   "bytes_wire": self.bytes_wire, "bytes_body": self.bytes_body,
+                   "p50_ms": None, "p95_ms": None}
+        if lat:
+            out["p50_ms"] = round(lat[len(lat) // 2] * 1000, 1)
+            out["p95_ms"] = round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1)
+        return out
+
+    def summary(self):
+        s = self.stats()
+        if not s["requests"]:
+            return "0 pedidos"
+        return (f"{s['requests']} pedidos ({s['retries']} retries), "
+                f"{s['bytes_wire'] / 1024:.0f} KB recebidos "
+                f"({s['bytes_body'] / 1024:.0f} KB descomprimidos), "
+                f"latência p50 {s['p50_ms']:.0f} ms / p95 {s['p95_ms']:.0f} ms")
+
+    def close(self):
+        self.session.close()
+
+
+# ─── DATAS ─────────────────────────────────────────────────────────
+def _parse_iso(value):
+    if not value:
+        return datetime.min.replace(tzinfo=timezone.utc)
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+def _format_iso(dt):
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def split_windows(since, until, n):
+    # divide [since, until] em n janelas contíguas (since exclusivo, until
+    # inclusivo, como no xAPI), sem sobreposição entre janelas
+    start, end = _parse_iso(since), _parse_iso(until)
+    if end <= start:
+        raise ValueError(f"until ({until}) tem de ser posterior a since ({since})")
+    n = max(1, int(n))
+    step = (end - start) / n
+    bounds = [start + step * i for i in range(n)] + [end]
+    return [[_format_iso(a), _format_iso(b)] for a, b in zip(bounds, bounds[1:])]
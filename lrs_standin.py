@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# lrs_standin.py — LRS xAPI local (stand-in do Watershed) para testar e medir o export.py
+#
+#   python lrs_standin.py serve --statements 50000 --latency 40 --error-rate 0.05
+#   python lrs_standin.py serve --replay gravacao.jsonl --rate-limit 10
+#   python lrs_standin.py record gravacao.jsonl --since 2025-06-11T12:00:00Z
+#
+# Implementa o contrato de GET /lrs/statements usado pelo export.py:
+# `limit`, `since` (exclusivo) e `until` (inclusivo) sobre o campo `stored`,
+# e paginação por `more`. O cursor é opaco e sem estado no servidor.
+
+import argparse
+import base64
+import gzip
+import json
+import random
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+
+import workload
+
+STATEMENTS_PATH = "/lrs/statements"
+
+# ─── STATEMENTS SINTÉTICOS ──────────────────────────────────────
+def synthetic_statements(n, seed=42, start=workload.START, days=workload.DAYS):
+    # statements com a forma dos do curso (workload.py), numa só lista
+    return [s for batch in workload.statements(n, seed=seed, start=start, days=days) for s in batch]
+
+def load_recording(path):
+    with open(path, encoding="utf8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+# ─── SERVIDOR ───────────────────────────────────────────────────
+def _parse_iso(value):
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+class StandinLRS:
+    def __init__(self, statements, page_size=500, latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, rate_limit=None, seed=0):
+        # ordena por `stored` para que since/until sejam uma fatia contígua
+        self.statements = sorted(statements, key=lambda s: s.get("stored") or s.get("timestamp"))
+        self.stored = [_parse_iso(s.get("stored") or s["timestamp"]) for s in self.statements]
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit          # pedidos/segundo (token bucket)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = float(rate_limit or 0)
+        self.last_refill = time.monotonic()
+        self.hits = {"requests": 0, "errors": 0, "throttled": 0}
+
+    def _throttled(self):
+        if not self.rate_limit:
+            return False
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate_limit, self.tokens + (now - self.last_refill) * self.rate_limit)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return False
+            return True
+
+    def _slice(self, since, until):
+        lo = bisect_right(self.stored, _parse_iso(since)) if since else 0
+        hi = bisect_right(self.stored, _parse_iso(until)) if until else len(self.stored)
+        return lo, max(lo, hi)
+
+    def page(self, query):
+        # devolve o corpo JSON de uma página; `cursor` é o estado da paginação
+        if "cursor" in query:
+            cur = json.loads(base64.urlsafe_b64decode(query["cursor"]))
+            lo, hi, limit = cur["pos"], cur["hi"], cur["limit"]
+        else:
+            limit = min(int(query.get("limit") or self.page_size), self.page_size)
+            lo, hi = self._slice(query.get("since"), query.get("until"))
+        end = min(hi, lo + limit)
+        body = {"statements": self.statements[lo:end], "more": ""}
+        if end < hi:
+            token = base64.urlsafe_b64encode(
+                json.dumps({"pos": end, "hi": hi, "limit": limit}).encode()).decode()
+            body["more"] = f"{STATEMENTS_PATH}?{urlencode({'cursor': token})}"
+        return body
+
+def make_handler(lrs):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=b"", headers=None):
+            self.send_response(status)
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != STATEMENTS_PATH:
+                return self._send(404)
+            with lrs.lock:
+                lrs.hits["requests"] += 1
+            if lrs._throttled():
+                with lrs.lock:
+                    lrs.hits["throttled"] += 1
+                return self._send(429, headers={"Retry-After": "1"})
+            delay = lrs.latency_ms + lrs.rng.uniform(0, lrs.jitter_ms)
+            if delay:
+                time.sleep(delay / 1000)
+            if lrs.error_rate and lrs.rng.random() < lrs.error_rate:
+                with lrs.lock:
+                    lrs.hits["errors"] += 1
+                return self._send(lrs.rng.choice([500, 502, 503]))
+
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            body = json.dumps(lrs.page(query)).encode()
+            headers = {"Content-Type": "application/json",
+                       "X-Experience-API-Version": "1.0.3"}
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body, compresslevel=5)
+                headers["Content-Encoding"] = "gzip"
+            self._send(200, body, headers)
+
+    return Handler
+
+def start_server(lrs, host="127.0.0.1", port=0):
+    # arranca numa thread; devolve (server, endpoint) — port=0 escolhe uma porta livre
+    server = ThreadingHTTPServer((host, port), make_handler(lrs))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}{STATEMENTS_PATH}"
+
+# ─── CLI ────────────────────────────────────────────────────────
+def record(path, since=None, until=None):
+    # grava statements do LRS configurado no export.py para replay
+    import export
+    client = export.make_client()
+    n = 0
+    with open(path, "w", encoding="utf8") as f:
+        for stmts, _ in client.iter_pages(since=since, until=until):
+            f.writelines(json.dumps(s) + "\n" for s in stmts)
+            n += len(stmts)
+    print(f"✅ {n} statements gravados em {path} ({client.summary()}).")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="LRS xAPI local para testes do export.py.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve", help="serve statements sintéticos ou gravados")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=8800)
+    sp.add_argument("--statements", type=int, default=10_000, help="nº de statements sintéticos")
+    sp.add_argument("--replay", help="ficheiro .jsonl gravado com `record`")
+    sp.add_argument("--page-size", type=int, default=500, help="máximo de statements por página")
+    sp.add_argument("--latency", type=float, default=0, help="latência por pedido (ms)")
+    sp.add_argument("--jitter", type=float, default=0, help="latência aleatória extra (ms)")
+    sp.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 5xx")
+    sp.add_argument("--rate-limit", type=float, help="pedidos/segundo antes de responder 429")
+    sp.add_argument("--seed", type=int, default=42)
+
+    rp = sub.add_parser("record", help="grava statements do LRS real para replay")
+    rp.add_argument("path")
+    rp.add_argument("--since")
+    rp.add_argument("--until")
+
+    args = ap.parse_args(argv)
+    if args.cmd == "record":
+        return record(args.path, args.since, args.until)
+
+    stmts = load_recording(args.replay) if args.replay else synthetic_statements(args.statements, args.seed)
+    lrs = StandinLRS(stmts, page_size=args.page_size, latency_ms=args.latency,
+                     jitter_ms=args.jitter, error_rate=args.error_rate,
+                     rate_limit=args.rate_limit, seed=args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(lrs))
+    print(f"🧪 LRS stand-in com {len(stmts)} statements em "
+          f"http://{args.host}:{args.port}{STATEMENTS_PATH}")
+    print(f"   export: LRS_ENDPOINT=http://{args.host}:{args.port}{STATEMENTS_PATH} python export.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n{lrs.hits}")
+
+if __name__ == "__main__":
+    main()
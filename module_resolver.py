@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# module_resolver.py — Resolve o módulo de cada statement (cmid/secção → módulo) sem joins
+#
+# Ordem de resolução: cmid_module_map.csv → índice aprendido → "Outro".
+# O índice (module_index.json) guarda as secções (section.php?id=) cujo módulo já
+# se conhece por terem aparecido com um cmid mapeado, e os cmids que, não estando
+# no mapa, foram resolvidos pela secção. Assim um statement sem parent (ou de uma
+# atividade nova) herda o módulo da sua secção.
+
+import os
+import json
+import pandas as pd
+
+MAP_CSV    = "cmid_module_map.csv"
+INDEX_FILE = "module_index.json"
+FALLBACK   = "Outro"
+
+class ModuleResolver:
+    def __init__(self, map_csv=MAP_CSV, index_file=INDEX_FILE):
+        self.index_file = index_file
+        self.cmid_map = self._load_map(map_csv)
+        index = self._load_index(index_file)
+        self.sections = {int(k): v for k, v in index.get("sections", {}).items()}
+        self.cmids = {int(k): v for k, v in index.get("cmids", {}).items()}
+        self.dirty = False
+        self.total = 0
+        self.fallback = 0
+
+    @staticmethod
+    def _load_map(path):
+        try:
+            map_df = pd.read_csv(path, sep=";", encoding="utf-8-sig")
+        except FileNotFoundError:
+            print(f"ℹ️ {path} não encontrado, só o índice de secções será usado.")
+            return {}
+        except Exception as e:
+            print(f"⚠️ Erro ao ler {path}:", e)
+            return {}
+        map_df = map_df.dropna(subset=["cmid"])
+        return dict(zip(map_df["cmid"].astype(int), map_df["module"].astype(str).str.strip()))
+
+    @staticmethod
+    def _load_index(path):
+        try:
+            with open(path, encoding="utf8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    # ─── RESOLUÇÃO EM LOTE ─────────────────────────────────────────
+    def resolve(self, cmid, section_id):
+        # cmid / section_id: Series Int64 alinhadas; devolve a Series de módulos
+        by_map = cmid.map(self.cmid_map)
+
+        # aprende secção → módulo a partir dos statements com cmid mapeado
+        known = by_map.notna() & section_id.notna()
+        if known.any():
+            pairs = pd.DataFrame({"section": section_id[known], "module": by_map[known]})
+            pairs = pairs.drop_duplicates("section")
+            new = pairs[~pairs["section"].isin(self.sections.keys())]
+            if len(new):
+                self.sections.update(zip(new["section"].astype(int), new["module"]))
+                self.dirty = True
+
+        by_section = section_id.map(self.sections)
+        # cmids fora do mapa resolvidos pela secção ficam no índice
+        learned = by_map.isna() & by_section.notna() & cmid.notna()
+        if learned.any():
+            pairs = pd.DataFrame({"cmid": cmid[learned], "module": by_section[learned]})
+            new = pairs.drop_duplicates("cmid")
+            new = new[~new["cmid"].isin(self.cmids.keys())]
+            if len(new):
+                self.cmids.update(zip(new["cmid"].astype(int), new["module"]))
+                self.dirty = True
+
+        module = by_map.fillna(by_section).fillna(cmid.map(self.cmids)).fillna(FALLBACK)
+        self.total += len(module)
+        self.fallback += int((module == FALLBACK).sum())
+        return module.astype(str)
+
+    # ─── PERSISTÊNCIA / RELATÓRIO ──────────────────────────────────
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.index_file + ".tmp"
+        with open(tmp, "w", encoding="utf8") as f:
+            json.dump({
+                "sections": {str(k): v for k, v in sorted(self.sections.items())},
+                "cmids": {str(k): v for k, v in sorted(self.cmids.items())},
+            }, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.index_file)
+        self.dirty = False
+
+    def coverage(self):
+        resolved = self.total - self.fallback
+        return {
+            "statements": self.total,
+            "resolved": resolved,
+            "fallback": self.fallback,
+            "coverage": resolved / self.total if self.total else None,
+            "sections_known": len(self.sections),
+        }
+
+    def coverage_report(self):
+        c = self.coverage()
+        if not c["statements"]:
+            return "módulos: nenhum statement resolvido"
+        return (f"módulos: {c['resolved']}/{c['statements']} resolvidos "
+                f"({c['coverage']:.1%}), {c['fallback']} em \"{FALLBACK}\", "
+                f"{c['sections_known']} secções no índice")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# normalize.py — Normalização canónica dos statements (uma vez por versão dos dados)
+#
+# module, verb        → category (strip)
+# module_norm         → category, sem acentos e em minúsculas ("Satisfação" → "satisfacao")
+# verb_lc             → category, em minúsculas
+# is_attempt, is_answer, is_satisfaction_submit → flags booleanas
+#
+# Tudo é calculado sobre as categorias (valores únicos) e propagado às linhas
+# pelos códigos inteiros: o custo não depende do número de statements.
+
+import numpy as np
+import pandas as pd
+import unidecode
+
+def norm_text(value):
+    return unidecode.unidecode(str(value)).lower().strip()
+
+def _categorical(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype("category")
+
+def _recode(cat, func):
+    # aplica func a cada categoria; categorias que colapsam no mesmo valor
+    # (ex.: "Satisfação" e "Satisfacao") passam a partilhar o código
+    values = [func(c) for c in cat.cat.categories]
+    uniques, inverse = np.unique(np.asarray(values, dtype=object).astype(str), return_inverse=True)
+    codes = cat.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, inverse[codes] if len(inverse) else codes, -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, uniques), index=cat.index)
+
+def _flag(cat, pred):
+    # pred: Index de categorias → array bool; devolve uma flag por linha
+    values = np.asarray(pred(cat.cat.categories.astype(str)), dtype=bool)
+    values = np.append(values, False)  # código -1 (NaN) → False
+    return pd.Series(values[cat.cat.codes.to_numpy()], index=cat.index)
+
+def normalize(df):
+    # devolve um frame novo (não altera df)
+    module = _recode(_categorical(df["module"]), lambda c: str(c).strip())
+    verb = _categorical(df["verb"])
+    module_norm = _recode(module, norm_text)
+    verb_lc = _recode(verb, lambda c: str(c).lower())
+
+    in_satisfacao = _flag(module_norm, lambda c: c.str.contains("satisfacao"))
+    submitted = _flag(verb_lc, lambda c: c == "submitted")
+
+    return df.assign(
+        module=module,
+        module_norm=module_norm,
+        verb=verb,
+        verb_lc=verb_lc,
+        is_attempt=_flag(verb_lc, lambda c: c.str.contains("attempt")),
+        is_answer=_flag(verb_lc, lambda c: c.str.contains("answer")),
+        is_satisfaction_submit=submitted & in_satisfacao,
+    )
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# paired_gains.py — Evolução diagnóstica → final por aluno (análise emparelhada)
+#
+# Junta os alunos que fizeram as duas avaliações (gradebook.student_ids) e, numa
+# só matriz aluno × (perguntas + nota global), calcula:
+#   - ganho emparelhado (final − diagnóstica) por aluno e por pergunta
+#   - ganho normalizado de Hake: (final − diag) / (máximo − diag)
+#   - intervalos de confiança bootstrap do ganho médio
+# O bootstrap é vetorizado: cada bloco de reamostragens é uma matriz de pesos
+# (quantas vezes cada aluno saiu, via np.bincount) multiplicada pela matriz de
+# ganhos, sem ciclos por reamostragem nem por aluno. O tamanho dos blocos
+# limita a memória.
+
+import numpy as np
+import pandas as pd
+
+OVERALL = "Nota global"
+N_BOOT = 2000
+MAX_CELLS = 20_000_000  # reamostragens × alunos por bloco
+
+def pair(diag, final):
+    # alunos e perguntas presentes nos dois ficheiros; se um aluno tiver várias
+    # tentativas fica a última
+    d = diag.scores.set_axis(diag.student_ids)
+    f = final.scores.set_axis(final.student_ids)
+    d = d[~d.index.duplicated(keep="last")]
+    f = f[~f.index.duplicated(keep="last")]
+    questions = [q for q in d.columns if q in f.columns]
+    students = d.index.intersection(f.index)
+    pre = d.loc[students, questions]
+    post = f.loc[students, questions]
+    max_scores = final.max_scores.reindex(questions).fillna(diag.max_scores.reindex(questions))
+    if diag.grades is not None and final.grades is not None:
+        pre[OVERALL] = pd.Series(diag.grades.to_numpy(), index=diag.student_ids) \
+            .groupby(level=0).last().reindex(students).to_numpy()
+        post[OVERALL] = pd.Series(final.grades.to_numpy(), index=final.student_ids) \
+            .groupby(level=0).last().reindex(students).to_numpy()
+        max_scores[OVERALL] = final.grade_max or diag.grade_max
+    return pre, post, max_scores
+
+def bootstrap_means(values, n_boot=N_BOOT, seed=0):
+    # values: matriz alunos × colunas (com NaN); devolve reamostragens × colunas
+    # com a média de cada coluna em cada reamostragem
+    n = values.shape[0]
+    valid = ~np.isnan(values)
+    filled = np.where(valid, values, 0.0)
+    rng = np.random.default_rng(seed)
+    block = max(1, MAX_CELLS // max(n, 1))
+    out = np.empty((n_boot, values.shape[1]))
+    for start in range(0, n_boot, block):
+        b = min(block, n_boot - start)
+        # n sorteios com reposição por reamostragem → contagem de cada aluno
+        idx = rng.integers(0, n, size=(b, n)) + np.arange(b)[:, None] * n
+        w = np.bincount(idx.ravel(), minlength=b * n).reshape(b, n).astype(float)
+        stop = start + b
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[start:stop] = (w @ filled) / (w @ valid)
+    return out
+
+def analyse(diag, final, n_boot=N_BOOT, ci=0.95, seed=0):
+    pre, post, max_scores = pair(diag, final)
+    if pre.empty:
+        return None
+    P, Q = pre.to_numpy(float), post.to_numpy(float)
+    M = max_scores.to_numpy(float)
+    gain = Q - P
+    with np.errstate(invalid="ignore", divide="ignore"):
+        room = M - P
+        norm = np.where(room > 0, gain / room, np.nan)
+
+    boot = bootstrap_means(gain, n_boot, seed)
+    alpha = (1 - ci) / 2
+    low, high = np.nanquantile(boot, [alpha, 1 - alpha], axis=0)
+
+    pre_mean, post_mean = np.nanmean(P, axis=0), np.nanmean(Q, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        class_norm = (post_mean - pre_mean) / (M - pre_mean)  # <g> da turma
+
+    columns = list(pre.columns)
+    per_item = pd.DataFrame({
+        "Diagnóstica": pre_mean,
+        "Final": post_mean,
+        "Ganho": np.nanmean(gain, axis=0),
+        "IC inf.": low,
+        "IC sup.": high,
+        "Ganho normalizado": class_norm,
+        "N": (~np.isnan(gain)).sum(axis=0),
+    }, index=pd.Index(columns, name="Pergunta"))
+
+    # por aluno: só a nota global (ou a soma das perguntas, se não houver)
+    if OVERALL in columns:
+        k = columns.index(OVERALL)
+        s_pre, s_post, s_gain, s_norm = P[:, k], Q[:, k], gain[:, k], norm[:, k]
+    else:
+        s_pre, s_post = np.nansum(P, axis=1), np.nansum(Q, axis=1)
+        s_gain = s_post - s_pre
+        with np.errstate(invalid="ignore", divide="ignore"):
+            total = np.nansum(M)
+            s_norm = np.where(total > s_pre, s_gain / (total - s_pre), np.nan)
+    per_student = pd.DataFrame({
+        "Diagnóstica": s_pre, "Final": s_post, "Ganho": s_gain, "Ganho normalizado": s_norm,
+    })  # sem identificação dos alunos (e-mails/nomes ficam fora do dashboard)
+
+    return {"n": len(pre), "per_item": per_item, "per_student": per_student}
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# profiling.py — Tempo de cada secção do dashboard, nos últimos reruns
+#
+# Cada rerun do dashboard abre um Rerun e marca o início de cada secção:
+#
+#   sec = prof.section("Visão Geral")
+#   ...
+#   sec["rows"] = len(tabela)
+#   prof.section("Statements por Módulo")     # fecha a "Visão Geral"
+#   ...
+#   prof.finish()
+#
+# Fica registado o tempo de parede da secção, as linhas que processou, os
+# acertos/cargas das caches durante a secção (contadores passados em
+# `counters`: datasets, gráficos, gradebooks) e, se a secção lançar trabalho
+# em fundo (relatório PDF), o tempo desse trabalho em sec["background_s"].
+# Os reruns terminados vão para um Profiler partilhado pelo processo (últimos
+# KEEP_RERUNS, de todas as sessões), que o painel do admin mostra e exporta
+# em JSON. Os contadores das caches são do processo: com várias sessões ao
+# mesmo tempo, uma secção pode contar acertos de outra.
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+import pandas as pd
+
+KEEP_RERUNS = int(os.environ.get("PROFILE_RERUNS", "50"))
+COLUMNS = ["rerun", "visão", "section", "s", "rows", "cache_hits", "cache_misses", "background_s"]
+
+def _delta(before, after):
+    # (acertos, cargas) somados por todas as caches
+    hits = sum(after[k][0] - before[k][0] for k in after)
+    misses = sum(after[k][1] - before[k][1] for k in after)
+    return hits, misses
+
+class Rerun:
+    # as secções do dashboard são sequenciais: section() fecha a anterior e
+    # abre a seguinte, finish() fecha a última e publica o rerun
+    def __init__(self, profiler, view, counters):
+        self.profiler = profiler
+        self.counters = counters
+        self.record = {"view": view, "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                       "total_s": None, "sections": []}
+        self._t0 = self._end = time.perf_counter()
+        self._open = None
+        self._finished = False
+
+    def section(self, name):
+        # devolve o registo da secção; o dashboard preenche sec["rows"] e sec["background_s"]
+        self._close()
+        self._open = ({"section": name, "s": None, "rows": None, "background_s": None},
+                      time.perf_counter(), self.counters())
+        return self._open[0]
+
+    def _close(self):
+        if self._open is None:
+            return
+        sec, t0, before = self._open
+        self._open = None
+        self._end = time.perf_counter()
+        sec["s"] = self._end - t0
+        if sec["rows"] is not None:
+            sec["rows"] = int(sec["rows"])
+        sec["cache_hits"], sec["cache_misses"] = _delta(before, self.counters())
+        self.record["sections"].append(sec)
+
+    def finish(self):
+        if self._finished:
+            return
+        self._finished = True
+        self._close()
+        self.record["total_s"] = self._end - self._t0
+        self.profiler._add(self.record)
+
+    def abandon(self):
+        # rerun interrompido (st.stop/st.rerun), fechado no início do seguinte:
+        # publica só as secções terminadas (a que ficou a meio não tem tempo)
+        if not self._finished:
+            self._open = None
+            self.record["interrupted"] = True
+            self.finish()
+
+class Profiler:
+    # reruns terminados de todas as sessões (deque limitada, protegida por lock)
+    def __init__(self, keep=KEEP_RERUNS):
+        self._lock = threading.Lock()
+        self._reruns = deque(maxlen=keep)
+        self._count = 0
+
+    def start(self, view, counters):
+        return Rerun(self, view, counters)
+
+    def _add(self, record):
+        with self._lock:
+            self._count += 1
+            self._reruns.append({"rerun": self._count, **record})
+
+    def reruns(self, last=None, view=None):
+        with self._lock:
+            reruns = [r for r in self._reruns if view is None or r["view"] == view]
+        return reruns[-last:] if last else reruns
+
+    def table(self, last=None, view=None):
+        # uma linha por rerun × secção
+        rows = [{"rerun": r["rerun"], "visão": r["view"], **sec}
+                for r in self.reruns(last, view) for sec in r["sections"]]
+        return pd.DataFrame(rows, columns=COLUMNS)
+
+    def summary(self, last=None, view=None):
+        # por secção: tempo médio e máximo, linhas e caches, pela ordem do dashboard
+        t = self.table(last, view)
+        if t.empty:
+            return t
+        return t.groupby(["visão", "section"], sort=False).agg(
+            reruns=("rerun", "nunique"), media_s=("s", "mean"), max_s=("s", "max"),
+            linhas=("rows", "max"), acertos=("cache_hits", "sum"), cargas=("cache_misses", "sum"),
+            fundo_s=("background_s", "max"))
+
+    def to_json(self, last=None, view=None):
+        return json.dumps({"reruns": self.reruns(last, view)}, ensure_ascii=False, indent=2)
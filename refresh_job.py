@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# refresh_job.py — Corre o export.py em background para o botão "Atualizar dados"
+#
+# Uma só instância por processo do Streamlit (st.cache_resource), partilhada por
+# todas as sessões. O export corre num subprocesso: a página continua a responder
+# e cada sessão vê o progresso (export_progress.json). O lock do export.py
+# garante que nunca há dois exports em simultâneo, mesmo com um lançado à mão.
+
+import os
+import sys
+import json
+import subprocess
+import threading
+
+import file_lock
+
+EXPORT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "export.py")
+LOCK_FILE     = "export.lock"           # o mesmo do export.py
+PROGRESS_FILE = "export_progress.json"
+LOG_FILE      = "export.log"
+
+class RefreshManager:
+    # workdir: pasta de dados do curso (onde o export escreve lock/progresso)
+    def __init__(self, workdir=".", course_id=None):
+        self.workdir = workdir
+        self.course_id = course_id
+        self._lock = threading.Lock()
+        self._proc = None
+        self.returncode = None   # código de saída do último export lançado aqui
+        self.run_id = 0          # incrementado a cada start(): as sessões sabem qual lançaram
+
+    def _path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def running(self):
+        if self._proc is not None:
+            code = self._proc.poll()
+            if code is None:
+                return True
+            self.returncode = code
+        # export lançado fora do dashboard (CLI, cron, outro servidor)
+        return file_lock.is_locked(self._path(LOCK_FILE))
+
+    def start(self, args=()):
+        # devolve False se já houver um export a correr
+        with self._lock:
+            if self.running():
+                return False
+            if self.course_id:
+                args = ("--course", self.course_id, *args)
+            os.makedirs(self.workdir, exist_ok=True)
+            log = open(self._path(LOG_FILE), "w", encoding="utf8")
+            self._proc = subprocess.Popen(
+                [sys.executable, EXPORT_SCRIPT, *args],
+                stdout=log, stderr=subprocess.STDOUT,
+            )
+            self.returncode = None
+            self.run_id += 1
+            threading.Thread(target=self._wait, args=(self._proc, log), daemon=True).start()
+            return True
+
+    def _wait(self, proc, log):
+        proc.wait()
+        log.close()
+        self.returncode = proc.returncode
+
+    def progress(self):
+        try:
+            with open(self._path(PROGRESS_FILE), encoding="utf8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def log_tail(self, lines=5):
+        try:
+            with open(self._path(LOG_FILE), encoding="utf8") as f:
+                return "".join(f.readlines()[-lines:])
+        except FileNotFoundError:
+            return ""
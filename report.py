@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# report.py — Relatório PDF da Visão Learn Stats, gerado em background
+#
+# Os gráficos são renderizados em paralelo pelo charts.py (reaproveitando os PNG
+# já em cache para os mesmos dados) e o PDF fica em cache pela versão dos dados:
+# pedir o mesmo relatório outra vez é imediato. Os PNG temporários de que o
+# FPDF precisa ficam num TemporaryDirectory, apagado no fim.
+
+import os
+import hashlib
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from fpdf import FPDF
+
+import charts
+import item_analysis
+
+MAX_REPORTS = 4
+
+def version(df_satis, df_evol, df_easy, df_hard, cronbach_alpha):
+    # versão dos dados do relatório: muda quando muda qualquer uma das entradas
+    h = hashlib.sha1()
+    for data in (df_satis[["Distrito", "Nacionalidade", "Escolaridade"]],
+                 df_evol[["Diagnóstica", "Final"]], df_easy, df_hard):
+        h.update(charts.data_hash(data).encode())
+    h.update(f"{cronbach_alpha:.6f}".encode())
+    return h.hexdigest()
+
+# ─── GRÁFICOS (os mesmos no dashboard e no PDF) ──────────────────
+# o dashboard mostra estes gráficos com charts.render e os mesmos parâmetros:
+# o PDF reaproveita os PNG que já estão na cache
+def sample_charts(df_satis):
+    return {
+        "distrito": ("bar", df_satis["Distrito"].value_counts(),
+                     {"title": "Distribuição por Distrito", "figsize": (6.4, 4.8)}),
+        "nacionalidade": ("bar", df_satis["Nacionalidade"].value_counts(),
+                          {"title": "Distribuição por Nacionalidade", "figsize": (6.4, 4.8)}),
+        "escolaridade": ("bar", df_satis["Escolaridade"].value_counts(),
+                         {"title": "Distribuição por Escolaridade", "figsize": (6.4, 4.8)}),
+    }
+
+def evolution_chart(df_evol):
+    return ("line", df_evol[["Diagnóstica", "Final"]],
+            {"title": "Evolução Diagnóstica vs Final", "figsize": (6.4, 4.8)})
+
+def chart_specs(df_satis, df_evol):
+    return {**sample_charts(df_satis), "evolucao": evolution_chart(df_evol)}
+
+def build_pdf(df_satis, df_evol, df_easy, df_hard, cronbach_alpha, workers=4):
+    # 1. Gráficos em paralelo (PNG em memória, da cache quando possível)
+    specs = chart_specs(df_satis, df_evol)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {name: pool.submit(charts.render, kind, data, **params)
+                   for name, (kind, data, params) in specs.items()}
+        pngs = {name: f.result() for name, f in futures.items()}
+
+    top_easy_txt = "\n".join([f"{row['Pergunta']}: {row['Média']:.2f}" for _, row in df_easy.iterrows()])
+    top_hard_txt = "\n".join([f"{row['Pergunta']}: {row['Média']:.2f}" for _, row in df_hard.iterrows()])
+    cronbach_txt = (f"Alpha de Cronbach: {cronbach_alpha:.2f} "
+                    f"(consistência interna {item_analysis.interpret(cronbach_alpha).lower()}).")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # o FPDF só aceita imagens a partir de ficheiros
+        paths = {}
+        for name, png in pngs.items():
+            paths[name] = os.path.join(tmp_dir, f"{name}.png")
+            with open(paths[name], "wb") as f:
+                f.write(png)
+
+        # 2. Criar PDF
+        pdf = FPDF()
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 16)
+        pdf.cell(0, 10, "Relatório - Visão Learn Stats", ln=True)
+        pdf.set_font("Arial", "", 12)
+        pdf.multi_cell(0, 10, "Este relatório apresenta a caracterização da amostra, "
+                              "a evolução dos resultados da avaliação diagnóstica para a final "
+                              "e gráficos com os principais indicadores.")
+
+        # Página 1 – Caracterização da amostra
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 10, "Caracterização da Amostra", ln=True)
+        pdf.image(paths["distrito"], w=100)
+        pdf.ln(5)
+        pdf.image(paths["nacionalidade"], w=100)
+        pdf.ln(5)
+        pdf.image(paths["escolaridade"], w=100)
+
+        # Página 2 – Tempo e Evolução
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 10, "Tempo e Evolução", ln=True)
+        pdf.set_font("Arial", "", 12)
+        pdf.ln(5)
+        pdf.image(paths["evolucao"], w=180)
+
+        # Página 3 – Top-3 Perguntas e Cronbach
+        pdf.add_page()
+        pdf.set_font("Arial", "B", 14)
+        pdf.cell(0, 10, "Top-3 Perguntas", ln=True)
+
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, "Melhor Classificação", ln=True)
+        pdf.set_font("Arial", "", 12)
+        pdf.multi_cell(0, 10, top_easy_txt)
+
+        pdf.ln(5)
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, "Pior Classificação", ln=True)
+        pdf.set_font("Arial", "", 12)
+        pdf.multi_cell(0, 10, top_hard_txt)
+
+        pdf.ln(5)
+        pdf.set_font("Arial", "B", 12)
+        pdf.cell(0, 10, "Consistência Interna", ln=True)
+        pdf.set_font("Arial", "", 12)
+        pdf.multi_cell(0, 10, cronbach_txt)
+
+        # as imagens são lidas ao gerar o documento, antes de apagar tmp_dir
+        out = pdf.output(dest="S")
+    return out.encode("latin-1") if isinstance(out, str) else bytes(out)
+
+# ─── WORKER EM BACKGROUND ──────────────────────────────────────
+class ReportJobs:
+    # um worker partilhado pelas sessões; relatórios prontos em cache por versão
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+        self._lock = threading.RLock()  # o callback pode correr dentro de submit()
+        self._jobs = {}
+        self._done = OrderedDict()
+        self._failed = {}
+        self._started = {}
+        self._build_s = OrderedDict()   # tempo de geração de cada versão (perfil do dashboard)
+
+    def get(self, key):
+        # bytes do PDF já gerado para esta versão, ou None
+        with self._lock:
+            return self._done.get(key)
+
+    def status(self, key):
+        # "done" | "running" | "failed" | None (nunca pedido)
+        with self._lock:
+            if key in self._done:
+                return "done"
+            if key in self._jobs:
+                return "running"
+            if key in self._failed:
+                return "failed"
+        return None
+
+    def error(self, key):
+        with self._lock:
+            return self._failed.get(key)
+
+    def build_time(self, key):
+        # segundos desde o pedido até o PDF ficar pronto (None se ainda não terminou)
+        with self._lock:
+            return self._build_s.get(key)
+
+    def submit(self, key, *args):
+        # não repete o trabalho se esta versão já estiver pronta ou a ser gerada
+        with self._lock:
+            if key in self._done or key in self._jobs:
+                return
+            self._failed.pop(key, None)
+            self._started[key] = time.perf_counter()
+            self._jobs[key] = self._pool.submit(build_pdf, *args)
+            self._jobs[key].add_done_callback(lambda f: self._finish(key, f))
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._jobs.pop(key, None)
+            self._build_s[key] = time.perf_counter() - self._started.pop(key)
+            while len(self._build_s) > MAX_REPORTS:
+                self._build_s.popitem(last=False)
+            if future.exception() is not None:
+                self._failed[key] = future.exception()
+                return
+            self._done[key] = future.result()
+            while len(self._done) > MAX_REPORTS:
+                self._done.popitem(last=False)
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# sessions.py — Sessões e tempo ativo dos utilizadores, a partir dos statements
+#
+# Os statements de cada utilizador, por ordem temporal, são partidos em sessões
+# sempre que passam mais de GAP_MINUTES sem atividade. O tempo ativo de uma
+# sessão é a soma dos intervalos entre statements consecutivos dentro dela (os
+# logoffs e as pausas longas não contam); cada intervalo é atribuído ao módulo
+# do statement que o abre.
+#
+#   sessions/sessions.csv      user, session, start, end, events, active_s, last_module
+#   sessions/module_time.csv   user, module, active_s
+#   sessions/meta.json         {"gap_minutes": 30}
+#
+# Tudo é vetorizado (um lexsort + somas por código): sem ciclos por utilizador.
+# O export mantém as tabelas chunk a chunk (Sessionizer): os statements novos de
+# cada utilizador continuam a sua última sessão ou abrem sessões novas.
+# Statements atrasados (anteriores ao fim da última sessão, ex.: --backfill)
+# obrigam a recalcular esses utilizadores a partir do store (recompute).
+# Statements do mesmo utilizador com o mesmo timestamp ficam pela ordem de
+# chegada.
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+import file_lock
+
+SESSIONS_DIR = "sessions"
+GAP_MINUTES = int(os.environ.get("SESSION_GAP_MINUTES", "30"))
+SOURCE_COLS = ["timestamp", "user", "module"]
+
+SESSION_COLS = ["user", "session", "start", "end", "events", "active_s", "last_module"]
+
+def empty():
+    return {
+        "sessions": pd.DataFrame({
+            "user": pd.Series(dtype=str), "session": pd.Series(dtype="int64"),
+            "start": pd.Series(dtype="datetime64[ns, UTC]"),
+            "end": pd.Series(dtype="datetime64[ns, UTC]"),
+            "events": pd.Series(dtype="int64"), "active_s": pd.Series(dtype=float),
+            "last_module": pd.Series(dtype=str),
+        }),
+        "module_time": pd.DataFrame({
+            "user": pd.Series(dtype=str), "module": pd.Series(dtype=str),
+            "active_s": pd.Series(dtype=float),
+        }),
+    }
+
+# ─── CÁLCULO ───────────────────────────────────────────────────
+def _codes(series):
+    # códigos inteiros + valores (categorias já existentes são reaproveitadas)
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories.astype(str)
+    codes, uniques = pd.factorize(series.astype(str))
+    return codes, pd.Index(uniques)
+
+def _ts_ns(series):
+    return pd.DatetimeIndex(series).tz_convert("UTC").as_unit("ns").asi8
+
+def _sessionize(user, ts, gap_ns):
+    # user: códigos inteiros; ts: int64 ns. Devolve, por ordem
+    # (utilizador, tempo): ordem, id da sessão e tempo ativo de cada statement
+    order = np.lexsort((ts, user))
+    u, t = user[order], ts[order]
+    dt = np.diff(t)
+    cont = (u[1:] == u[:-1]) & (dt <= gap_ns)
+    sid = np.cumsum(np.r_[True, ~cont]) - 1
+    active = np.r_[np.where(cont, dt, 0), 0] / 1e9  # intervalo até ao seguinte, em segundos
+    return order, sid, active
+
+def compute(df, gap_minutes=GAP_MINUTES):
+    if df.empty:
+        return empty()
+    user, users = _codes(df["user"])
+    module, modules = _codes(df["module"])
+    ts = _ts_ns(df["timestamp"])
+    order, sid, active = _sessionize(user, ts, gap_minutes * 60 * 10**9)
+    u, t, m = user[order], ts[order], module[order]
+
+    first = np.r_[True, sid[1:] != sid[:-1]]
+    last = np.r_[sid[1:] != sid[:-1], True]
+    su = u[first]
+    sessions = pd.DataFrame({
+        "user": _take(users, su),
+        "session": _cumcount(su),
+        "start": pd.to_datetime(t[first], utc=True),
+        "end": pd.to_datetime(t[last], utc=True),
+        "events": np.bincount(sid),
+        "active_s": np.bincount(sid, weights=active),
+        "last_module": _take(modules, m[last]),
+    })
+    return {"sessions": sessions, "module_time": _module_time(users, modules, u, m, active)}
+
+def _take(values, codes):
+    # códigos -1 (NaN) → ""
+    return np.where(codes >= 0, np.asarray(values, dtype=object)[np.maximum(codes, 0)], "")
+
+def _cumcount(codes):
+    # número da ocorrência de cada código num array ordenado por código
+    idx = np.arange(len(codes))
+    starts = np.r_[True, codes[1:] != codes[:-1]]
+    return idx - np.maximum.accumulate(np.where(starts, idx, 0))
+
+def _module_time(users, modules, u, m, active):
+    table = pd.DataFrame({"u": u, "m": m, "active_s": active}) \
+        .groupby(["u", "m"], sort=False, as_index=False)["active_s"].sum()
+    return pd.DataFrame({
+        "user": _take(users, table["u"].to_numpy()),
+        "module": _take(modules, table["m"].to_numpy()),
+        "active_s": table["active_s"].to_numpy(),
+    })
+
+# ─── ATUALIZAÇÃO INCREMENTAL ───────────────────────────────────
+class Sessionizer:
+    # mantém as tabelas chunk a chunk. A última sessão de cada utilizador fica
+    # em `tail` (indexada pelo utilizador, a única que ainda pode crescer); as
+    # sessões fechadas e o tempo por módulo vão sendo acumulados em partes e
+    # só são juntos em tables(). Cada chunk custa O(linhas do chunk).
+    def __init__(self, tables=None, gap_minutes=GAP_MINUTES):
+        self.gap_minutes = gap_minutes
+        tables = tables or empty()
+        s = tables["sessions"].sort_values(["user", "session"], kind="stable")
+        is_tail = ~s["user"].duplicated(keep="last")
+        self.closed = [s[~is_tail]]
+        self.tail = s[is_tail].set_index("user")
+        self.module_parts = [tables["module_time"]]
+
+    def update(self, df):
+        # devolve os utilizadores com statements atrasados (anteriores ao fim
+        # da sua última sessão), que ficam de fora: recompute() com o histórico
+        if df.empty:
+            return set()
+        df = df[SOURCE_COLS].assign(user=df["user"].astype(str), module=df["module"].astype(str))
+        first_new = df.groupby("user")["timestamp"].min()
+        known = first_new.index.intersection(self.tail.index)
+        late = set(known[(first_new[known] < self.tail.loc[known, "end"]).to_numpy()])
+        if late:
+            df = df[~df["user"].isin(late)]
+            known = known.difference(list(late))
+            if df.empty:
+                return late
+
+        # cada utilizador com histórico entra com um statement "âncora" no fim
+        # da última sessão: se o 1.º statement novo estiver dentro do gap, a
+        # sessão continua e o intervalo conta para last_module
+        anchors = self.tail.loc[known]
+        stitched = pd.concat([
+            pd.DataFrame({"timestamp": anchors["end"].to_numpy(), "user": anchors.index,
+                          "module": anchors["last_module"].to_numpy()}),
+            df,
+        ], ignore_index=True)
+        new = compute(stitched, self.gap_minutes)
+        s = new["sessions"]
+
+        # a sessão 0 de quem tem âncora é a continuação da sessão em tail
+        is_cont = s["user"].isin(known) & (s["session"] == 0)
+        cont = s[is_cont].set_index("user")
+        merged = anchors.copy()
+        merged["end"] = cont["end"]
+        merged["events"] += cont["events"] - 1  # sem a âncora
+        merged["active_s"] += cont["active_s"]
+        merged["last_module"] = cont["last_module"]
+        fresh = s[~is_cont].copy()
+        fresh["session"] += fresh["user"].map(anchors["session"]).fillna(0).astype("int64")
+
+        chunk = pd.concat([merged.reset_index(), fresh], ignore_index=True) \
+            .sort_values(["user", "session"], kind="stable")
+        is_tail = ~chunk["user"].duplicated(keep="last")
+        self.closed.append(chunk[~is_tail][SESSION_COLS])
+        new_tail = chunk[is_tail].set_index("user")
+        self.tail = pd.concat([self.tail.drop(index=new_tail.index, errors="ignore"),
+                               new_tail[SESSION_COLS[1:]]])
+        self.module_parts.append(new["module_time"])
+        return late
+
+    def recompute(self, df, users):
+        # substitui as sessões de `users` pelas de todo o seu histórico (df)
+        users = set(users)
+        tables = self.tables()
+        new = compute(df[df["user"].astype(str).isin(users)], self.gap_minutes)
+        tables = {name: pd.concat([tables[name][~tables[name]["user"].isin(users)], new[name]],
+                                  ignore_index=True)
+                  for name in tables}
+        self.__init__(tables, self.gap_minutes)
+
+    def tables(self):
+        sessions = pd.concat(self.closed + [self.tail.reset_index()], ignore_index=True)[SESSION_COLS] \
+            .sort_values(["user", "session"], kind="stable").reset_index(drop=True)
+        module_time = pd.concat(self.module_parts, ignore_index=True) \
+            .groupby(["user", "module"], as_index=False)["active_s"].sum()
+        self.closed = [sessions[sessions["user"].duplicated(keep="last")]]
+        self.module_parts = [module_time]
+        return {"sessions": sessions, "module_time": module_time}
+
+# ─── RESUMOS ───────────────────────────────────────────────────
+def per_user(tables):
+    s = tables["sessions"]
+    return s.groupby("user").agg(sessions=("session", "size"), active_s=("active_s", "sum"),
+                                 events=("events", "sum"))
+
+def per_module(tables):
+    # tempo ativo médio por utilizador (de quem passou pelo módulo), em segundos
+    mt = tables["module_time"]
+    return mt.groupby("module")["active_s"].agg(["sum", "mean", "size"]) \
+        .rename(columns={"sum": "total_s", "mean": "mean_s", "size": "users"})
+
+# ─── PERSISTÊNCIA ──────────────────────────────────────────────
+def exists(root=SESSIONS_DIR):
+    return all(os.path.isfile(os.path.join(root, f)) for f in
+               ("sessions.csv", "module_time.csv", "meta.json"))
+
+def save(tables, gap_minutes=GAP_MINUTES, root=SESSIONS_DIR):
+    # mesmo esquema do aggregates.save: temporários escondidos + troca sob lock
+    os.makedirs(root, exist_ok=True)
+    for name, table in tables.items():
+        table.to_csv(os.path.join(root, f".{name}.csv.tmp"), index=False, encoding="utf8")
+    with open(os.path.join(root, ".meta.json.tmp"), "w", encoding="utf8") as f:
+        json.dump({"gap_minutes": gap_minutes}, f)
+    with file_lock.exclusive(os.path.join(root, ".lock")):
+        for name in tables:
+            os.replace(os.path.join(root, f".{name}.csv.tmp"), os.path.join(root, f"{name}.csv"))
+        os.replace(os.path.join(root, ".meta.json.tmp"), os.path.join(root, "meta.json"))
+
+def saved_gap(root=SESSIONS_DIR):
+    # intervalo de inatividade com que as tabelas guardadas foram calculadas
+    if not exists(root):
+        return None
+    with open(os.path.join(root, "meta.json"), encoding="utf8") as f:
+        return json.load(f)["gap_minutes"]
+
+def load(root=SESSIONS_DIR):
+    # devolve (tabelas, gap_minutes); (vazias, None) se ainda não existirem
+    if not exists(root):
+        return empty(), None
+    with file_lock.shared(os.path.join(root, ".lock")):
+        with open(os.path.join(root, "meta.json"), encoding="utf8") as f:
+            gap = json.load(f)["gap_minutes"]
+        sessions = pd.read_csv(os.path.join(root, "sessions.csv"), keep_default_na=False,
+                               dtype={"user": str, "last_module": str})
+        module_time = pd.read_csv(os.path.join(root, "module_time.csv"), keep_default_na=False,
+                                  dtype={"user": str, "module": str})
+    for col in ("start", "end"):
+        sessions[col] = pd.to_datetime(sessions[col], utc=True, format="ISO8601")
+    return {"sessions": sessions, "module_time": module_time}, gap
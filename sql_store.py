@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# sql_store.py — Base de dados analítica embebida dos statements (opcional)
+#
+# Com `export.py --sql` os statements limpos são escritos também numa base
+# embebida: DuckDB (statements.duckdb), se estiver instalado, senão SQLite
+# (statements.sqlite, da biblioteca padrão). O dashboard envia as agregações
+# de cada painel como SQL e só recebe as tabelas pequenas do resultado, em vez
+# de ter os statements todos num frame pandas:
+#
+#   aggregates()   as mesmas tabelas do aggregates.compute, com os filtros do admin
+#   sessions()     as mesmas tabelas do sessions.compute (funções de janela)
+#   overview()     primeiro/último dia, utilizadores e total (para os filtros)
+#   question_outcomes()  perguntas H5P respondidas por utilizador (item_analysis)
+#
+# Os valores normalizados (normalize.py) são gravados na escrita. Escrita sob
+# lock exclusivo e leituras sob lock partilhado (file_lock), com ligações curtas:
+# o DuckDB não deixa outro processo abrir o ficheiro enquanto há um escritor.
+
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+import file_lock
+import normalize
+
+try:
+    import duckdb
+except ImportError:  # duckdb é opcional: sem ele usa-se o sqlite3
+    duckdb = None
+
+ENGINE = "duckdb" if duckdb is not None else "sqlite"
+DB_FILE = f"statements.{ENGINE}"
+SOURCE_COLS = ["id", "timestamp", "user", "module", "verb", "activity"]
+COLUMNS = ["id", "ts", "day", "user", "module", "verb", "verb_lc", "activity",
+           "is_attempt", "is_answer", "is_satisfaction_submit"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS statements (
+    id TEXT, ts BIGINT, day TEXT, "user" TEXT, module TEXT, verb TEXT, verb_lc TEXT,
+    activity TEXT, is_attempt INTEGER, is_answer INTEGER, is_satisfaction_submit INTEGER
+)"""
+# o DuckDB dispensa índices (zone maps por bloco); no SQLite servem os filtros
+SQLITE_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS statements_ts ON statements (ts)",
+    "CREATE INDEX IF NOT EXISTS statements_module ON statements (module, ts)",
+    'CREATE INDEX IF NOT EXISTS statements_user ON statements ("user", ts)',
+]
+
+def exists(path=DB_FILE):
+    return os.path.isfile(path)
+
+# ─── LIGAÇÕES ──────────────────────────────────────────────────
+def _connect(path, read_only):
+    if ENGINE == "duckdb":
+        return duckdb.connect(path, read_only=read_only)
+    if read_only:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    return sqlite3.connect(path)
+
+@contextmanager
+def reader(path=DB_FILE):
+    with file_lock.shared(file_lock.lock_path(path)):
+        conn = _connect(path, read_only=True)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+@contextmanager
+def writer(path=DB_FILE):
+    # os índices (SQLite) são criados depois da escrita: numa carga em massa
+    # são construídos uma só vez, no fim
+    with file_lock.exclusive(file_lock.lock_path(path)):
+        conn = _connect(path, read_only=False)
+        try:
+            conn.execute(SCHEMA)
+            yield conn
+            if ENGINE == "sqlite":
+                for sql in SQLITE_INDEXES:
+                    conn.execute(sql)
+            conn.commit()
+        finally:
+            conn.close()
+
+def _query(conn, sql, params=()):
+    if ENGINE == "duckdb":
+        return conn.execute(sql, list(params)).df()
+    return pd.read_sql_query(sql, conn, params=list(params))
+
+# ─── ESCRITA ───────────────────────────────────────────────────
+def _rows(df):
+    # chunk limpo do export → colunas da tabela (normalização feita aqui, uma vez)
+    if "verb_lc" not in df.columns:
+        df = normalize.normalize(df)
+    ts = pd.DatetimeIndex(df["timestamp"]).tz_convert("UTC").as_unit("us").asi8
+    day = np.datetime_as_string((ts // 86_400_000_000).astype("datetime64[D]"))
+    return pd.DataFrame({
+        "id": df["id"].astype(str).to_numpy() if "id" in df.columns else None,
+        "ts": ts,
+        "day": day,
+        "user": df["user"].astype(str).to_numpy(),
+        "module": df["module"].astype(str).to_numpy(),
+        "verb": df["verb"].astype(str).to_numpy(),
+        "verb_lc": df["verb_lc"].astype(str).to_numpy(),
+        "activity": df["activity"].astype(str).to_numpy(),
+        "is_attempt": df["is_attempt"].to_numpy(dtype="int64"),
+        "is_answer": df["is_answer"].to_numpy(dtype="int64"),
+        "is_satisfaction_submit": df["is_satisfaction_submit"].to_numpy(dtype="int64"),
+    })
+
+def _insert(conn, rows):
+    if ENGINE == "duckdb":
+        conn.register("chunk", rows)
+        conn.execute(f"INSERT INTO statements SELECT {', '.join(_q(c) for c in COLUMNS)} FROM chunk")
+        conn.unregister("chunk")
+    else:
+        # tolist() → tipos Python (o sqlite3 não aceita escalares numpy)
+        columns = [rows[c].tolist() for c in COLUMNS]
+        conn.executemany(f"INSERT INTO statements VALUES ({', '.join('?' * len(COLUMNS))})",
+                         zip(*columns))
+
+def append(df, path=DB_FILE):
+    # devolve o número de linhas escritas
+    if df.empty:
+        return 0
+    with writer(path) as conn:
+        _insert(conn, _rows(df))
+    return len(df)
+
+def rebuild(chunks, path=DB_FILE):
+    # recria a base a partir de chunks de statements (ex.: export.iter_stored)
+    tmp = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.tmp")
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    n = 0
+    with writer(tmp) as conn:
+        for df in chunks:
+            if not df.empty:
+                _insert(conn, _rows(df))
+                n += len(df)
+    with file_lock.exclusive(file_lock.lock_path(path)):
+        os.replace(tmp, path)
+    os.remove(file_lock.lock_path(tmp))
+    return n
+
+# ─── CONSULTAS ─────────────────────────────────────────────────
+def _q(column):
+    return f'"{column}"'
+
+def _epoch_us(day):
+    return int(pd.Timestamp(day, tz="UTC").value // 1000)
+
+def _where(start=None, end=None, modules=(), verbs=(), users=(), extra=None):
+    # filtros do admin → cláusula WHERE + parâmetros (datas em UTC, inclusivas)
+    clauses, params = [], []
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(_epoch_us(start))
+    if end is not None:
+        clauses.append("ts < ?")
+        params.append(_epoch_us(pd.Timestamp(end) + pd.Timedelta(days=1)))
+    for column, values in (("module", modules), ("verb", verbs), ("user", users)):
+        if values:
+            clauses.append(f"{_q(column)} IN ({', '.join('?' * len(values))})")
+            params.extend(str(v) for v in values)
+    if extra:
+        clauses.append(extra)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+def aggregates(conn, **filters):
+    # as tabelas do aggregates.compute, calculadas na base
+    where, params = _where(**filters)
+    where_act, params_act = _where(**filters, extra="(is_attempt = 1 OR is_answer = 1)")
+    where_sat, params_sat = _where(**filters, extra="is_satisfaction_submit = 1")
+    tables = {
+        "module_counts": _query(conn, f"SELECT module, COUNT(*) AS count FROM statements{where} "
+                                      "GROUP BY module ORDER BY count DESC", params),
+        "verb_counts": _query(conn, f"SELECT verb, COUNT(*) AS count FROM statements{where} "
+                                    "GROUP BY verb ORDER BY count DESC", params),
+        "module_verb": _query(conn, f"SELECT module, verb_lc, COUNT(*) AS count FROM statements{where} "
+                                    "GROUP BY module, verb_lc", params),
+        "daily": _query(conn, f"SELECT day AS date, COUNT(*) AS count FROM statements{where} "
+                              "GROUP BY day ORDER BY day", params),
+        "activity": _query(conn, "SELECT activity, CAST(SUM(is_attempt) AS BIGINT) AS attempts, "
+                                 "CAST(SUM(is_answer) AS BIGINT) AS answers "
+                                 f"FROM statements{where_act} GROUP BY activity", params_act),
+        "satisf_users": _query(conn, f'SELECT DISTINCT "user" FROM statements{where_sat}', params_sat),
+    }
+    for table in tables.values():
+        for col in table.columns:
+            if col not in ("count", "attempts", "answers"):
+                table[col] = table[col].astype(str)
+    return tables
+
+def overview(conn):
+    # (primeiro dia, último dia, utilizadores, total de statements)
+    first, last, total = conn.execute("SELECT MIN(day), MAX(day), COUNT(*) FROM statements").fetchone()
+    users = [u for (u,) in conn.execute('SELECT DISTINCT "user" FROM statements ORDER BY 1').fetchall()]
+    first = pd.Timestamp(first).date() if first else None
+    last = pd.Timestamp(last).date() if last else None
+    return first, last, users, int(total)
+
+def question_outcomes(conn, prefix="Pergunta"):
+    # (user, activity, answered) das perguntas H5P, como no item_analysis.xapi_outcomes
+    where, params = _where(extra="substr(activity, 1, ?) = ? AND (is_attempt = 1 OR is_answer = 1)")
+    rows = _query(conn, f'SELECT "user", activity, MAX(is_answer) AS answered FROM statements{where} '
+                        'GROUP BY "user", activity', params + [len(prefix), prefix])
+    return rows.astype({"user": str, "activity": str})
+
+SESSIONS_SQL = """
+WITH e AS (
+    SELECT "user", module, ts,
+           LAG(ts) OVER w AS prev_ts, LEAD(ts) OVER w AS next_ts, rowid AS r
+    FROM statements{where}
+    WINDOW w AS (PARTITION BY "user" ORDER BY ts, rowid)
+), s AS (
+    SELECT "user", module, ts,
+           SUM(CASE WHEN prev_ts IS NULL OR ts - prev_ts > {gap} THEN 1 ELSE 0 END)
+               OVER (PARTITION BY "user" ORDER BY ts, r ROWS UNBOUNDED PRECEDING) - 1 AS session,
+           CASE WHEN next_ts - ts <= {gap} THEN next_ts - ts ELSE 0 END AS active,
+           CASE WHEN next_ts IS NULL OR next_ts - ts > {gap} THEN module END AS last_module
+    FROM e
+)
+SELECT "user", session, module, MIN(ts) AS start, MAX(ts) AS "end", COUNT(*) AS events,
+       SUM(active) / 1e6 AS active_s, MAX(last_module) AS last_module
+FROM s GROUP BY "user", session, module
+"""
+
+def sessions(conn, gap_minutes, **filters):
+    # as tabelas do sessions.compute: a divisão em sessões corre na base, numa
+    # só passagem (por utilizador × sessão × módulo); o resto é somado aqui
+    where, params = _where(**filters)
+    parts = _query(conn, SESSIONS_SQL.format(where=where, gap=int(gap_minutes * 60 * 1_000_000)),
+                   params).astype({"user": str, "module": str})
+    s = parts.groupby(["user", "session"], as_index=False).agg(
+        start=("start", "min"), end=("end", "max"), events=("events", "sum"),
+        active_s=("active_s", "sum"), last_module=("last_module", "first"))
+    for col in ("start", "end"):
+        s[col] = pd.to_datetime(s[col], unit="us", utc=True)
+    s["last_module"] = s["last_module"].astype(str)
+    m = parts.groupby(["user", "module"], as_index=False)["active_s"].sum()
+    return {"sessions": s, "module_time": m}
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# stage_metrics.py — Tempo, contagens, bytes e pico de memória por etapa (export e benchmarks)
+#
+#   stages = Stages(PeakMemory())
+#   with stages.stage("flatten") as rec:
+#       df = extract_batch(stmts)
+#       rec["items"] += len(df)
+#
+# A mesma etapa pode repetir-se (uma vez por chunk): tempos, chamadas, itens e
+# bytes são somados e o pico de memória é o máximo. Com um PeakMemory o RSS é
+# amostrado numa thread durante a etapa; sem ele é lido só no fim de cada uma.
+# As etapas não devem ser aninhadas (o pico de uma reiniciaria o da outra).
+
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+def rss_mb():
+    # memória residente atual (Linux); noutros sistemas o pico do processo
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb() or 0.0
+
+def peak_rss_mb():
+    # high-water mark do processo (ru_maxrss: KB em Linux, bytes em macOS)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+class PeakMemory:
+    # amostra o RSS numa thread; peak é o máximo desde o último reset()
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+    def reset(self):
+        self.peak = rss_mb()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+class Stages:
+    def __init__(self, memory=None):
+        self.memory = memory
+        self.results = {}
+
+    def _record(self, name):
+        return self.results.setdefault(name, {"calls": 0, "s": 0.0, "items": 0, "bytes": 0,
+                                              "peak_mb": 0.0})
+
+    @contextmanager
+    def stage(self, name):
+        rec = self._record(name)
+        if self.memory is not None:
+            self.memory.reset()
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["calls"] += 1
+            rec["s"] += time.perf_counter() - t0
+            peak = rss_mb()
+            if self.memory is not None:
+                peak = max(peak, self.memory.peak)
+            rec["peak_mb"] = max(rec["peak_mb"], peak)
+
+    def add(self, name, seconds=0.0, items=0, nbytes=0):
+        # etapa medida noutro sítio (ex.: pedidos HTTP contados pelo cliente)
+        rec = self._record(name)
+        rec["calls"] += 1
+        rec["s"] += seconds
+        rec["items"] += items
+        rec["bytes"] += nbytes
+        rec["peak_mb"] = max(rec["peak_mb"], rss_mb())
+        return rec
+
+    def report(self):
+        # {etapa: {...}} com o débito (itens/s) e valores arredondados, para JSON
+        out = {}
+        for name, rec in self.results.items():
+            out[name] = {"calls": rec["calls"], "s": round(rec["s"], 4), "items": rec["items"],
+                         "bytes": rec["bytes"], "peak_mb": round(rec["peak_mb"], 1)}
+            if rec["items"] and rec["s"] > 0:
+                out[name]["items_per_s"] = round(rec["items"] / rec["s"], 1)
+        return out
+
+    def table(self):
+        # linhas para imprimir no fim do run
+        return [f"{name:<22} {rec['s']:>8.3f}s {rec['calls']:>6}× {rec['items']:>10} itens "
+                f"{rec['bytes'] / 1024:>10.0f} KB {rec['peak_mb']:>8.1f} MB"
+                for name, rec in self.results.items()]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# statement_extract.py — Extração direta dos campos usados de cada statement xAPI (uma só passagem)
+
+import re
+import pandas as pd
+
+# ─── PADRÕES (compilados uma vez) ───────────────────────────────
+CMID_RE    = re.compile(r"view\.php\?id=(\d+)")
+SECTION_RE = re.compile(r"section\.php\?id=(\d+)")
+
+FIELDS = ["id", "timestamp", "user", "cmid", "verb", "activity", "section_id"]
+
+# ─── EXTRAI CMID DO object.id ──────────────────────────────────
+def extract_cmid(object_id):
+    if isinstance(object_id, str):
+        m = CMID_RE.search(object_id)
+        if m:
+            return int(m.group(1))
+    return None
+
+# ─── EXTRAI SECÇÃO via contextActivities.parent ────────────────
+def extract_section_id(parents):
+    if isinstance(parents, list):
+        for p in parents:
+            url = p.get("id", "") if isinstance(p, dict) else ""
+            m = SECTION_RE.search(url)
+            if m:
+                return int(m.group(1))
+    return None
+
+def _first_text(lang_map):
+    # prefere en-US (como o export original), senão a primeira língua disponível
+    if not isinstance(lang_map, dict) or not lang_map:
+        return None
+    return lang_map.get("en-US") or next(iter(lang_map.values()), None)
+
+def extract_fields(stmt):
+    # devolve um tuplo pela ordem de FIELDS
+    obj = stmt.get("object") or {}
+    object_id = obj.get("id")
+    definition = obj.get("definition") or {}
+
+    verb = stmt.get("verb") or {}
+    verb_name = (verb.get("display") or {}).get("en")
+    if not verb_name and verb.get("id"):
+        verb_name = verb["id"].rsplit("/", 1)[-1]
+
+    # descrição (texto completo da pergunta) → name → URL
+    activity = (_first_text(definition.get("description"))
+                or (definition.get("name") or {}).get("en-US")
+                or object_id)
+
+    actor = stmt.get("actor") or {}
+    user = (actor.get("account") or {}).get("name") or actor.get("mbox")
+
+    parents = ((stmt.get("context") or {}).get("contextActivities") or {}).get("parent")
+
+    return (
+        stmt.get("id"),
+        stmt.get("timestamp"),
+        user,
+        extract_cmid(object_id),
+        verb_name,
+        activity,
+        extract_section_id(parents),
+    )
+
+def extract_batch(stmts):
+    df = pd.DataFrame.from_records([extract_fields(s) for s in stmts], columns=FIELDS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+    df["cmid"] = df["cmid"].astype("Int64")
+    df["section_id"] = df["section_id"].astype("Int64")
+    return df
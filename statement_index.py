@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# statement_index.py — Índice dos statements para filtros (data, módulo, verbo, utilizador)
+#
+# Os statements ficam ordenados por timestamp (o store já os guarda ordenados
+# dentro de cada dia), por isso um intervalo de datas é uma fatia contígua
+# encontrada por pesquisa binária (np.searchsorted). Para cada módulo guarda-se
+# a lista ordenada das linhas onde aparece (row offsets): filtrar um módulo
+# numa semana custa o tamanho dessa fatia, não o da tabela inteira.
+
+import numpy as np
+import pandas as pd
+
+class StatementIndex:
+    def __init__(self, df):
+        # df normalizado (normalize.py), com module/verb/user como category
+        if not df["timestamp"].is_monotonic_increasing:
+            df = df.sort_values("timestamp", kind="stable")
+        self.df = df.reset_index(drop=True)
+        if not isinstance(self.df["user"].dtype, pd.CategoricalDtype):
+            self.df["user"] = self.df["user"].astype("category")  # CSV: user chega como str
+        self.ts = pd.DatetimeIndex(self.df["timestamp"]).as_unit("ns").asi8  # ns desde a epoch
+
+        # módulo → posições (ordenadas) das suas linhas
+        module = self.df["module"]
+        codes = module.cat.codes.to_numpy()
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(module.cat.categories) + 1))
+        self.module_rows = {
+            m: order[bounds[i]:bounds[i + 1]] for i, m in enumerate(module.cat.categories)
+        }
+
+    def __len__(self):
+        return len(self.df)
+
+    def date_range(self):
+        if not len(self.df):
+            return None, None
+        return self.df["timestamp"].iloc[0].date(), self.df["timestamp"].iloc[-1].date()
+
+    def _bounds(self, start, end):
+        # [start, end] em datas (inclusivas, UTC) → [lo, hi) em linhas
+        lo = 0 if start is None else np.searchsorted(
+            self.ts, pd.Timestamp(start, tz="UTC").value, side="left")
+        hi = len(self.ts) if end is None else np.searchsorted(
+            self.ts, (pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)).value, side="left")
+        return lo, hi
+
+    def _codes_mask(self, col, rows, values):
+        # comparação de inteiros (códigos da category) em vez de strings
+        cat = self.df[col]
+        wanted = cat.cat.categories.get_indexer(list(values))
+        codes = cat.cat.codes.to_numpy()
+        return np.isin(codes[rows], wanted[wanted >= 0])
+
+    def slice(self, start=None, end=None, modules=None, verbs=None, users=None):
+        lo, hi = self._bounds(start, end)
+        if not modules and not verbs and not users:
+            return self.df.iloc[lo:hi]  # fatia contígua, sem cópia das colunas
+        if modules:
+            parts = []
+            for m in modules:
+                rows = self.module_rows.get(m)
+                if rows is not None and len(rows):
+                    parts.append(rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)])
+            rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+        else:
+            rows = np.arange(lo, hi)
+        if verbs:
+            rows = rows[self._codes_mask("verb", rows, verbs)]
+        if users:
+            rows = rows[self._codes_mask("user", rows, users)]
+        return self.df.iloc[rows]
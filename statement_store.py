@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# statement_store.py — Store colunar (Parquet) dos statements limpos, particionado por dia
+#
+#   statements_store/date=2025-06-12/part-<uuid>-0.parquet
+#
+# Tipos: timestamp com fuso (UTC), cmid inteiro nullable e user/module/verb/activity
+# dictionary-encoded (chegam ao pandas como category).
+
+import os
+import uuid
+import shutil
+import pandas as pd
+
+import file_lock
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow é opcional: sem ele o export fica só em CSV
+    pa = None
+
+STORE_DIR = "statements_store"
+COLUMNS = ["id", "timestamp", "user", "cmid", "module", "verb", "activity"]
+
+def available():
+    return pa is not None
+
+def _schema():
+    dict_str = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("id", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("user", dict_str),
+        ("cmid", pa.int64()),
+        ("module", dict_str),
+        ("verb", dict_str),
+        ("activity", dict_str),
+    ])
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+
+def _lock(root):
+    # lock de publicação: leitores em shared, trocas de ficheiros em exclusive
+    return os.path.join(root, ".lock")
+
+def exists(root=STORE_DIR):
+    return os.path.isdir(root) and any(n.startswith("date=") for n in os.listdir(root))
+
+# ─── ESCRITA ───────────────────────────────────────────────────
+def append(df, root=STORE_DIR):
+    # escreve um chunk em ficheiros novos (nunca reescreve os existentes);
+    # devolve os dias (partições) tocados. Os ficheiros são escritos numa pasta
+    # escondida e só depois movidos (rename atómico) para as partições.
+    if df.empty:
+        return set()
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".staging-{uuid.uuid4().hex}")
+    df = df[COLUMNS].copy()
+    df["user"] = df["user"].astype(str)
+    table = pa.Table.from_pandas(df, schema=_schema(), preserve_index=False)
+    dates = df["timestamp"].dt.strftime("%Y-%m-%d")
+    table = table.append_column("date", pa.array(dates.to_numpy(), pa.string()))
+    ds.write_dataset(
+        table, staging, format="parquet",
+        partitioning=_partitioning(),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+    )
+    with file_lock.exclusive(_lock(root)):
+        for part in os.listdir(staging):
+            os.makedirs(os.path.join(root, part), exist_ok=True)
+            for name in os.listdir(os.path.join(staging, part)):
+                os.replace(os.path.join(staging, part, name), os.path.join(root, part, name))
+    shutil.rmtree(staging, ignore_errors=True)
+    return set(dates.unique())
+
+def compact(days, root=STORE_DIR):
+    # junta os ficheiros de cada dia num só (os chunks do export criam vários)
+    for day in sorted(days):
+        part_dir = os.path.join(root, f"date={day}")
+        files = sorted(f for f in os.listdir(part_dir) if f.endswith(".parquet"))
+        if len(files) < 2:
+            continue
+        table = pq.read_table([os.path.join(part_dir, f) for f in files], schema=_schema())
+        tmp = os.path.join(part_dir, ".compact.tmp")  # ficheiros com "." são ignorados na leitura
+        pq.write_table(table.sort_by("timestamp"), tmp)
+        # troca sob lock: um leitor vê os ficheiros antigos ou o novo, nunca ambos
+        with file_lock.exclusive(_lock(root)):
+            os.replace(tmp, os.path.join(part_dir, f"part-{uuid.uuid4().hex}-0.parquet"))
+            for f in files:
+                os.remove(os.path.join(part_dir, f))
+
+def import_csv(csv_path, root=STORE_DIR):
+    # migra um statements_clean.csv existente para o store
+    df = pd.read_csv(csv_path, dtype={"id": str, "user": str})
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601")
+    df["cmid"] = df["cmid"].astype("Int64")
+    df["module"] = df["module"].astype(str).str.strip()
+    days = append(df, root)
+    compact(days, root)
+    return len(df)
+
+# ─── LEITURA ───────────────────────────────────────────────────
+def days(root=STORE_DIR):
+    # partições existentes, por ordem
+    if not os.path.isdir(root):
+        return []
+    return sorted(n[len("date="):] for n in os.listdir(root) if n.startswith("date="))
+
+def read(root=STORE_DIR, columns=None, start=None, end=None):
+    # columns: só estas colunas são lidas do disco
+    # start/end (date ou "YYYY-MM-DD", inclusivos): só estas partições são abertas
+    flt = None
+    if start is not None:
+        flt = ds.field("date") >= str(pd.Timestamp(start).date())
+    if end is not None:
+        cond = ds.field("date") <= str(pd.Timestamp(end).date())
+        flt = cond if flt is None else flt & cond
+    with file_lock.shared(_lock(root)):
+        dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+        table = dataset.to_table(columns=columns or COLUMNS, filter=flt)
+    return table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
+def read_ids(root=STORE_DIR):
+    with file_lock.shared(_lock(root)):
+        dataset = ds.dataset(root, format="parquet", partitioning=_partitioning())
+        return dataset.to_table(columns=["id"]).column("id").to_pylist()
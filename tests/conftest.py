@@ -0,0 +1,6 @@
+# conftest.py — os módulos do projeto estão na raiz do repositório (sem pacote)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,73 @@
+# test_export_resume.py — run interrompido retomado pelo cursor, sem linhas repetidas
+
+import copy
+import json
+
+import pytest
+
+import export
+import statement_store
+import workload
+from lrs_standin import StandinLRS, start_server, synthetic_statements
+
+pytestmark = pytest.mark.skipif(not statement_store.available(), reason="pyarrow não instalado")
+
+N = 3000
+CHUNK = "250"
+
+@pytest.fixture
+def lrs(tmp_path, monkeypatch):
+    # o export usa caminhos relativos à pasta atual (store, estado, índice de ids)
+    monkeypatch.chdir(tmp_path)
+    workload.write_cmid_map(export.MAP_CSV)
+    stmts = synthetic_statements(N)
+    # o LRS devolve alguns statements outra vez (mesmo id, guardados mais tarde)
+    again = [dict(copy.deepcopy(s), stored="2025-07-12T00:00:00.000000Z") for s in stmts[::50]]
+    server, endpoint = start_server(StandinLRS(stmts + again, page_size=int(CHUNK)))
+    yield endpoint, {s["id"] for s in stmts}
+    server.shutdown()
+
+def _fail_after(monkeypatch, target, name, calls):
+    # a chamada número `calls` a target.name falha (como um kill a meio do run)
+    original = getattr(target, name)
+    count = {"n": 0}
+    def wrapper(*args, **kwargs):
+        count["n"] += 1
+        if count["n"] == calls:
+            raise RuntimeError("interrompido")
+        return original(*args, **kwargs)
+    monkeypatch.setattr(target, name, wrapper)
+
+def _stored_ids():
+    ids = statement_store.read(export.STORE_DIR, columns=["id"])["id"].astype(str)
+    assert not ids.duplicated().any()
+    return set(ids)
+
+def _state():
+    with open(export.STATE_FILE, encoding="utf8") as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("target, name", [
+    (export.ChunkWriter, "write"),          # antes de escrever o chunk
+    (export, "append_seen_ids"),            # chunk no store, ainda fora do índice de ids
+])
+def test_resume_after_interruption(lrs, monkeypatch, target, name):
+    endpoint, ids = lrs
+    argv = ["--endpoint", endpoint, "--chunk-size", CHUNK]
+    with monkeypatch.context() as m:
+        _fail_after(m, target, name, calls=4)
+        with pytest.raises(RuntimeError):
+            export.main(argv)
+    state = _state()
+    assert state["pending"] and state["cursor"]
+
+    assert export.main(argv) == 0
+    assert _stored_ids() == ids
+    state = _state()
+    assert not state["pending"]
+    assert state["last_run_rows"] == len(ids)
+
+    # um run seguinte não traz nada de novo
+    assert export.main(argv) == 0
+    assert _stored_ids() == ids
+    assert _state()["last_run_rows"] == 0
@@ -0,0 +1,53 @@
+# test_item_analysis.py — α e α sem o item (vetorizados) contra a fórmula direta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import item_analysis
+
+def _naive_alpha(x):
+    # α = k/(k−1) · (1 − Σ var(item) / var(total)), recalculado de raiz
+    k = x.shape[1]
+    return k / (k - 1) * (1 - x.var(axis=0, ddof=1).sum() / x.sum(axis=1).var(ddof=1))
+
+def _scores(n=60, k=8, seed=3):
+    # respostas Likert 1–5 correlacionadas (um traço comum + ruído), com falhas
+    rng = np.random.default_rng(seed)
+    trait = rng.normal(size=(n, 1))
+    x = np.clip(np.round(3 + trait + rng.normal(scale=0.8, size=(n, k))), 1, 5)
+    df = pd.DataFrame(x, columns=[f"Q{i + 1}" for i in range(k)])
+    df.iloc[::11, -1] = np.nan
+    return df
+
+def test_alpha_and_alpha_if_deleted():
+    scores = _scores()
+    result = item_analysis.analyse(scores, max_scores=5, min_score=1)
+    x = scores.dropna().to_numpy()
+    assert result["n"] == len(x) and result["k"] == x.shape[1]
+    assert result["alpha"] == pytest.approx(_naive_alpha(x))
+    expected = [_naive_alpha(np.delete(x, i, axis=1)) for i in range(x.shape[1])]
+    np.testing.assert_allclose(result["items"]["α sem o item"], expected)
+
+def test_item_total_correlation():
+    scores = _scores()
+    items = item_analysis.analyse(scores)["items"]
+    x = scores.dropna().to_numpy()
+    expected = [np.corrcoef(x[:, i], np.delete(x, i, axis=1).sum(axis=1))[0, 1] for i in range(x.shape[1])]
+    np.testing.assert_allclose(items["r item-total"], expected)
+
+def test_two_items_have_no_alpha_if_deleted():
+    items = item_analysis.analyse(_scores(k=2))["items"]
+    assert items["α sem o item"].isna().all()
+
+def test_too_few_items_or_respondents():
+    with pytest.raises(ValueError):
+        item_analysis.analyse(_scores(k=1))
+    with pytest.raises(ValueError):
+        item_analysis.analyse(_scores(n=1))
+
+def test_interpret():
+    assert item_analysis.interpret(0.93) == "Excelente"
+    assert item_analysis.interpret(0.7) == "Aceitável"
+    assert item_analysis.interpret(0.2) == "Inaceitável"
+    assert item_analysis.interpret(float("nan")) == "Indeterminada"
@@ -0,0 +1,50 @@
+# test_sessions.py — Sessionizer (chunk a chunk) igual ao sessions.compute do histórico todo
+
+import pandas as pd
+import pandas.testing as pdt
+
+import sessions
+import workload
+
+def _statements(n=6000, users=40):
+    # statements limpos por ordem de chegada (timestamp), como os recebe o export
+    df = pd.concat(workload.clean_frames(n, users=users), ignore_index=True)
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)[sessions.SOURCE_COLS]
+
+def _sorted(tables):
+    s = tables["sessions"].astype({"user": str, "last_module": str})
+    m = tables["module_time"].astype({"user": str, "module": str})
+    return (s.sort_values(["user", "session"]).reset_index(drop=True),
+            m.sort_values(["user", "module"]).reset_index(drop=True))
+
+def _assert_same(got, expected):
+    for a, b in zip(_sorted(got), _sorted(expected)):
+        pdt.assert_frame_equal(a, b, check_dtype=False, check_exact=False)
+
+def test_incremental_matches_full():
+    df = _statements()
+    sessionizer = sessions.Sessionizer()
+    for i in range(0, len(df), 500):
+        assert sessionizer.update(df.iloc[i:i + 500]) == set()
+    _assert_same(sessionizer.tables(), sessions.compute(df))
+
+def test_resume_from_saved_tables():
+    # o export seguinte parte das tabelas gravadas pelo anterior
+    df = _statements()
+    half = len(df) // 2
+    first = sessions.Sessionizer()
+    first.update(df.iloc[:half])
+    second = sessions.Sessionizer(first.tables())
+    second.update(df.iloc[half:])
+    _assert_same(second.tables(), sessions.compute(df))
+
+def test_late_statements_are_recomputed():
+    # statements atrasados (ex.: --backfill) ficam de fora e são recalculados
+    df = _statements()
+    late_rows = df.index[::7]
+    sessionizer = sessions.Sessionizer()
+    sessionizer.update(df.drop(index=late_rows))
+    late = sessionizer.update(df.loc[late_rows])
+    assert late
+    sessionizer.recompute(df, late)
+    _assert_same(sessionizer.tables(), sessions.compute(df))
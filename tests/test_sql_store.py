@@ -0,0 +1,63 @@
+# test_sql_store.py — a base SQL dá as mesmas tabelas que o caminho pandas
+
+from datetime import date
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+import aggregates
+import item_analysis
+import normalize
+import sessions
+import sql_store
+import statement_index
+import workload
+
+ENGINES = ["sqlite"] + (["duckdb"] if sql_store.duckdb is not None else [])
+FILTERS = {"start": date(2025, 6, 15), "end": date(2025, 6, 21), "modules": ("Módulo 1", "Módulo 2")}
+
+@pytest.fixture(params=ENGINES)
+def db(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(sql_store, "ENGINE", request.param)
+    df = pd.concat(workload.clean_frames(8000, users=60), ignore_index=True)
+    path = str(tmp_path / f"statements.{request.param}")
+    for i in range(0, len(df), 1000):   # como o export: um append por chunk
+        sql_store.append(df.iloc[i:i + 1000], path)
+    return path, normalize.normalize(df)
+
+def _sorted(table, keys):
+    return table.astype({k: str for k in keys}).sort_values(keys).reset_index(drop=True)
+
+def _assert_tables(got, expected):
+    for name, keys in aggregates.KEYS.items():
+        pdt.assert_frame_equal(_sorted(got[name], keys), _sorted(expected[name], keys),
+                               check_dtype=False)
+
+def test_aggregates(db):
+    path, df = db
+    with sql_store.reader(path) as conn:
+        _assert_tables(sql_store.aggregates(conn), aggregates.compute(df))
+
+def test_filtered_aggregates(db):
+    path, df = db
+    index = statement_index.StatementIndex(df)
+    expected = aggregates.compute(index.slice(FILTERS["start"], FILTERS["end"], FILTERS["modules"]))
+    with sql_store.reader(path) as conn:
+        _assert_tables(sql_store.aggregates(conn, **FILTERS), expected)
+
+def test_sessions(db):
+    path, df = db
+    with sql_store.reader(path) as conn:
+        got = sql_store.sessions(conn, sessions.GAP_MINUTES)
+    expected = sessions.compute(df)
+    keys = {"sessions": ["user", "session"], "module_time": ["user", "module"]}
+    for name, k in keys.items():
+        a, b = _sorted(got[name], k), _sorted(expected[name], k)
+        pdt.assert_frame_equal(a[b.columns], b, check_dtype=False, check_exact=False)
+
+def test_question_outcomes(db):
+    path, df = db
+    with sql_store.reader(path) as conn:
+        got = item_analysis.outcome_matrix(sql_store.question_outcomes(conn))
+    pdt.assert_frame_equal(got, item_analysis.xapi_outcomes(df))
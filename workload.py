@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# workload.py — Dados sintéticos com a forma dos dados reais do curso (para testes e benchmarks)
+#
+#   python workload.py sintetico/ --statements 1000000 --users 10000
+#
+# Escreve em sintetico/:
+#   statements.jsonl                     statements xAPI (replay: lrs_standin.py serve --replay)
+#   cmid_module_map.csv                  o mapa cmid → módulo do curso
+#   diagnostica_notas.csv, final_notas.csv   notas exportadas do Moodle (mesmos alunos)
+#   satisfacao.csv                       respostas ao questionário de satisfação
+#
+# Cada utilizador percorre o curso pela ordem real (Apresentação → Robot →
+# A.Diagnóstica → Módulo 1..5 → Satisfação), em sessões separadas por pausas
+# longas, com o peso de statements de cada módulo dos dados reais. Os objetos
+# são os do Moodle (view.php?id=<cmid>, parent section.php?id=<secção>, nem
+# sempre presente), as perguntas H5P ("Pergunta N") e os mesmos verbos. O cmid
+# 99 não está no mapa (só se resolve pela secção). Tudo é sorteado com numpy
+# por blocos de utilizadores: statements() devolve dicts xAPI e clean_frames()
+# os mesmos eventos já no formato limpo do export, sem passar pelos dicts.
+
+import os
+import sys
+import json
+import uuid
+import argparse
+
+import numpy as np
+import pandas as pd
+
+SITE = "https://moodle2025.great-site.net"
+COURSE_ID = 2
+CHUNK = 100_000
+START = "2025-06-11T12:00:00Z"
+DAYS = 30
+
+# (cmid, módulo, secção, tipo de atividade, fração dos statements)
+COURSE = [
+    (39, "Apresentação",  1, "hvp",           0.012),
+    (40, "Robot",         1, "hvp",           0.012),
+    (57, "A.Diagnóstica", 1, "quiz",          0.020),
+    (49, "Módulo 1",      2, "hvp",           0.210),
+    (43, "Módulo 2",      3, "hvp",           0.265),
+    (50, "Módulo 3",      4, "hvp",           0.170),
+    (45, "Módulo 4",      5, "hvp",           0.200),
+    (58, "Módulo 5",      6, "hvp",           0.090),
+    (16, "Satisfação",    9, "questionnaire", 0.021),
+]
+UNMAPPED = (99, 3)        # atividade nova da secção do Módulo 2, fora do mapa
+UNMAPPED_SHARE = 0.05
+SITE_SHARE = 0.06         # vistas da página do curso (módulo "Outro")
+LOGIN_SHARE = 0.7         # sessões que começam com "Logged In"
+PARENT_SHARE = 0.7        # statements que trazem a secção (contextActivities.parent)
+QUESTIONS = 40
+PRINCIPLES = 12
+SHORT_GAP_S = 40          # intervalo médio entre statements de uma sessão
+LONG_GAP_S = 12 * 3600    # pausa média entre sessões
+LONG_GAP_SHARE = 0.04
+
+# verbos por tipo de atividade (os do plugin H5P em minúsculas, os do Moodle com maiúscula)
+VERBS = {
+    "hvp":           (["attempted", "interacted", "answered", "progressed", "completed"],
+                      [0.30, 0.25, 0.20, 0.15, 0.10]),
+    "quiz":          (["Viewed", "Started", "Completed"], [0.5, 0.25, 0.25]),
+    "questionnaire": (["Viewed", "Submitted", "Resumed"], [0.5, 0.4, 0.1]),
+}
+VERB_IRI = {
+    "Viewed": "http://id.tincanapi.com/verb/viewed",
+    "Started": "http://activitystrea.ms/schema/1.0/start",
+    "Completed": "http://adlnet.gov/expapi/verbs/completed",
+    "Submitted": "http://activitystrea.ms/schema/1.0/submit",
+    "Resumed": "http://adlnet.gov/expapi/verbs/resumed",
+    "Logged In": "https://brindlewaye.com/xAPITerms/verbs/loggedin/",
+}
+
+# ─── EVENTOS ───────────────────────────────────────────────────
+# um evento = um statement, como códigos inteiros; os textos só são montados
+# no fim (statements / clean_frames), por lookup em tabelas pequenas
+SHARES = np.array([c[4] for c in COURSE])
+CUM_SHARE = np.cumsum(SHARES / SHARES.sum())
+KINDS = ["hvp", "quiz", "questionnaire", "site", "login"]
+STEP_KIND = np.array([KINDS.index(c[3]) for c in COURSE])
+SITE_STEP, LOGIN_STEP = len(COURSE), len(COURSE) + 1
+
+def _verb_table():
+    names, offsets = [], {}
+    for kind, (verbs, _) in VERBS.items():
+        offsets[kind] = len(names)
+        names += verbs
+    return np.array(names + ["Viewed", "Logged In"], dtype=object), offsets
+
+VERB_NAMES, VERB_OFFSET = _verb_table()
+
+def user_counts(n, users, seed=42):
+    # statements por utilizador: atividade muito desigual (lognormal), todos com ≥ 1
+    users = max(1, min(users, n))
+    rng = np.random.default_rng([seed, 0])
+    w = rng.lognormal(0.0, 1.0, users)
+    return rng.multinomial(n - users, w / w.sum()) + 1
+
+def _blocks(counts, chunk):
+    # blocos de utilizadores consecutivos com ~chunk statements cada
+    first = np.cumsum(counts) - counts
+    block = first // chunk
+    bounds = np.flatnonzero(np.r_[True, block[1:] != block[:-1], True])
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _events(counts, seed, block, t0_ns, span_s):
+    rng = np.random.default_rng([seed, 1, block])
+    k = int(counts.sum())
+    u = np.repeat(np.arange(len(counts)), counts)
+    first = np.cumsum(counts) - counts
+    pos = np.arange(k) - first[u]
+
+    # progresso no curso → atividade (pela ordem do curso)
+    progress = (pos + rng.random(k)) / counts[u]
+    step = np.minimum(np.searchsorted(CUM_SHARE, progress, side="right"), len(COURSE) - 1)
+
+    # tempo: sessões de statements próximos separadas por pausas longas; quem
+    # passaria do fim do período é comprimido para caber nele (com 1 min de folga
+    # para o `stored`)
+    new_session = rng.random(k) < LONG_GAP_SHARE
+    new_session[first] = True
+    dt = np.where(new_session, rng.exponential(LONG_GAP_S, k), rng.exponential(SHORT_GAP_S, k))
+    dt[first] = 0
+    elapsed = np.cumsum(dt)
+    elapsed -= elapsed[first][u]
+    start = rng.random(len(counts)) * span_s * 0.5
+    total = elapsed[first + counts - 1]
+    scale = np.minimum(1.0, (span_s - 60 - start) / np.maximum(total, 1.0))
+    ts = t0_ns + ((start[u] + elapsed * scale[u]) * 1e9).astype("int64")
+    ts -= ts % 1000  # precisão de µs, como nos statements do LRS
+
+    # statements fora das atividades: login no início da sessão, vistas do curso
+    step = np.where(rng.random(k) < SITE_SHARE, SITE_STEP, step)
+    step = np.where(new_session & (rng.random(k) < LOGIN_SHARE), LOGIN_STEP, step)
+
+    kind = np.where(step < len(COURSE), STEP_KIND[np.minimum(step, len(COURSE) - 1)],
+                    np.where(step == SITE_STEP, KINDS.index("site"), KINDS.index("login")))
+    verb = np.where(step == SITE_STEP, len(VERB_NAMES) - 2, len(VERB_NAMES) - 1)
+    for name, (verbs, p) in VERBS.items():
+        rows = kind == KINDS.index(name)
+        verb[rows] = VERB_OFFSET[name] + rng.choice(len(verbs), int(rows.sum()), p=p)
+
+    cmid = np.array([c[0] for c in COURSE] + [COURSE_ID, -1])[step]
+    section = np.array([c[2] for c in COURSE] + [-1, -1])[step]
+    unmapped = (cmid == COURSE[4][0]) & (rng.random(k) < UNMAPPED_SHARE)
+    cmid[unmapped] = UNMAPPED[0]
+    section[rng.random(k) >= PARENT_SHARE] = -1
+    return {
+        "user": u, "ts": ts, "step": step, "kind": kind, "verb": verb,
+        "cmid": cmid, "section": section,
+        "question": rng.integers(1, QUESTIONS + 1, k),
+        "principle": rng.integers(1, PRINCIPLES + 1, k),
+        "described": rng.random(k) < 0.5,
+        "stored_ms": rng.integers(0, 5000, k),
+        "id_bits": rng.integers(0, 2**63, (k, 2), dtype=np.int64),
+    }
+
+def _texts(ev):
+    # object.id, definition.name, definition.description (None se não houver)
+    k = len(ev["ts"])
+    verb = VERB_NAMES[ev["verb"]]
+    hvp = ev["kind"] == KINDS.index("hvp")
+    per_question = hvp & np.isin(verb, ["attempted", "interacted", "answered"])
+    object_id = np.empty(k, dtype=object)
+    for cmid in np.unique(ev["cmid"]):
+        rows = ev["cmid"] == cmid
+        kind = KINDS[ev["kind"][rows][0]]
+        mod = {"hvp": "hvp", "quiz": "quiz", "questionnaire": "questionnaire"}.get(kind)
+        object_id[rows] = (f"{SITE}/mod/{mod}/view.php?id={cmid}" if mod
+                           else f"{SITE}/course/view.php?id={cmid}" if cmid >= 0 else SITE)
+    # perguntas H5P: subContentId fixo por (cmid, pergunta)
+    sub = np.array([str(uuid.UUID(int=q * 7919 + 1)) for q in range(QUESTIONS + 1)], dtype=object)
+    object_id[per_question] = object_id[per_question] + "?subContentId=" + sub[ev["question"][per_question]]
+
+    name = np.full(k, None, dtype=object)
+    questions = np.array([f"Pergunta {q}" for q in range(QUESTIONS + 1)], dtype=object)
+    principles = np.array([f"Princípio {p}" for p in range(PRINCIPLES + 1)], dtype=object)
+    modules = np.array([c[1] for c in COURSE] + ["", ""], dtype=object)
+    name[per_question] = questions[ev["question"][per_question]]
+    done = hvp & (verb == "completed")
+    name[done] = principles[ev["principle"][done]]
+    prog = hvp & (verb == "progressed")
+    name[prog] = modules[ev["step"][prog]]
+    description = np.full(k, None, dtype=object)
+    rows = per_question & ev["described"]
+    description[rows] = name[rows] + ": texto completo da pergunta"
+    return object_id, name, description
+
+def _ids(bits):
+    return [str(uuid.UUID(int=(int(a) << 64) | int(b))) for a, b in bits]
+
+def _iso(ts_ns):
+    return np.char.add(np.datetime_as_string(ts_ns.astype("datetime64[ns]").astype("datetime64[us]"),
+                                             unit="us"), "Z")
+
+def _iter_events(n, users, seed, start, days, chunk):
+    counts = user_counts(n, users or max(10, n // 100), seed)
+    t0 = pd.Timestamp(start).tz_convert("UTC").value
+    for block, (lo, hi) in enumerate(_blocks(counts, chunk)):
+        ev = _events(counts[lo:hi], seed, block, t0, days * 86400)
+        ev["user"] = ev["user"] + lo
+        yield ev
+
+# ─── STATEMENTS xAPI ───────────────────────────────────────────
+def statements(n, users=None, seed=42, start=START, days=DAYS, chunk=CHUNK):
+    # listas de statements xAPI (um bloco de utilizadores por lista)
+    for ev in _iter_events(n, users, seed, start, days, chunk):
+        object_id, name, description = _texts(ev)
+        verbs = VERB_NAMES[ev["verb"]]
+        stamps = _iso(ev["ts"])
+        stored = _iso(ev["ts"] + ev["stored_ms"] * 1_000_000)
+        course = [{"id": f"{SITE}/course/view.php?id={COURSE_ID}"}]
+        batch = []
+        for sid, ts, st, user, verb, oid, nm, desc, sec in zip(
+                _ids(ev["id_bits"]), stamps.tolist(), stored.tolist(), (ev["user"] + 2).tolist(),
+                verbs.tolist(), object_id.tolist(), name.tolist(), description.tolist(),
+                ev["section"].tolist()):
+            obj = {"id": oid}
+            if nm is not None:
+                obj["definition"] = {"name": {"en-US": nm}}
+                if desc is not None:
+                    obj["definition"]["description"] = {"en-US": desc}
+            context = {"grouping": course}
+            if sec >= 0:
+                context["parent"] = [{"id": f"{SITE}/course/section.php?id={sec}"}]
+            batch.append({
+                "id": sid,
+                "timestamp": ts,
+                "stored": st,
+                "actor": {"account": {"name": str(user), "homePage": SITE}},
+                "verb": {"id": VERB_IRI.get(verb, f"http://adlnet.gov/expapi/verbs/{verb}"),
+                         "display": {"en": verb}},
+                "object": obj,
+                "context": {"contextActivities": context},
+            })
+        yield batch
+
+def clean_frames(n, users=None, seed=42, start=START, days=DAYS, chunk=CHUNK):
+    # os mesmos eventos no formato limpo do export (colunas do statement_store),
+    # com o módulo que o export resolve depois de aprender as secções
+    modules = np.array([c[1] for c in COURSE] + ["Outro", "Outro"], dtype=object)
+    for ev in _iter_events(n, users, seed, start, days, chunk):
+        object_id, name, description = _texts(ev)
+        # a mesma precedência do statement_extract: descrição → nome → URL
+        activity = pd.Series(description).fillna(pd.Series(name)).fillna(pd.Series(object_id))
+        cmid = pd.array(ev["cmid"], dtype="Int64")
+        cmid[ev["cmid"] < 0] = pd.NA
+        yield pd.DataFrame({
+            "id": _ids(ev["id_bits"]),
+            "timestamp": pd.to_datetime(ev["ts"], utc=True),
+            "user": pd.Categorical((ev["user"] + 2).astype(str)),
+            "cmid": cmid,
+            "module": pd.Categorical(modules[ev["step"]]),
+            "verb": pd.Categorical(VERB_NAMES[ev["verb"]]),
+            "activity": pd.Categorical(activity),
+        })
+
+def write_statements(path, n, **kwargs):
+    # .jsonl no formato do `lrs_standin.py record`
+    with open(path, "w", encoding="utf8") as f:
+        for batch in statements(n, **kwargs):
+            f.writelines(json.dumps(s, ensure_ascii=False) + "\n" for s in batch)
+
+def write_cmid_map(path):
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write("cmid;module\n")
+        f.writelines(f"{cmid};{module}\n" for cmid, module, *_ in COURSE)
+
+# ─── NOTAS (Moodle) ────────────────────────────────────────────
+SURNAMES = ["Silva", "Santos", "Ferreira", "Pereira", "Oliveira", "Costa", "Rodrigues", "Martins",
+            "Sousa", "Fernandes", "Gonçalves", "Gomes", "Lopes", "Marques", "Almeida", "Neto"]
+NAMES = ["Ana", "Rui", "Maria", "João", "Inês", "Pedro", "Sofia", "Tiago", "Beatriz", "Diogo",
+         "Carolina", "Miguel", "Mariana", "Francisco", "Rita", "Tomás"]
+MONTHS = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho", "agosto",
+          "setembro", "outubro", "novembro", "dezembro"]
+PARTIAL = [0.0, 0.26 / 0.77, 0.62 / 0.77]   # créditos parciais dos CSVs reais (0,26 e 0,62 de 0,77)
+
+def _comma(values, decimals=2):
+    return [f"{v:.{decimals}f}".replace(".", ",") for v in values]
+
+def _pt_date(ts):
+    return f"{ts.day} de {MONTHS[ts.month - 1]} de {ts.year} às {ts:%H:%M}"
+
+def students(n, seed=42):
+    rng = np.random.default_rng([seed, 2])
+    return pd.DataFrame({
+        "Apelido": np.asarray(SURNAMES)[rng.integers(0, len(SURNAMES), n)],
+        "Nome": np.asarray(NAMES)[rng.integers(0, len(NAMES), n)],
+        "E-mail": [f"aluno{i}@alunos.example.pt" for i in range(n)],
+        "ability": rng.normal(0.8, 1.0, n),
+    })
+
+def gradebook(people, questions=13, max_score=0.77, gain=0.0, seed=42, when="2025-06-12T09:00:00Z"):
+    # CSV de notas de um quiz, como o Moodle o exporta (vírgula decimal, linha "Média")
+    rng = np.random.default_rng([seed, 3, int(gain * 1000)])
+    n = len(people)
+    difficulty = rng.normal(0.0, 0.8, questions)
+    p = 1 / (1 + np.exp(-(people["ability"].to_numpy()[:, None] + gain - difficulty)))
+    full = rng.random((n, questions)) < p
+    partial = np.asarray(PARTIAL)[rng.integers(0, len(PARTIAL), (n, questions))]
+    scores = np.round(np.where(full, 1.0, partial) * max_score, 2)
+    total = questions * max_score
+    grades = np.round(scores.sum(axis=1) / total * 10, 2)
+
+    begin = pd.Timestamp(when) + pd.to_timedelta(rng.integers(0, 7 * 86400, n), unit="s")
+    spent = rng.integers(120, 1800, n)
+    end = begin + pd.to_timedelta(spent, unit="s")
+    table = pd.DataFrame({
+        "Apelido": people["Apelido"], "Nome": people["Nome"], "E-mail": people["E-mail"],
+        "Estado": "Terminadas",
+        "Iniciada": [_pt_date(t) for t in begin],
+        "Terminada": [_pt_date(t) for t in end],
+        "Tempo gasto": [f"{s // 60} minutos {s % 60} segundos" for s in spent],
+        "Avaliação/10,00": _comma(grades),
+    })
+    label = _comma([max_score])[0]
+    for q in range(questions):
+        table[f"P. {q + 1} /{label}"] = _comma(scores[:, q])
+    mean = {"Apelido": "Média", "Avaliação/10,00": _comma([grades.mean()])[0]}
+    mean.update({f"P. {q + 1} /{label}": _comma([scores[:, q].mean()])[0] for q in range(questions)})
+    return pd.concat([table, pd.DataFrame([mean])], ignore_index=True).fillna("")
+
+# ─── QUESTIONÁRIO DE SATISFAÇÃO ────────────────────────────────
+SATISF_TEMPLATE = "Avalia_o_Satisfa_o_do_curso.csv"
+META_COLS = ["Resposta", "Data/hora de submissão:", "Instituição", "Departamento", "Disciplina",
+             "Grupo", "ID", "Nome completo", "Nome de utilizador", "E-mail"]
+
+def _satisf_columns(template=SATISF_TEMPLATE):
+    # as perguntas do questionário real, se estiver disponível; senão genéricas
+    if os.path.isfile(template):
+        return list(pd.read_csv(template, sep=";", encoding="utf-8-sig", nrows=0).columns)
+    likert = [f"Q0{g}_{name}->Afirmação {i}" for g, name in
+              ((1, "cognitivo"), (2, "ENV. EMOCIONAL"), (3, "satisfação")) for i in range(1, 11)]
+    return (META_COLS + likert + ["Q04_Data de Nascimento"]
+            + [f"Q05_Distrito de residência->{d}" for d in ("Aveiro", "Lisboa", "Porto", "Viseu")]
+            + ["Q06_Nacionalidade"]
+            + [f"Q07_Nível de escolaridade completo->{e}" for e in ("12º ano", "Licenciatura", "Mestrado")]
+            + ["Q08_Deixa uma sugestão/comentário!"])
+
+def satisfaction(people, seed=42, template=SATISF_TEMPLATE):
+    # respostas Likert 1–5 correlacionadas (um traço latente por aluno e grupo)
+    rng = np.random.default_rng([seed, 4])
+    n = len(people)
+    columns = _satisf_columns(template)
+    table = pd.DataFrame(index=range(n))
+    table["Resposta"] = np.arange(1, n + 1)
+    submitted = pd.Timestamp("2025-06-20") + pd.to_timedelta(rng.integers(0, 10 * 86400, n), unit="s")
+    table["Data/hora de submissão:"] = submitted.strftime("%d/%m/%y %H:%M")
+    table["Disciplina"] = "Animação 2D"
+    table["ID"] = np.arange(1, n + 1)
+    table["Nome completo"] = (people["Nome"] + " " + people["Apelido"]).to_numpy()
+    table["Nome de utilizador"] = [str(10000 + i) for i in range(n)]
+    table["E-mail"] = people["E-mail"].to_numpy()
+
+    trait = rng.normal(1.2, 0.8, n)
+    for prefix in ("Q01", "Q02", "Q03"):
+        cols = [c for c in columns if c.startswith(prefix)]
+        group = trait + rng.normal(0, 0.4, n)
+        noise = rng.normal(0, 0.7, (n, len(cols)))
+        values = np.clip(np.rint(3 + group[:, None] + noise), 1, 5).astype(int)
+        table[cols] = values
+    birth = pd.Timestamp("1995-01-01") + pd.to_timedelta(rng.integers(0, 12 * 365, n), unit="D")
+    table[[c for c in columns if c.startswith("Q04")]] = birth.strftime("%d/%m/%y").to_numpy()[:, None]
+    for prefix in ("Q05", "Q07"):
+        cols = [c for c in columns if c.startswith(prefix)]
+        table[cols] = np.eye(len(cols), dtype=int)[rng.integers(0, len(cols), n)]
+    table[[c for c in columns if c.startswith("Q06")]] = \
+        np.where(rng.random(n) < 0.9, "Portuguesa", "Brasileira")[:, None]
+    table[[c for c in columns if c.startswith("Q08")]] = ""
+    return table.reindex(columns=columns).fillna("")
+
+# ─── ESCRITA DE UM CONJUNTO COMPLETO ───────────────────────────
+def write_all(out_dir, n, users=None, seed=42):
+    os.makedirs(out_dir, exist_ok=True)
+    users = users or max(10, n // 100)
+    people = students(users, seed)
+    paths = {
+        "statements": os.path.join(out_dir, "statements.jsonl"),
+        "cmid_map": os.path.join(out_dir, "cmid_module_map.csv"),
+        "diag": os.path.join(out_dir, "diagnostica_notas.csv"),
+        "final": os.path.join(out_dir, "final_notas.csv"),
+        "satisf": os.path.join(out_dir, "satisfacao.csv"),
+    }
+    write_statements(paths["statements"], n, users=users, seed=seed)
+    write_cmid_map(paths["cmid_map"])
+    gradebook(people, seed=seed).to_csv(paths["diag"], index=False, encoding="utf8")
+    gradebook(people, gain=0.6, seed=seed, when="2025-07-01T09:00:00Z") \
+        .to_csv(paths["final"], index=False, encoding="utf8")
+    satisfaction(people, seed).to_csv(paths["satisf"], sep=";", index=False, encoding="utf-8-sig")
+    return paths
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gera dados sintéticos com a forma dos dados do curso.")
+    ap.add_argument("out_dir")
+    ap.add_argument("--statements", type=int, default=100_000)
+    ap.add_argument("--users", type=int, help="nº de utilizadores (por omissão 1 por 100 statements)")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args(argv)
+    paths = write_all(args.out_dir, args.statements, args.users, args.seed)
+    for name, path in paths.items():
+        print(f"✅ {name}: {path}")
+
+if __name__ == "__main__":
+    sys.exit(main())